@@ -0,0 +1,165 @@
+# agents/model_cache.py
+
+import os
+import json
+import hashlib
+from importlib import metadata
+
+# Libraries whose versions change what a saved policy means or how it loads
+VERSIONED_PACKAGES = ['stable-baselines3', 'torch', 'nasim', 'gymnasium', 'numpy']
+
+
+def _package_versions():
+    """
+    Returns the installed versions of the packages that affect a trained policy.
+    """
+    versions = {}
+    for package in VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def model_cache_key(scenario_file, hyperparameters, seed):
+    """
+    Computes the content address of a trained policy.
+
+    Parameters:
+    - scenario_file (str): Path to the NASim scenario; its contents, not its path, are hashed.
+    - hyperparameters (dict): Training settings (JSON-serializable).
+    - seed (int): Training seed, or None.
+
+    Returns:
+    - key (str): Hex SHA-256 digest.
+    """
+    with open(scenario_file, 'rb') as file:
+        scenario_digest = hashlib.sha256(file.read()).hexdigest()
+    payload = json.dumps({
+        'scenario': scenario_digest,
+        'hyperparameters': hyperparameters,
+        'seed': seed,
+        'versions': _package_versions()
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ModelCache:
+    """
+    On-disk cache of saved PPO policies keyed by model_cache_key().
+
+    Entries are SB3 zip archives named after their key with a JSON sidecar describing
+    what produced them, and optionally the policy exported for NumPy inference (see
+    NumpyPolicy), which can be loaded without torch. Hits refresh the entry's modification time, and once the cache
+    exceeds max_entries or max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir='model_cache', max_entries=32, max_bytes=None):
+        """
+        Parameters:
+        - cache_dir (str): Directory holding the cached policies.
+        - max_entries (int): Maximum number of cached policies (None for no limit).
+        - max_bytes (int): Maximum total size of the cached policies (None for no limit).
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _model_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.zip')
+
+    def _exported_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def get(self, key):
+        """
+        Returns the path of a cached policy, or None on a miss.
+        """
+        path = self._model_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None  # evicted by another process in the meantime
+        return path
+
+    def put(self, key, model, description=None):
+        """
+        Saves a trained model under key and evicts old entries if needed.
+
+        Parameters:
+        - key (str): Cache key from model_cache_key().
+        - model (BaseAlgorithm): Trained SB3 model.
+        - description (dict): Inputs of the key, stored alongside for inspection.
+
+        Returns:
+        - path (str): Path of the cached policy.
+        """
+        path = self._model_path(key)
+        # Write under a process-unique name and rename, so concurrent workers never see partial files
+        tmp_path = os.path.join(self.cache_dir, f'.{key}.{os.getpid()}.tmp.zip')
+        model.save(tmp_path)
+        os.replace(tmp_path, path)
+
+        if description is not None:
+            with open(os.path.join(self.cache_dir, f'{key}.json'), 'w') as file:
+                json.dump(description, file, indent=2, sort_keys=True, default=str)
+
+        self.evict()
+        return path
+
+    def get_exported(self, key):
+        """
+        Returns the path of the exported NumPy policy of a cached policy, or None on a miss.
+        """
+        if self.get(key) is None:
+            return None
+        path = self._exported_path(key)
+        return path if os.path.exists(path) else None
+
+    def put_exported(self, key, policy):
+        """
+        Saves the exported NumPy policy of a cached policy.
+
+        Parameters:
+        - key (str): Cache key of a cached policy.
+        - policy (NumpyPolicy): Exported policy.
+
+        Returns:
+        - path (str): Path of the exported policy.
+        """
+        path = self._exported_path(key)
+        tmp_path = os.path.join(self.cache_dir, f'.{key}.{os.getpid()}.tmp.npz')
+        policy.save(tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def evict(self):
+        """
+        Removes least recently used policies until the cache is within its limits.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.zip') or name.startswith('.'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()  # oldest first
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and ((self.max_entries is not None and len(entries) > self.max_entries) or
+                           (self.max_bytes is not None and total_bytes > self.max_bytes)):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            for stale in (path, path[:-len('.zip')] + '.json', path[:-len('.zip')] + '.npz'):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,180 @@
+# agents/numpy_policy.py
+
+import numpy as np
+from gymnasium import spaces
+
+# Activations of the policy network by torch module name
+ACTIVATIONS = {
+    'Tanh': np.tanh,
+    'ReLU': lambda x: np.maximum(x, 0),
+    'Identity': lambda x: x,
+}
+
+
+class NumpyPolicy:
+    """
+    Greedy forward pass of a trained SB3 MlpPolicy in plain NumPy.
+
+    Holds the policy branch of the network (the value branch is not needed to act)
+    and the action head, in float32 like the torch model. predict() takes the same
+    arguments and returns the same shapes as BaseAlgorithm.predict, always with the
+    deterministic action (argmax of the logits), so evaluation code can use either.
+    Neither this module nor loading a saved policy imports torch.
+    """
+
+    def __init__(self, weights, biases, action_weight, action_bias, activation, observation_shape):
+        """
+        Parameters:
+        - weights (list of np.ndarray): Hidden layer weights, (in, out) each.
+        - biases (list of np.ndarray): Hidden layer biases.
+        - action_weight (np.ndarray): Action head weights, (in, n_actions).
+        - action_bias (np.ndarray): Action head biases.
+        - activation (str): Torch name of the hidden activation, a key of ACTIVATIONS.
+        - observation_shape (tuple): Shape of one observation.
+        """
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.action_weight = np.ascontiguousarray(action_weight, dtype=np.float32)
+        self.action_bias = np.asarray(action_bias, dtype=np.float32)
+        self.activation = activation
+        self._activation = ACTIVATIONS[activation]
+        self.observation_shape = tuple(int(d) for d in observation_shape)
+        self.n_features = int(np.prod(self.observation_shape))
+
+    def logits(self, observations):
+        """
+        Returns the action logits of a batch of flattened observations, (n, n_actions).
+        """
+        x = observations
+        for weight, bias in zip(self.weights, self.biases):
+            x = self._activation(x @ weight + bias)
+        return x @ self.action_weight + self.action_bias
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        """
+        Returns the greedy action(s) of one observation or a batch, like BaseAlgorithm.predict.
+
+        Returns:
+        - actions (np.ndarray): One action per observation; 0-d for a single observation.
+        - state (None): No recurrent state.
+        """
+        observation = np.asarray(observation, dtype=np.float32)
+        vectorized = observation.ndim > len(self.observation_shape)
+        actions = self.logits(observation.reshape(-1, self.n_features)).argmax(axis=1)
+        if not vectorized:
+            actions = actions.squeeze(axis=0)
+        return actions, None
+
+    def save(self, path):
+        """
+        Saves the policy to an .npz file (no pickled objects).
+        """
+        arrays = {f'weight_{i}': w for i, w in enumerate(self.weights)}
+        arrays.update({f'bias_{i}': b for i, b in enumerate(self.biases)})
+        np.savez(path, action_weight=self.action_weight, action_bias=self.action_bias,
+                 activation=np.array(self.activation), observation_shape=np.array(self.observation_shape),
+                 **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a policy saved by save().
+        """
+        with np.load(path, allow_pickle=False) as data:
+            n_layers = sum(1 for name in data.files if name.startswith('weight_'))
+            return cls(
+                [data[f'weight_{i}'] for i in range(n_layers)],
+                [data[f'bias_{i}'] for i in range(n_layers)],
+                data['action_weight'],
+                data['action_bias'],
+                str(data['activation']),
+                tuple(data['observation_shape'])
+            )
+
+
+def export_policy(model):
+    """
+    Extracts the policy network of a trained SB3 PPO model into a NumpyPolicy.
+
+    Supports the MlpPolicy of a Box observation space and a Discrete action space:
+    a flattening feature extractor, an MLP of linear layers with one activation and
+    a linear action head. Called on a loaded model, so torch is already imported.
+
+    Parameters:
+    - model (PPO): Trained model.
+
+    Returns:
+    - policy (NumpyPolicy): Torch-free policy giving the model's deterministic actions.
+    """
+    policy = model.policy
+    if not isinstance(policy.observation_space, spaces.Box) or not isinstance(policy.action_space, spaces.Discrete):
+        raise ValueError("Only Box observation and Discrete action spaces can be exported")
+    if type(policy.pi_features_extractor).__name__ != 'FlattenExtractor':
+        raise ValueError(f"Unsupported features extractor: {type(policy.pi_features_extractor).__name__}")
+
+    weights, biases, activations = [], [], set()
+    for module in policy.mlp_extractor.policy_net:
+        name = type(module).__name__
+        if name == 'Linear':
+            weights.append(module.weight.detach().cpu().numpy().T)
+            biases.append(module.bias.detach().cpu().numpy())
+        else:
+            activations.add(name)
+    if len(activations) > 1:
+        raise ValueError(f"Mixed activations cannot be exported: {sorted(activations)}")
+
+    return NumpyPolicy(
+        weights,
+        biases,
+        policy.action_net.weight.detach().cpu().numpy().T,
+        policy.action_net.bias.detach().cpu().numpy(),
+        activations.pop() if activations else 'Identity',
+        policy.observation_space.shape
+    )
+
+
+def evaluate_numpy_policy(policy, env, n_episodes, timer=None):
+    """
+    Plays n_episodes episodes of a NumpyPolicy on a bare NASim environment.
+
+    Parameters:
+    - policy (NumpyPolicy): Policy to evaluate.
+    - env (NASimEnv): Environment with flat actions and observations (see build_nasim_env).
+    - n_episodes (int): Number of episodes.
+    - timer (PhaseTimer): Records the reset, inference and step phases if given.
+
+    Returns:
+    - episodes (dict): 'success', 'return' and 'length' arrays, one entry per episode.
+    """
+    successes, returns, lengths = [], [], []
+    for _ in range(n_episodes):
+        start_ns = timer.now() if timer is not None else 0
+        obs, _ = env.reset()
+        if timer is not None:
+            timer.since('reset', start_ns)
+        terminated = truncated = False
+        episode_return = 0.0
+        length = 0
+        while not (terminated or truncated):
+            if timer is None:
+                action, _ = policy.predict(obs)
+                obs, reward, terminated, truncated, _ = env.step(int(action))
+            else:
+                start_ns = timer.now()
+                action, _ = policy.predict(obs)
+                start_ns = timer.since('inference', start_ns)
+                obs, reward, terminated, truncated, _ = env.step(int(action))
+                timer.since('step', start_ns)
+            episode_return += reward
+            length += 1
+        # NASim terminates an episode only when every sensitive host is compromised
+        successes.append(bool(terminated))
+        returns.append(episode_return)
+        lengths.append(length)
+    return {
+        'success': np.array(successes, dtype=bool),
+        'return': np.array(returns),
+        'length': np.array(lengths, dtype=int)
+    }
@@ -1,42 +1,133 @@
 import os
-import gymnasium as gym  # Import gymnasium as gym
+import numpy as np
 import pandas as pd
-from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
+from environments.environment_loader import resolve_scenario_file, build_nasim_env, make_nasim_env, load_vec_environment
+from agents.model_cache import model_cache_key
+from agents.numpy_policy import NumpyPolicy, export_policy, evaluate_numpy_policy
+
+# Rollout size PPO collects per update across all environments (SB3's single-env default)
+ROLLOUT_SIZE = 2048
 
 class StablePPOAgent:
-    def __init__(self, config_file, log_dir, total_timesteps, n_eval_episodes):
+    def __init__(self, config_file, log_dir, total_timesteps, n_eval_episodes, seed=None,
+                 n_envs=1, start_method=None, model_cache=None, fused_env=False, numpy_inference=False):
         """
         Initialize your PPO Agent.
+
+        Parameters:
+        - config_file (str): Path to the main configuration YAML file naming the NASim scenario.
+        - log_dir (str): Directory for TensorBoard logs.
+        - total_timesteps (int): Training budget.
+        - n_eval_episodes (int): Episodes per evaluate() call.
+        - seed (int): Seed for PPO and the environments; unseeded if None.
+        - n_envs (int): Number of parallel training environments, each in its own subprocess when > 1.
+        - start_method (str): Multiprocessing start method for the training environments.
+        - model_cache (ModelCache): Cache of trained policies; train() loads from it on a hit.
+        - fused_env (bool): Step the environments through the single FusedMonitorWrapper instead of
+          the wrapper stack and Monitor; the transitions are the same.
+        - numpy_inference (bool): Evaluate with the policy exported to NumPy (see NumpyPolicy), which
+          acts greedily. With a model cache the export is cached too, and a cached export is
+          loaded and evaluated without importing torch.
         """
         self.config_file = config_file
+        self.scenario_file = resolve_scenario_file(config_file)
         self.log_dir = log_dir
         self.total_timesteps = total_timesteps
         self.n_eval_episodes = n_eval_episodes
+        self.seed = seed
+        self.n_envs = n_envs
+        self.start_method = start_method
+        self.model_cache = model_cache
+        self.fused_env = fused_env
+        self.numpy_inference = numpy_inference
+        self.cache_hit = False
         self.model = None
+        self.numpy_policy = None
+        self._eval_env = None
+        self._eval_vec_env = None
 
     def load_environment(self):
         """
-        Create and return a valid Gymnasium environment wrapped in Monitor.
+        Create and return a single NASim environment for the scenario wrapped in Monitor.
         """
-        env = gym.make("CartPole-v1")  # Use gymnasium
-        print(f"DEBUG: Created environment of type: {type(env)}")  # Debug statement
+        from stable_baselines3.common.monitor import Monitor
+
+        if self.fused_env:
+            return make_nasim_env(self.scenario_file, fused=True)
+        env = make_nasim_env(self.scenario_file)
         env = Monitor(env)  # Monitor expects a single Env
-        print(f"DEBUG: Wrapped environment in Monitor: {type(env)}")  # Debug statement
         return env
 
+    def load_vec_environment(self):
+        """
+        Create the vectorized NASim training environment with n_envs copies.
+        """
+        return load_vec_environment(
+            self.scenario_file,
+            n_envs=self.n_envs,
+            start_method=self.start_method,
+            seed=self.seed,
+            fused=self.fused_env
+        )
+
+    def hyperparameters(self):
+        """
+        Return the settings that determine the trained policy, which key the model cache.
+
+        The number of environments and the rollout steps per environment both change the
+        training trajectories, so a policy is only reused for the same split.
+        """
+        return {
+            'policy': 'MlpPolicy',
+            'total_timesteps': self.total_timesteps,
+            'n_envs': self.n_envs,
+            'n_steps': self.n_steps()
+        }
+
+    def n_steps(self):
+        """
+        Return the rollout steps per environment for n_envs environments.
+        """
+        return max(64, ROLLOUT_SIZE // self.n_envs)
+
     def train(self):
         """
-        Train the PPO model on the environment.
+        Train the PPO model on the environment, or load it from the model cache if an
+        identical training run has been cached. With numpy_inference, the policy is then
+        exported to NumPy; a cached export is loaded instead of the model.
         """
-        train_env = self.load_environment()
+        cache_key = None
+        if self.model_cache is not None:
+            cache_key = model_cache_key(self.scenario_file, self.hyperparameters(), self.seed)
+            if self.numpy_inference:
+                exported_path = self.model_cache.get_exported(cache_key)
+                if exported_path is not None:
+                    self.numpy_policy = NumpyPolicy.load(exported_path)
+                    self.cache_hit = True
+                    return
+
+        # Imports torch, which a cached NumPy policy does without
+        from stable_baselines3 import PPO
+
+        if cache_key is not None:
+            cached_path = self.model_cache.get(cache_key)
+            if cached_path is not None:
+                self.model = PPO.load(cached_path)
+                self.cache_hit = True
+                self.export_numpy_policy(cache_key)
+                return
 
-        # Create the model
+        train_env = self.load_vec_environment()
+
+        # Create the model; split the rollout across environments so each update
+        # sees the same number of transitions whatever n_envs is
         self.model = PPO(
             "MlpPolicy",
             train_env,
+            n_steps=self.n_steps(),
             verbose=1,
-            tensorboard_log=os.path.join(self.log_dir, "tb_logs")
+            tensorboard_log=os.path.join(self.log_dir, "tb_logs"),
+            seed=self.seed
         )
 
         # Train the model
@@ -45,32 +136,162 @@ class StablePPOAgent:
         # Cleanup
         train_env.close()
 
-    def evaluate(self):
+        if cache_key is not None:
+            self.model_cache.put(cache_key, self.model, description={
+                'scenario_file': self.scenario_file,
+                'hyperparameters': self.hyperparameters(),
+                'seed': self.seed
+            })
+        self.export_numpy_policy(cache_key)
+
+    def export_numpy_policy(self, cache_key=None):
+        """
+        Exports the trained model to a NumpyPolicy if numpy_inference is set, caching it under cache_key.
+        """
+        if not self.numpy_inference:
+            return
+        self.numpy_policy = export_policy(self.model)
+        if cache_key is not None:
+            self.model_cache.put_exported(cache_key, self.numpy_policy)
+
+    def evaluate(self, timer=None):
         """
         Evaluate the trained model.
+
+        Parameters:
+        - timer (PhaseTimer): Records the reset, inference and step phases if given.
+
         Returns: List of booleans indicating success per episode.
         """
+        if self.numpy_policy is not None:
+            return self.evaluate_numpy(self.n_eval_episodes, timer=timer)['success'].tolist()
         if self.model is None:
             raise ValueError("Model not found. Please call train() first.")
 
-        eval_env = self.load_environment()
+        # Keep one evaluation environment alive across calls
+        if self._eval_env is None:
+            self._eval_env = self.load_environment()
+        eval_env = self._eval_env
         successes = []
 
         for _ in range(self.n_eval_episodes):
-            obs, info = eval_env.reset()
+            if timer is None:
+                obs, info = eval_env.reset()
+            else:
+                start_ns = timer.now()
+                obs, info = eval_env.reset()
+                timer.since('reset', start_ns)
             done = False
             truncated = False
 
             while not (done or truncated):
-                action, _states = self.model.predict(obs)
-                obs, reward, done, truncated, info = eval_env.step(action)
-                # Customize your success condition as needed
-            # Example success condition: episode ended with a positive reward
-            successes.append(reward > 0)
+                if timer is None:
+                    action, _states = self.model.predict(obs)
+                    obs, reward, done, truncated, info = eval_env.step(action)
+                else:
+                    start_ns = timer.now()
+                    action, _states = self.model.predict(obs)
+                    start_ns = timer.since('inference', start_ns)
+                    obs, reward, done, truncated, info = eval_env.step(action)
+                    timer.since('step', start_ns)
+            # NASim terminates an episode only when every sensitive host is compromised;
+            # hitting the step limit truncates it instead
+            successes.append(bool(done))
 
-        eval_env.close()
         return successes
 
+    def evaluate_batch(self, n_episodes, n_envs=8, deterministic=False, timer=None):
+        """
+        Evaluate the trained model on n_episodes episodes using a persistent vector of
+        environments stepped in lockstep, with one batched predict call per step.
+
+        Parameters:
+        - n_episodes (int): Number of evaluation episodes.
+        - n_envs (int): Number of environments in the evaluation vector.
+        - deterministic (bool): Use the greedy action instead of sampling.
+        - timer (PhaseTimer): Records the reset, batched inference and batched step phases if given.
+
+        Returns:
+        - episodes (dict): 'success', 'return' and 'length' arrays, one entry per episode.
+        """
+        if self.numpy_policy is not None:
+            # One NumPy forward pass is cheaper than lockstep batching; episodes run back to back
+            return self.evaluate_numpy(n_episodes, timer=timer)
+        if self.model is None:
+            raise ValueError("Model not found. Please call train() first.")
+
+        n_envs = max(1, min(n_envs, n_episodes))
+        if self._eval_vec_env is None or self._eval_vec_env.num_envs != n_envs:
+            if self._eval_vec_env is not None:
+                self._eval_vec_env.close()
+            self._eval_vec_env = load_vec_environment(self.scenario_file, n_envs=n_envs, seed=self.seed,
+                                                      subprocess=False, fused=self.fused_env)
+        vec_env = self._eval_vec_env
+
+        # Spread episodes evenly so short episodes do not dominate the sample
+        targets = np.array([(n_episodes + i) // n_envs for i in range(n_envs)])
+        counts = np.zeros(n_envs, dtype=int)
+        current_returns = np.zeros(n_envs)
+        current_lengths = np.zeros(n_envs, dtype=int)
+        successes, returns, lengths = [], [], []
+
+        if timer is None:
+            obs = vec_env.reset()
+        else:
+            start_ns = timer.now()
+            obs = vec_env.reset()
+            timer.since('reset', start_ns)
+        while (counts < targets).any():
+            if timer is None:
+                actions, _states = self.model.predict(obs, deterministic=deterministic)
+                obs, rewards, dones, infos = vec_env.step(actions)
+            else:
+                start_ns = timer.now()
+                actions, _states = self.model.predict(obs, deterministic=deterministic)
+                start_ns = timer.since('inference', start_ns)
+                obs, rewards, dones, infos = vec_env.step(actions)
+                timer.since('step', start_ns)
+            current_returns += rewards
+            current_lengths += 1
+
+            for i in np.flatnonzero(dones):
+                if counts[i] < targets[i]:
+                    # Episodes cut by the step limit are truncated, not terminated
+                    successes.append(not infos[i].get('TimeLimit.truncated', False))
+                    returns.append(current_returns[i])
+                    lengths.append(current_lengths[i])
+                    counts[i] += 1
+                current_returns[i] = 0
+                current_lengths[i] = 0
+
+        return {
+            'success': np.array(successes, dtype=bool),
+            'return': np.array(returns),
+            'length': np.array(lengths, dtype=int)
+        }
+
+    def evaluate_numpy(self, n_episodes, timer=None):
+        """
+        Evaluate the exported NumPy policy greedily on a persistent bare environment, without torch.
+
+        Returns:
+        - episodes (dict): 'success', 'return' and 'length' arrays, one entry per episode.
+        """
+        if self._eval_env is None:
+            self._eval_env = build_nasim_env(self.scenario_file)
+        return evaluate_numpy_policy(self.numpy_policy, self._eval_env, n_episodes, timer=timer)
+
+    def close(self):
+        """
+        Close the persistent evaluation environments.
+        """
+        if self._eval_env is not None:
+            self._eval_env.close()
+            self._eval_env = None
+        if self._eval_vec_env is not None:
+            self._eval_vec_env.close()
+            self._eval_vec_env = None
+
     def train_and_evaluate(self):
         """
         Train the model and evaluate in sequence.
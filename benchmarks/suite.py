@@ -0,0 +1,389 @@
+# benchmarks/suite.py
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+import numpy as np
+from agents.model_cache import _package_versions
+from environments.scenario_generator import generate_scenario, write_scenario
+from utils.helpers import load_yaml_config
+from utils.scenario_cache import clear_memory_cache
+
+# Version of the history entry layout; bump when fields change meaning
+HISTORY_VERSION = 1
+
+DEFAULT_HISTORY_FILE = os.path.join('benchmarks', 'history.jsonl')
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_THRESHOLD = 0.10
+
+# NASim environments grow with the host count; larger scenarios skip the environment benchmarks
+MAX_ENV_HOSTS = 1000
+
+
+def _measure(func, repeat, ops=1, warmup=1):
+    """
+    Times repeated calls of func and summarises them.
+
+    Parameters:
+    - func (callable): Benchmark body.
+    - repeat (int): Number of timed calls.
+    - ops (int): Operations performed by one call, for the throughput figure.
+    - warmup (int): Untimed calls made first.
+
+    Returns:
+    - stats (dict): Latency percentiles of one call in seconds and throughput in ops/s.
+    """
+    for _ in range(warmup):
+        func()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start_ns = time.perf_counter_ns()
+        func()
+        samples[i] = (time.perf_counter_ns() - start_ns) / 1e9
+    return {
+        'repeat': repeat,
+        'ops': ops,
+        'p50_s': float(np.percentile(samples, 50)),
+        'p90_s': float(np.percentile(samples, 90)),
+        'max_s': float(samples.max()),
+        'mean_s': float(samples.mean()),
+        'ops_per_s': float(ops / np.median(samples)) if np.median(samples) > 0 else None
+    }
+
+
+def format_result(name, stats):
+    """
+    Formats one benchmark result as a console line.
+
+    The throughput is shown as n/a when the median call took less than the timer
+    resolution (see _measure).
+    """
+    ops_per_s = stats.get('ops_per_s')
+    throughput = f"{ops_per_s:14.1f}" if ops_per_s is not None else f"{'n/a':>14s}"
+    return f"{name:45s} p50 {stats['p50_s'] * 1e3:10.3f} ms   {throughput} ops/s"
+
+
+@contextlib.contextmanager
+def _silenced():
+    """
+    Swallows the console output (summaries, progress bars) of the benchmarked code.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def prepare_scenarios(sizes, directory, seed=0):
+    """
+    Generates one scenario per size, with a main configuration file for the runners.
+
+    Returns:
+    - configs (dict): Size -> (scenario file, main configuration file).
+    """
+    configs = {}
+    for size in sizes:
+        scenario_file = os.path.join(directory, f'scenario_{size}.yaml')
+        config_file = os.path.join(directory, f'config_{size}.yaml')
+        write_scenario(generate_scenario(size, seed=seed), scenario_file, config_file)
+        configs[size] = (scenario_file, config_file)
+    return configs
+
+
+def _scripted_benchmarks(size, config_file, work_dir, repeat, runs):
+    from simulations.approach1 import run_approach1
+    from simulations.approach2 import run_approach2
+    from simulations.approach3 import run_approach3
+
+    log_options = {'quiet': True}
+    for name, runner in (('approach1', run_approach1), ('approach2', run_approach2), ('approach3', run_approach3)):
+        log_dir = os.path.join(work_dir, 'logs', f'{name}_{size}')
+        for mode, n_runs in (('scalar', runs), ('vectorized', runs * 100)):
+            def body(runner=runner, n_runs=n_runs, vectorized=(mode == 'vectorized')):
+                runner(master_number=n_runs, config_file=config_file, log_dir=log_dir, seed=0,
+                       vectorized=vectorized, log_options=log_options)
+            yield f'{name}.{mode}[{size}]', body, n_runs, repeat
+
+
+def _loader_benchmarks(size, scenario_file, repeat):
+    def cold():
+        load_yaml_config(scenario_file, use_cache=False)
+
+    def warm():
+        load_yaml_config(scenario_file)
+
+    yield f'load_yaml_config.cold[{size}]', cold, 1, repeat
+    yield f'load_yaml_config.warm[{size}]', warm, 1, repeat * 10
+
+
+def _environment_benchmarks(size, scenario_file, repeat, steps):
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.monitor import Monitor
+    from environments.environment_loader import load_environment, make_nasim_env
+    from agents.numpy_policy import export_policy
+
+    yield f'load_environment[{size}]', lambda: load_environment(scenario_file), 1, repeat
+
+    env = make_nasim_env(scenario_file)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(env.action_space.n, size=steps)
+
+    def step():
+        for action in actions:
+            _, _, terminated, truncated, _ = env.step(int(action))
+            if terminated or truncated:
+                env.reset()
+
+    yield f'env.step[{size}]', step, steps, repeat
+
+    # The monitored wrapper stack PPO trains on, against the fused wrapper replacing it
+    for name, monitored in (('stacked', Monitor(make_nasim_env(scenario_file))),
+                            ('fused', make_nasim_env(scenario_file, fused=True))):
+        def monitored_step(monitored=monitored):
+            # NASim draws exploit outcomes from the global generator; both wrappers replay the same episodes
+            np.random.seed(0)
+            monitored.reset(seed=0)
+            for action in actions:
+                _, _, terminated, truncated, _ = monitored.step(action)
+                if terminated or truncated:
+                    monitored.reset()
+
+        yield f'env.step.{name}[{size}]', monitored_step, steps, repeat
+
+    model = PPO('MlpPolicy', env, seed=0, device='cpu')
+    obs, _ = env.reset()
+
+    def predict():
+        for _ in range(100):
+            model.predict(obs)
+
+    yield f'ppo.predict[{size}]', predict, 100, repeat
+
+    policy = export_policy(model)
+
+    def numpy_predict():
+        for _ in range(100):
+            policy.predict(obs)
+
+    yield f'ppo.predict.numpy[{size}]', numpy_predict, 100, repeat
+
+
+def _sweep_benchmark(configs, work_dir, repeat, runs, workers):
+    from simulations.sweep import APPROACHES, run_parallel_sweep
+
+    config_files = [config_file for _, config_file in configs.values()]
+    scripted = [i for i, approach in enumerate(APPROACHES) if approach[3]]
+
+    def sweep():
+        run_parallel_sweep(config_files, main_log_dir=os.path.join(work_dir, 'sweep_logs'), master_number=runs,
+                           max_workers=workers, base_seed=0, options={'log_options': {'quiet': True}},
+                           approaches=scripted)
+
+    yield 'sweep.scripted', sweep, len(config_files) * len(scripted) * runs, repeat
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=5, runs=1000, steps=500, workers=2, only=None, seed=0):
+    """
+    Runs the benchmark suite.
+
+    Parameters:
+    - sizes (list of int): Host counts of the generated scenarios.
+    - repeat (int): Timed repetitions per benchmark.
+    - runs (int): Monte Carlo runs per scalar approach call (vectorized calls use 100x).
+    - steps (int): Environment steps per env.step sample.
+    - workers (int): Pool size of the end-to-end sweep.
+    - only (str): Regular expression selecting benchmarks by name.
+    - seed (int): Seed of the generated scenarios.
+
+    Returns:
+    - results (dict): Benchmark name -> stats (see _measure).
+    """
+    pattern = re.compile(only) if only else None
+    work_dir = tempfile.mkdtemp(prefix='benchmarks_')
+    results = {}
+    try:
+        configs = prepare_scenarios(sizes, work_dir, seed=seed)
+
+        def benchmarks():
+            for size, (scenario_file, config_file) in configs.items():
+                yield from _loader_benchmarks(size, scenario_file, repeat)
+                yield from _scripted_benchmarks(size, config_file, work_dir, repeat, runs)
+                if size <= MAX_ENV_HOSTS:
+                    yield from _environment_benchmarks(size, scenario_file, repeat, steps)
+            yield from _sweep_benchmark(configs, work_dir, max(1, repeat // 2), runs, workers)
+
+        for name, body, ops, n_repeat in benchmarks():
+            if pattern is not None and not pattern.search(name):
+                continue
+            clear_memory_cache()
+            with _silenced():
+                results[name] = _measure(body, n_repeat, ops=ops)
+            print(format_result(name, results[name]))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_history(results, history_file=DEFAULT_HISTORY_FILE, label=None, settings=None):
+    """
+    Appends a benchmark run to the history file (one JSON object per line).
+
+    Returns:
+    - entry (dict): Recorded entry.
+    """
+    entry = {
+        'version': HISTORY_VERSION,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'label': label,
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'packages': _package_versions(),
+        'settings': settings or {},
+        'results': results
+    }
+    os.makedirs(os.path.dirname(history_file) or '.', exist_ok=True)
+    with open(history_file, 'a') as file:
+        file.write(json.dumps(entry, sort_keys=True) + '\n')
+    return entry
+
+
+def load_history(history_file=DEFAULT_HISTORY_FILE):
+    """
+    Returns the entries of a history file that this version of the suite can read.
+    """
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file) as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+    return [entry for entry in entries if entry.get('version') == HISTORY_VERSION]
+
+
+def _select(entries, ref):
+    """
+    Picks a history entry by index (negative from the end), commit or label.
+    """
+    try:
+        return entries[int(ref)]
+    except IndexError:
+        pass
+    except ValueError:
+        for entry in reversed(entries):
+            if ref in (entry.get('commit'), entry.get('label')):
+                return entry
+    raise KeyError(f"No benchmark history entry matches {ref!r}")
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, metric='p50_s'):
+    """
+    Compares two history entries benchmark by benchmark.
+
+    Parameters:
+    - baseline (dict): Reference entry.
+    - current (dict): Entry under test.
+    - threshold (float): Relative slowdown flagged as a regression (0.1 = 10%).
+    - metric (str): Latency statistic compared.
+
+    Returns:
+    - rows (list of dict): name, baseline, current, ratio and status ('regression',
+      'improvement', 'ok', 'new' or 'missing') for every benchmark in either entry.
+    """
+    rows = []
+    names = list(dict.fromkeys(list(baseline['results']) + list(current['results'])))
+    for name in names:
+        before = baseline['results'].get(name, {}).get(metric)
+        after = current['results'].get(name, {}).get(metric)
+        if before is None or after is None:
+            rows.append({'name': name, 'baseline': before, 'current': after, 'ratio': None,
+                         'status': 'new' if before is None else 'missing'})
+            continue
+        ratio = after / before if before > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'baseline': before, 'current': after, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows, baseline, current):
+    print(f"Baseline: {baseline.get('commit')} {baseline.get('label') or ''} ({baseline['timestamp']})")
+    print(f"Current:  {current.get('commit')} {current.get('label') or ''} ({current['timestamp']})")
+    if baseline.get('machine') != current.get('machine'):
+        print("Warning: the entries were recorded on different machines.")
+    for row in rows:
+        if row['ratio'] is None:
+            print(f"{row['name']:45s} {row['status']}")
+        else:
+            print(f"{row['name']:45s} {row['baseline'] * 1e3:10.3f} ms -> {row['current'] * 1e3:10.3f} ms "
+                  f"x{row['ratio']:6.2f}  {row['status']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite with a versioned history and regression check.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmarks and append them to the history.")
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help="Comma-separated host counts of the generated scenarios.")
+    run_parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per benchmark.")
+    run_parser.add_argument('--runs', type=int, default=1000, help="Monte Carlo runs per scalar approach call.")
+    run_parser.add_argument('--steps', type=int, default=500, help="Environment steps per env.step sample.")
+    run_parser.add_argument('--workers', type=int, default=2, help="Pool size of the end-to-end sweep.")
+    run_parser.add_argument('--only', default=None, help="Regular expression selecting benchmarks.")
+    run_parser.add_argument('--label', default=None, help="Label stored with the history entry.")
+    run_parser.add_argument('--history', default=DEFAULT_HISTORY_FILE)
+    run_parser.add_argument('--no-record', action='store_true', help="Do not append to the history.")
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help="Compare with the previous entry and fail on slowdowns beyond this fraction.")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two history entries.")
+    compare_parser.add_argument('--baseline', default='-2', help="Index, commit or label of the baseline entry.")
+    compare_parser.add_argument('--current', default='-1', help="Index, commit or label of the entry under test.")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative slowdown flagged as a regression.")
+    compare_parser.add_argument('--history', default=DEFAULT_HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        settings = {'sizes': [int(size) for size in args.sizes.split(',')], 'repeat': args.repeat,
+                    'runs': args.runs, 'steps': args.steps, 'workers': args.workers, 'only': args.only}
+        results = run_suite(**settings)
+        previous = load_history(args.history)
+        current = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+                   'label': args.label, 'results': results}
+        if not args.no_record:
+            current = record_history(results, args.history, label=args.label, settings=settings)
+        if previous:
+            rows = compare(previous[-1], current, threshold=args.threshold)
+            print_comparison(rows, previous[-1], current)
+            sys.exit(1 if any(row['status'] == 'regression' for row in rows) else 0)
+    else:
+        entries = load_history(args.history)
+        baseline, current = _select(entries, args.baseline), _select(entries, args.current)
+        rows = compare(baseline, current, threshold=args.threshold)
+        print_comparison(rows, baseline, current)
+        sys.exit(1 if any(row['status'] == 'regression' for row in rows) else 0)
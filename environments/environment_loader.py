@@ -1,40 +1,203 @@
 # environments/environment_loader.py
 
-import os
-import yaml
-import nasim
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv
-from wrappers.custom_wrappers import NumpyToIntActionWrapper, StepAPICorrector
+import warnings
+import functools
+from nasim.envs import NASimEnv
+from nasim.scenarios import utils as scenario_utils
+from nasim.scenarios.loader import ScenarioLoader
 from utils.helpers import load_yaml_config
 
-def load_environment(config_file):
+# Stable Baselines3 and the wrappers built on it import torch, so they are imported by the
+# functions that wrap environments; build_nasim_env and the loaders stay torch-free
+
+
+def resolve_scenario_file(config_file):
     """
-    Loads the NASIM environment with the specified configuration file and applies necessary wrappers.
+    Returns the NASim scenario file named by a main configuration file.
 
     Parameters:
-    - config_file (str): Path to the NASIM network configuration YAML file.
+    - config_file (str): Path to the main configuration YAML file.
 
     Returns:
-    - env (gym.Env): Wrapped environment ready for training.
+    - scenario_file (str): Path to the NASim network configuration YAML file.
+    """
+    main_config = load_yaml_config(config_file)
+    scenario_file = main_config.get('network_config_file')
+    if not scenario_file:
+        raise ValueError("network_config_file not specified in config.yaml")
+    return scenario_file
+
+
+class CachedScenarioLoader(ScenarioLoader):
     """
-    with open(config_file, 'r') as file:
-        network_config = load_yaml_config(file)
+    NASim ScenarioLoader that reads the scenario through the parsed-scenario cache
+    instead of parsing the YAML file again.
+    """
+
+    def load(self, file_path, name=None):
+        name = name if name is not None else scenario_utils.get_file_name(file_path)
+        return self.load_dict(load_yaml_config(file_path), name)
+
+    def load_dict(self, yaml_dict, name):
+        """
+        Builds a NASim scenario from an already parsed scenario document.
+
+        Parameters:
+        - yaml_dict (dict): Parsed scenario; NASim modifies it while parsing.
+        - name (str): Scenario name.
 
-    env = nasim.load(
-        config_file,
+        Returns:
+        - scenario (nasim.scenarios.Scenario): Validated scenario.
+        """
+        self.yaml_dict = yaml_dict
+        self.name = name
+        self._check_scenario_sections_valid()
+
+        self._parse_subnets()
+        self._parse_topology()
+        self._parse_os()
+        self._parse_services()
+        self._parse_processes()
+        self._parse_sensitive_hosts()
+        self._parse_exploits()
+        self._parse_privescs()
+        self._parse_scan_costs()
+        self._parse_host_configs()
+        self._parse_firewall()
+        self._parse_hosts()
+        self._parse_step_limit()
+        return self._construct_scenario()
+
+
+def build_nasim_env(scenario_file):
+    """
+    Builds the bare, fully observable NASIM environment with flat actions and observations.
+
+    Parameters:
+    - scenario_file (str): Path to the NASIM network configuration YAML file.
+
+    Returns:
+    - env (NASimEnv): Unwrapped environment; actions must be Python ints.
+    """
+    scenario = CachedScenarioLoader().load(scenario_file)
+    return NASimEnv(
+        scenario,
         fully_obs=True,
         flat_actions=True,
         flat_obs=True,
-        # Add other necessary parameters from network_config if needed
     )
 
+
+def make_nasim_env(scenario_file, fused=False):
+    """
+    Builds a single NASIM environment with the action and step API wrappers.
+
+    Module-level so it can be pickled into SubprocVecEnv workers.
+
+    Parameters:
+    - scenario_file (str): Path to the NASIM network configuration YAML file.
+    - fused (bool): Apply the one FusedMonitorWrapper instead of the wrapper stack; the
+      environment is then already monitored. With a Stable Baselines3 release the fused
+      wrapper was not checked against, the stack is monitored with Monitor instead.
+
+    Returns:
+    - env (gym.Env): Wrapped environment, unmonitored unless fused.
+    """
+    from wrappers.custom_wrappers import (NumpyToIntActionWrapper, StepAPICorrector, FusedMonitorWrapper,
+                                          fused_monitor_supported)
+
+    env = build_nasim_env(scenario_file)
+    if fused and fused_monitor_supported():
+        return FusedMonitorWrapper(env)
     env = NumpyToIntActionWrapper(env)
     env = StepAPICorrector(env)
-    env = Monitor(env)
+    if fused:
+        from stable_baselines3.common.monitor import Monitor
+
+        warnings.warn("FusedMonitorWrapper is not checked against this Stable Baselines3 release; "
+                      "using Monitor instead")
+        env = Monitor(env)
+    return env
+
+
+def _make_seeded_env(scenario_file, fused, seed, rank):
+    """
+    Builds environment rank of a vector, seeding its action space like make_vec_env.
+    """
+    env = make_nasim_env(scenario_file, fused=fused)
+    if seed is not None:
+        env.action_space.seed(seed + rank)
+    return env
+
+
+def load_environment(config_file, fused=False):
+    """
+    Loads the NASIM environment with the specified configuration file and applies necessary wrappers.
+
+    Parameters:
+    - config_file (str): Path to the NASIM network configuration YAML file.
+    - fused (bool): Use the FusedMonitorWrapper instead of the wrapper stack and Monitor.
+
+    Returns:
+    - env (gym.Env): Wrapped environment ready for training.
+    """
+    from stable_baselines3.common.monitor import Monitor
+    from stable_baselines3.common.vec_env import DummyVecEnv
+
+    env = make_nasim_env(config_file, fused=fused)
+    if not fused:
+        env = Monitor(env)
     env = DummyVecEnv([lambda: env])
 
     print(f"Action Space: {env.action_space}")
     print(f"Observation Space: {env.observation_space}")
 
     return env
+
+
+def load_vec_environment(scenario_file, n_envs=1, start_method=None, seed=None, subprocess=True, fused=False):
+    """
+    Loads n_envs NASIM environments as one vectorized environment.
+
+    With more than one environment each copy runs in its own subprocess, so rollout
+    collection scales with the number of cores.
+
+    Parameters:
+    - scenario_file (str): Path to the NASIM network configuration YAML file.
+    - n_envs (int): Number of parallel environments.
+    - start_method (str): Multiprocessing start method ('fork', 'forkserver' or 'spawn');
+      SubprocVecEnv picks a default if None.
+    - seed (int): Seed for the environments; env i is seeded with seed + i.
+    - subprocess (bool): Run the copies in subprocesses; if False they share the calling
+      process, which suits cheap environments stepped in lockstep.
+    - fused (bool): Monitor each copy with the FusedMonitorWrapper instead of the wrapper stack.
+
+    Returns:
+    - env (VecEnv): Monitored, vectorized environment.
+    """
+    from stable_baselines3.common.env_util import make_vec_env
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+    if n_envs > 1 and subprocess:
+        vec_env_cls = SubprocVecEnv
+        vec_env_kwargs = {'start_method': start_method}
+    else:
+        vec_env_cls = DummyVecEnv
+        vec_env_kwargs = None
+
+    if fused:
+        # make_vec_env always adds a Monitor, which the fused wrapper already is
+        vec_env = vec_env_cls(
+            [functools.partial(_make_seeded_env, scenario_file, True, seed, rank) for rank in range(n_envs)],
+            **(vec_env_kwargs or {})
+        )
+        vec_env.seed(seed)
+        return vec_env
+
+    return make_vec_env(
+        functools.partial(make_nasim_env, scenario_file),
+        n_envs=n_envs,
+        seed=seed,
+        vec_env_cls=vec_env_cls,
+        vec_env_kwargs=vec_env_kwargs
+    )
@@ -0,0 +1,527 @@
+# environments/llm_generator.py
+
+import os
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import yaml
+import numpy as np
+from environments.scenario_generator import generate_scenario, YAML_DUMPER
+from environments.scenario_validator import (validate_scenario_text, summarize, ValidationResult,
+                                             ValidationIssue, STAGE_CRASH, DEFAULT_TIMEOUT)
+from utils.fingerprint import scenario_fingerprint
+from utils.result_store import ResultStore
+from utils.results_sink import ResultsSink
+from utils.scenario_cache import parse_yaml_bytes
+
+# Prompt files of the generation notebook
+INSTRUCTION_FILE = os.path.join('LLM generation', 'instruction.txt')
+EXAMPLE_FILE = os.path.join('LLM generation', 'example.txt')
+
+# Explicit Geometric Network Topology (EGNT) hint of the notebook
+TOPOLOGY_HINT = ('The sum of subnets must be equal to the number of hosts. The network topology must be '
+                 'represented by a matrix of dimensions (1 + len(subnets)) x (1 + len(subnets)).')
+
+# One completion to produce; attempt counts the retries of the same candidate
+GenerationRequest = namedtuple('GenerationRequest', ['index', 'attempt', 'messages', 'max_tokens'])
+
+# Text of a completion and the tokens it consumed
+Completion = namedtuple('Completion', ['text', 'prompt_tokens', 'completion_tokens'])
+
+# Outcome of one candidate; validation is None if the candidate was never generated
+GenerationRecord = namedtuple('GenerationRecord', [
+    'index', 'text', 'validation', 'attempts', 'prompt_tokens', 'completion_tokens', 'latency_s', 'error'
+])
+
+# Column types of the corpus records written by write_corpus
+CORPUS_RECORD_SCHEMA = {
+    'index': 'int64',
+    'valid': 'bool',
+    'duplicate': 'bool',
+    'stage': 'object',
+    'reason': 'object',
+    'fingerprint': 'object',
+    'exact_fingerprint': 'object',
+    'attempts': 'int64',
+    'prompt_tokens': 'int64',
+    'completion_tokens': 'int64',
+    'latency_s': 'float64',
+    'file': 'object'
+}
+
+
+class BackendError(Exception):
+    """
+    A completion request failed.
+    """
+
+
+class RetryableBackendError(BackendError):
+    """
+    A completion request failed in a way worth retrying (rate limit, timeout, server error).
+    """
+
+
+class GenerationBackend:
+    """
+    Source of completions for the generator.
+
+    Subclasses implement the coroutine complete(); they raise RetryableBackendError for
+    transient failures and BackendError for permanent ones.
+    """
+
+    async def complete(self, request):
+        """
+        Returns the Completion of a GenerationRequest.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """
+        Releases the backend's connections.
+        """
+
+
+class OpenAIBackend(GenerationBackend):
+    """
+    Streaming chat completions from the OpenAI API (needs the openai package).
+    """
+
+    def __init__(self, model='gpt-4-turbo', api_key=None, temperature=None, request_timeout=120.0):
+        """
+        Parameters:
+        - model (str): Model name.
+        - api_key (str): API key; OPENAI_API_KEY if None.
+        - temperature (float): Sampling temperature; the API default if None.
+        - request_timeout (float): Seconds before a request is abandoned (and retried).
+        """
+        try:
+            import openai
+        except ImportError as e:
+            raise ImportError("OpenAIBackend needs the openai package: pip install openai") from e
+        self._openai = openai
+        self.client = openai.AsyncOpenAI(api_key=api_key, timeout=request_timeout, max_retries=0)
+        self.model = model
+        self.temperature = temperature
+
+    async def complete(self, request):
+        openai = self._openai
+        kwargs = {'temperature': self.temperature} if self.temperature is not None else {}
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=request.messages,
+                max_tokens=request.max_tokens,
+                stream=True,
+                stream_options={'include_usage': True},
+                **kwargs
+            )
+            parts = []
+            usage = None
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    parts.append(chunk.choices[0].delta.content)
+                if chunk.usage is not None:
+                    usage = chunk.usage
+        except (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                openai.InternalServerError) as e:
+            raise RetryableBackendError(str(e)) from e
+        except openai.OpenAIError as e:
+            raise BackendError(str(e)) from e
+
+        text = ''.join(parts)
+        if usage is None:
+            return Completion(text, estimate_tokens(request.messages), len(text) // 4)
+        return Completion(text, usage.prompt_tokens, usage.completion_tokens)
+
+    async def close(self):
+        await self.client.close()
+
+
+class FakeBackend(GenerationBackend):
+    """
+    Local deterministic stand-in for an LLM server, for offline and load tests.
+
+    Every answer is a synthetic scenario from generate_scenario, wrapped in a fenced
+    block like a chat answer, after a simulated latency. A fraction of requests fail
+    with a retryable error and a fraction of answers are corrupted the way LLM output
+    typically is (wrong topology size, host count not matching the subnets). Latency,
+    failures and answers depend only on the seed and the request's (index, attempt).
+    """
+
+    def __init__(self, seed=0, latency=(0.05, 0.2), failure_rate=0.05, invalid_rate=0.2, n_hosts=(3, 12),
+                 tokens_per_second=None):
+        """
+        Parameters:
+        - seed (int): Seed of the fake server.
+        - latency (tuple of float): Range of the simulated round-trip time in seconds.
+        - failure_rate (float): Probability that a request fails with RetryableBackendError.
+        - invalid_rate (float): Probability that an answer is corrupted.
+        - n_hosts (tuple of int): Range of the number of hosts of the generated scenarios.
+        - tokens_per_second (float): Simulated generation speed added to the latency; None for none.
+        """
+        self.seed = seed
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+        self.n_hosts = n_hosts
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, request):
+        rng = np.random.default_rng([self.seed, request.index, request.attempt])
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = rng.uniform(*self.latency)
+            if rng.random() < self.failure_rate:
+                await asyncio.sleep(delay)
+                raise RetryableBackendError("simulated server overload (HTTP 529)")
+
+            n_hosts = int(rng.integers(self.n_hosts[0], self.n_hosts[1] + 1))
+            scenario = generate_scenario(n_hosts, seed=int(rng.integers(1 << 31)),
+                                         n_sensitive=min(2, n_hosts))
+            if rng.random() < self.invalid_rate:
+                if rng.random() < 0.5:
+                    scenario['topology'] = scenario['topology'][:-1]
+                else:
+                    scenario['subnets'][0] += 1
+            text = "```yaml\n" + yaml.dump(scenario, Dumper=YAML_DUMPER, sort_keys=False,
+                                           default_flow_style=None, width=1 << 16) + "```\n"
+            completion_tokens = len(text) // 4
+            if self.tokens_per_second:
+                delay += completion_tokens / self.tokens_per_second
+            await asyncio.sleep(delay)
+            return Completion(text, estimate_tokens(request.messages), completion_tokens)
+        finally:
+            self.in_flight -= 1
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket for coroutines: acquire(amount) waits until amount tokens are available.
+
+    Amounts larger than the bucket are let through once the bucket is full, so one
+    oversized request cannot block forever.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Parameters:
+        - rate (float): Tokens added per second.
+        - burst (float): Bucket size; one second of tokens if None.
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst is not None else self.rate
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self, amount=1):
+        async with self._lock:  # first come, first served
+            needed = min(amount, self.capacity)
+            self._refill()
+            while self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def refund(self, amount):
+        """
+        Returns tokens reserved for a request that used fewer than estimated.
+        """
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(messages):
+    """
+    Rough token count of chat messages (about four characters per token).
+    """
+    return sum(len(message['content']) for message in messages) // 4 + 4 * len(messages)
+
+
+def build_messages(instruction_file=INSTRUCTION_FILE, example_file=EXAMPLE_FILE, topology_hint=True):
+    """
+    Builds the chat messages of the notebook's EGNT prompt.
+
+    Parameters:
+    - instruction_file (str): System instructions.
+    - example_file (str): Example configuration shown to the model.
+    - topology_hint (bool): Add the explicit subnet and topology size constraints.
+
+    Returns:
+    - messages (list of dict): Chat messages.
+    """
+    with open(instruction_file, 'r') as file:
+        instructions = file.read()
+    with open(example_file, 'r') as file:
+        example = file.read()
+    hint = f" {TOPOLOGY_HINT}" if topology_hint else ''
+    user_input = (f"now generate a new network configuration for this example: {example}.{hint} "
+                  "Do not prompt 'Here is a new network configuration based on the provided requirements:'.")
+    return [{'role': 'system', 'content': instructions}, {'role': 'user', 'content': user_input}]
+
+
+class _Validator:
+    """
+    Validates candidates on a process pool as they arrive, replacing the pool if a
+    worker dies.
+    """
+
+    def __init__(self, max_workers, timeout, build_env, store_dir):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.build_env = build_env
+        self.store = ResultStore(store_dir) if store_dir else None
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def validate(self, text):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(
+                executor, validate_scenario_text, text, self.timeout, self.build_env, self.store
+            )
+        except BrokenProcessPool:
+            if self.executor is executor:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                executor.shutdown(wait=False, cancel_futures=True)
+            return ValidationResult(
+                False, STAGE_CRASH, [ValidationIssue('worker_died', "the worker process died")], 0.0, None
+            )
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+async def generate_corpus(backend, n, messages=None, concurrency=16, max_tokens=4096, max_attempts=5,
+                          backoff=1.0, max_backoff=30.0, requests_per_minute=None, tokens_per_minute=None,
+                          token_budget=None, validate=True, max_workers=None, validation_timeout=DEFAULT_TIMEOUT,
+                          build_env=True, store_dir=None, on_record=None, seed=None):
+    """
+    Generates n candidate scenarios concurrently and validates each as it completes.
+
+    concurrency workers pull candidate indexes from a queue, so at most that many
+    requests are in flight. Failed requests are retried with exponential backoff and
+    jitter; rate limits on requests and tokens per minute are enforced with token
+    buckets (a request reserves its prompt plus max_tokens and the unused part is
+    returned when it completes). Once token_budget tokens have been consumed no new
+    request is started. Each completed candidate is handed to a process pool for
+    validation straight away, so generation and validation overlap.
+
+    Parameters:
+    - backend (GenerationBackend): Completion source, e.g. OpenAIBackend or FakeBackend.
+    - n (int): Number of candidates.
+    - messages (list of dict): Chat messages; build_messages() if None.
+    - concurrency (int): Maximum number of requests in flight.
+    - max_tokens (int): Maximum completion tokens per request.
+    - max_attempts (int): Attempts per candidate before it is given up.
+    - backoff (float): Delay before the first retry in seconds, doubled on each retry.
+    - max_backoff (float): Maximum delay between retries.
+    - requests_per_minute (float): Request rate limit; None for none.
+    - tokens_per_minute (float): Token rate limit; None for none.
+    - token_budget (int): Total tokens the corpus may consume; None for no limit.
+    - validate (bool): Validate the candidates (see environments.scenario_validator).
+    - max_workers (int): Validation processes; os.cpu_count() if None.
+    - validation_timeout (float): Per-candidate validation timeout in seconds.
+    - build_env (bool): Build a NASimEnv for candidates that load.
+    - store_dir (str): ResultStore directory memoizing NASim outcomes by fingerprint.
+    - on_record (callable): Called with each GenerationRecord as soon as it is final.
+    - seed (int): Seed of the retry jitter.
+
+    Returns:
+    - records (list of GenerationRecord): One record per candidate, in index order.
+    """
+    messages = messages if messages is not None else build_messages()
+    jitter = random.Random(seed)
+    request_limiter = AsyncRateLimiter(requests_per_minute / 60.0, burst=max(1.0, requests_per_minute / 60.0)) \
+        if requests_per_minute else None
+    token_limiter = AsyncRateLimiter(tokens_per_minute / 60.0, burst=tokens_per_minute) if tokens_per_minute else None
+    prompt_estimate = estimate_tokens(messages)
+    used_tokens = 0
+
+    queue = asyncio.Queue()
+    for index in range(n):
+        queue.put_nowait(index)
+    records = [None] * n
+    validations = []
+    validator = _Validator(max_workers, validation_timeout, build_env, store_dir) if validate else None
+
+    def finish(record):
+        records[record.index] = record
+        if on_record is not None:
+            on_record(record)
+
+    async def validate_candidate(index, text, attempts, completion, latency):
+        validation = await validator.validate(text)
+        finish(GenerationRecord(index, text, validation, attempts, completion.prompt_tokens,
+                                completion.completion_tokens, latency, None))
+
+    async def generate(index):
+        nonlocal used_tokens
+        start = time.perf_counter()
+        error = None
+        for attempt in range(max_attempts):
+            if token_budget is not None and used_tokens >= token_budget:
+                error = 'token budget exhausted'
+                break
+            if request_limiter is not None:
+                await request_limiter.acquire()
+            reserved = prompt_estimate + max_tokens
+            if token_limiter is not None:
+                await token_limiter.acquire(reserved)
+            try:
+                completion = await backend.complete(GenerationRequest(index, attempt, messages, max_tokens))
+            except RetryableBackendError as e:
+                error = str(e)
+                delay = min(max_backoff, backoff * 2 ** attempt)
+                await asyncio.sleep(delay * (0.5 + jitter.random()))
+                continue
+            except BackendError as e:
+                error = str(e)
+                break
+
+            consumed = completion.prompt_tokens + completion.completion_tokens
+            used_tokens += consumed
+            if token_limiter is not None and consumed < reserved:
+                token_limiter.refund(reserved - consumed)
+            latency = time.perf_counter() - start
+            if validator is None:
+                finish(GenerationRecord(index, completion.text, None, attempt + 1, completion.prompt_tokens,
+                                        completion.completion_tokens, latency, None))
+            else:
+                validations.append(asyncio.ensure_future(
+                    validate_candidate(index, completion.text, attempt + 1, completion, latency)
+                ))
+            return
+        finish(GenerationRecord(index, None, None, attempt + 1, 0, 0, time.perf_counter() - start, error))
+
+    async def worker():
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await generate(index)
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, n)))])
+        if validations:
+            await asyncio.gather(*validations)
+    finally:
+        if validator is not None:
+            validator.close()
+        await backend.close()
+    return records
+
+
+def write_corpus(records, output_dir, write_invalid=False):
+    """
+    Writes the valid candidates as YAML files and one record per candidate to a results file.
+
+    Candidates identical to one already written (same exact fingerprint, see
+    utils.fingerprint) are marked duplicate and not written again. Candidates that only
+    share the loose validation fingerprint, e.g. with hosts in another order, are kept,
+    since the approaches can give them different results.
+
+    Parameters:
+    - records (list of GenerationRecord): Output of generate_corpus().
+    - output_dir (str): Destination directory; records go to <output_dir>/corpus.chunks.
+    - write_invalid (bool): Also write the invalid candidates (under invalid/).
+
+    Returns:
+    - written (int): Number of scenario files written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    seen = set()
+    written = 0
+    with ResultsSink(os.path.join(output_dir, 'corpus'), schema=CORPUS_RECORD_SCHEMA) as sink:
+        for record in records:
+            validation = record.validation
+            valid = bool(validation and validation.valid)
+            fingerprint = validation.fingerprint if validation else None
+            exact_fingerprint = scenario_fingerprint(parse_yaml_bytes(record.text), exact=True) if valid else None
+            duplicate = valid and exact_fingerprint in seen
+            path = None
+            if record.text is not None and ((valid and not duplicate) or (write_invalid and not valid)):
+                name = exact_fingerprint[:16] if valid else hashlib.sha256(record.text.encode('utf-8')).hexdigest()[:16]
+                path = os.path.join(output_dir, '' if valid else 'invalid', f'{record.index:06d}_{name}.yaml')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as file:
+                    file.write(record.text)
+                written += 1
+            if valid:
+                seen.add(exact_fingerprint)
+            if validation is None:
+                reason = record.error
+            else:
+                reason = '; '.join(f"{issue.code}: {issue.message}" for issue in validation.errors) or None
+            sink.append({
+                'index': record.index,
+                'valid': valid,
+                'duplicate': duplicate,
+                'stage': validation.stage if validation else 'generation',
+                'reason': reason,
+                'fingerprint': fingerprint,
+                'exact_fingerprint': exact_fingerprint,
+                'attempts': record.attempts,
+                'prompt_tokens': record.prompt_tokens,
+                'completion_tokens': record.completion_tokens,
+                'latency_s': record.latency_s,
+                'file': path
+            })
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and validate a corpus of NASim scenarios with an LLM.")
+    parser.add_argument('--backend', choices=['fake', 'openai'], default='fake')
+    parser.add_argument('--model', default='gpt-4-turbo', help="Model of the openai backend.")
+    parser.add_argument('--n', type=int, default=100, help="Number of candidates.")
+    parser.add_argument('--concurrency', type=int, default=16, help="Maximum requests in flight.")
+    parser.add_argument('--max-tokens', type=int, default=4096, help="Maximum completion tokens per request.")
+    parser.add_argument('--rpm', type=float, default=None, help="Requests per minute limit.")
+    parser.add_argument('--tpm', type=float, default=None, help="Tokens per minute limit.")
+    parser.add_argument('--token-budget', type=int, default=None, help="Total token budget of the corpus.")
+    parser.add_argument('--workers', type=int, default=None, help="Validation processes.")
+    parser.add_argument('--result-store', default=None, help="ResultStore directory memoizing NASim outcomes.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the fake backend and the retry jitter.")
+    parser.add_argument('--output', default=os.path.join('config', 'generated', 'llm'), help="Corpus directory.")
+    args = parser.parse_args()
+
+    if args.backend == 'openai':
+        backend = OpenAIBackend(model=args.model)
+    else:
+        backend = FakeBackend(seed=args.seed)
+
+    start = time.perf_counter()
+    records = asyncio.run(generate_corpus(
+        backend, args.n, concurrency=args.concurrency, max_tokens=args.max_tokens, requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm, token_budget=args.token_budget, max_workers=args.workers,
+        store_dir=args.result_store, seed=args.seed
+    ))
+    elapsed = time.perf_counter() - start
+    written = write_corpus(records, args.output)
+
+    summary = summarize([record.validation for record in records if record.validation is not None])
+    tokens = sum(record.prompt_tokens + record.completion_tokens for record in records)
+    print(f"{summary['valid']}/{len(records)} valid candidates in {elapsed:.2f}s "
+          f"({len(records) / elapsed:.1f}/s, {tokens} tokens); stages={summary['stages']}")
+    print(f"Wrote {written} unique scenarios to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
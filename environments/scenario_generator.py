@@ -0,0 +1,261 @@
+# environments/scenario_generator.py
+
+import os
+import math
+import argparse
+import yaml
+import numpy as np
+
+# Name pools; scenarios needing more entries get numbered names
+OS_NAMES = ['linux', 'windows', 'macos', 'freebsd']
+SERVICE_NAMES = ['ssh', 'http', 'ftp', 'smtp', 'samba', 'rdp', 'mysql', 'dns']
+PROCESS_NAMES = ['tomcat', 'apache', 'iis', 'nginx', 'cron', 'schtask', 'daemon', 'sudo']
+
+# Value of every sensitive host
+SENSITIVE_HOST_VALUE = 100
+
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def _names(pool, count, prefix):
+    """
+    Returns count names, taken from pool first and numbered afterwards.
+    """
+    return [pool[i] if i < len(pool) else f'{prefix}_{i}' for i in range(count)]
+
+
+def _subset(rng, items, low, high):
+    """
+    Returns a random subset of items with between low and high elements, in pool order.
+    """
+    size = int(rng.integers(low, high + 1))
+    picked = np.sort(rng.choice(len(items), size=size, replace=False))
+    return [items[i] for i in picked]
+
+
+def generate_scenario(n_hosts, n_subnets=None, seed=None, topology_density=0.2, firewall_sparsity=0.5,
+                      n_os=2, n_services=3, n_processes=3, n_exploits=None, n_privescs=None, n_sensitive=2,
+                      n_public=1, host_firewall_rate=0.0, step_limit=None):
+    """
+    Generates a random NASim scenario.
+
+    Subnets are joined by a random spanning tree (so every subnet is connected)
+    plus extra links drawn with probability topology_density. Exploits cover every
+    service and OS, and privilege escalations every process and OS; each host runs
+    at least one service it can be exploited through and one process it can be
+    escalated through. Each spanning-tree link lets through, away from the internet,
+    a service exploitable on the first host of the subnet behind it, so every
+    subnet, including the farthest ones where the sensitive hosts are placed, can be
+    reached. The same arguments and seed always give the same scenario.
+
+    Parameters:
+    - n_hosts (int): Number of hosts (at least n_subnets).
+    - n_subnets (int): Number of subnets, excluding the internet; about sqrt(n_hosts) / 2 if None.
+    - seed (int): Seed of the generator.
+    - topology_density (float): Probability of a link between two subnets beyond the spanning tree.
+    - firewall_sparsity (float): Probability that a firewall blocks a service on a link.
+    - n_os (int): Number of operating systems.
+    - n_services (int): Number of services.
+    - n_processes (int): Number of processes.
+    - n_exploits (int): Number of exploits (at least max(n_services, n_os)); that minimum if None.
+    - n_privescs (int): Number of privilege escalations (at least max(n_processes, n_os)); that minimum if None.
+    - n_sensitive (int): Number of sensitive hosts.
+    - n_public (int): Number of subnets connected to the internet.
+    - host_firewall_rate (float): Fraction of hosts whose own firewall denies a service to one other host.
+    - step_limit (int): Step limit; scaled with the network size if None.
+
+    Returns:
+    - scenario (dict): Scenario in the NASim YAML schema (see write_scenario).
+    """
+    if n_subnets is None:
+        n_subnets = max(1, round(math.sqrt(n_hosts) / 2))
+    min_exploits = max(n_services, n_os)
+    min_privescs = max(n_processes, n_os)
+    n_exploits = min_exploits if n_exploits is None else n_exploits
+    n_privescs = min_privescs if n_privescs is None else n_privescs
+    if n_hosts < n_subnets:
+        raise ValueError(f"n_hosts ({n_hosts}) must be at least n_subnets ({n_subnets})")
+    if n_exploits < min_exploits or n_privescs < min_privescs:
+        raise ValueError("Exploits must cover every service and OS, and privilege escalations every process and OS")
+    if not 1 <= n_sensitive <= n_hosts:
+        raise ValueError(f"n_sensitive must be between 1 and n_hosts, got {n_sensitive}")
+    n_public = min(max(1, n_public), n_subnets)
+
+    rng = np.random.default_rng(seed)
+    os_names = _names(OS_NAMES, n_os, 'os')
+    services = _names(SERVICE_NAMES, n_services, 'service')
+    processes = _names(PROCESS_NAMES, n_processes, 'process')
+
+    # Subnet sizes: at least one host each, the rest spread at random
+    sizes = (1 + rng.multinomial(n_hosts - n_subnets, np.full(n_subnets, 1 / n_subnets))).tolist()
+
+    # Topology over the internet (0) and subnets 1..n_subnets; subnets 1..n_public are public
+    n_nodes = n_subnets + 1
+    topology = np.eye(n_nodes, dtype=int)
+    depth = [0] * n_nodes
+    tree_links = []
+    for subnet in range(1, n_nodes):
+        parent = 0 if subnet <= n_public else int(rng.integers(1, subnet))
+        depth[subnet] = depth[parent] + 1
+        tree_links.append((parent, subnet))
+    extra = np.triu(rng.random((n_nodes, n_nodes)) < topology_density, k=1)
+    extra[0, :] = False  # only the chosen subnets are public
+    topology |= extra | extra.T
+    for parent, subnet in tree_links:
+        topology[parent, subnet] = topology[subnet, parent] = 1
+
+    # Exploits and privilege escalations: first covering every service/process and OS, the rest at random
+    exploits = {}
+    for i in range(n_exploits):
+        service = services[i % n_services] if i < min_exploits else services[rng.integers(n_services)]
+        exploits[f'e_{service}_{i}'] = {
+            'service': service,
+            'os': os_names[i % n_os] if i < min_exploits else os_names[rng.integers(n_os)],
+            'prob': round(float(rng.uniform(0.3, 0.95)), 2),
+            'cost': int(rng.integers(1, 4)),
+            'access': 'root' if rng.random() < 0.1 else 'user'
+        }
+    privescs = {}
+    for i in range(n_privescs):
+        process = processes[i % n_processes] if i < min_privescs else processes[rng.integers(n_processes)]
+        privescs[f'pe_{process}_{i}'] = {
+            'process': process,
+            'os': os_names[i % n_os] if i < min_privescs else os_names[rng.integers(n_os)],
+            'prob': round(float(rng.uniform(0.5, 1.0)), 2),
+            'cost': int(rng.integers(1, 3)),
+            'access': 'root'
+        }
+
+    # Hosts, drawn in bulk
+    addresses = [f'({subnet}, {host})' for subnet in range(1, n_nodes) for host in range(sizes[subnet - 1])]
+    host_os = rng.integers(n_os, size=n_hosts)
+    max_services = min(3, n_services)
+    max_processes = min(3, n_processes)
+    exploitable = {name: sorted({e['service'] for e in exploits.values() if e['os'] == name}, key=services.index)
+                   for name in os_names}
+    escalatable = {name: sorted({pe['process'] for pe in privescs.values() if pe['os'] == name}, key=processes.index)
+                   for name in os_names}
+    host_configurations = {}
+    for address, os_index in zip(addresses, host_os.tolist()):
+        os_name = os_names[os_index]
+        host_services = _subset(rng, services, 1, max_services)
+        if not set(host_services) & set(exploitable[os_name]):
+            host_services[0] = exploitable[os_name][rng.integers(len(exploitable[os_name]))]
+            host_services = list(dict.fromkeys(host_services))
+        host_processes = _subset(rng, processes, 1, max_processes)
+        if not set(host_processes) & set(escalatable[os_name]):
+            host_processes[0] = escalatable[os_name][rng.integers(len(escalatable[os_name]))]
+            host_processes = list(dict.fromkeys(host_processes))
+        host_configurations[address] = {'os': os_name, 'services': host_services, 'processes': host_processes}
+
+    # Service through which the first host of each subnet can be exploited
+    service_index = {service: i for i, service in enumerate(services)}
+    gateway_services = [None]
+    for subnet in range(1, n_nodes):
+        config = host_configurations[f'({subnet}, 0)']
+        gateway_services.append(next(service for service in config['services']
+                                     if service in exploitable[config['os']]))
+
+    # Firewall rules for both directions of every link
+    firewall = {}
+    tree = set(tree_links)
+    links = np.argwhere(np.triu(topology, k=1))
+    for src, dst in links.tolist():
+        for a, b in ((src, dst), (dst, src)):
+            allowed = rng.random(n_services) >= firewall_sparsity
+            if (a, b) in tree:
+                allowed[service_index[gateway_services[b]]] = True
+            if b == 0:
+                allowed[:] = False  # nothing needs to reach the internet
+            firewall[f'({a}, {b})'] = [services[i] for i in np.flatnonzero(allowed)]
+
+    # Host firewalls deny one service to another host of the same subnet
+    n_denying = int(round(host_firewall_rate * n_hosts))
+    if n_denying:
+        offsets = np.cumsum([0] + sizes)
+        for index in rng.choice(n_hosts, size=n_denying, replace=False).tolist():
+            subnet = int(np.searchsorted(offsets, index, side='right'))
+            if sizes[subnet - 1] < 2:
+                continue
+            host = index - offsets[subnet - 1]
+            other = (host + 1 + int(rng.integers(sizes[subnet - 1] - 1))) % sizes[subnet - 1]
+            config = host_configurations[addresses[index]]
+            config['firewall'] = {f'({subnet}, {other})': [config['services'][0]]}
+
+    # Sensitive hosts: drawn from the deepest subnets first
+    by_depth = sorted(range(1, n_nodes), key=lambda subnet: (-depth[subnet], subnet))
+    candidates = []
+    for subnet in by_depth:
+        candidates.extend(f'({subnet}, {host})' for host in range(sizes[subnet - 1]))
+        if len(candidates) >= 4 * n_sensitive:
+            break
+    sensitive = rng.choice(len(candidates), size=n_sensitive, replace=False).tolist()
+    sensitive_hosts = {candidates[i]: SENSITIVE_HOST_VALUE for i in sorted(sensitive)}
+
+    return {
+        'subnets': sizes,
+        'topology': topology.tolist(),
+        'sensitive_hosts': sensitive_hosts,
+        'os': os_names,
+        'services': services,
+        'processes': processes,
+        'exploits': exploits,
+        'privilege_escalation': privescs,
+        'service_scan_cost': 1,
+        'os_scan_cost': 1,
+        'subnet_scan_cost': 1,
+        'process_scan_cost': 1,
+        'host_configurations': host_configurations,
+        'firewall': firewall,
+        'step_limit': step_limit if step_limit is not None else max(1000, 10 * n_hosts)
+    }
+
+
+def write_scenario(scenario, scenario_file, config_file=None):
+    """
+    Writes a generated scenario as NASim YAML, optionally with a main configuration
+    file pointing to it so it can be passed straight to the approach runners.
+
+    Parameters:
+    - scenario (dict): Output of generate_scenario().
+    - scenario_file (str): Destination of the scenario YAML.
+    - config_file (str): Destination of the main configuration YAML; not written if None.
+    """
+    os.makedirs(os.path.dirname(scenario_file) or '.', exist_ok=True)
+    with open(scenario_file, 'w') as file:
+        yaml.dump(scenario, file, Dumper=YAML_DUMPER, sort_keys=False, default_flow_style=None, width=1 << 16)
+
+    if config_file is not None:
+        os.makedirs(os.path.dirname(config_file) or '.', exist_ok=True)
+        with open(config_file, 'w') as file:
+            yaml.dump({'network_config_file': scenario_file}, file, Dumper=YAML_DUMPER, sort_keys=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic NASim scenario.")
+    parser.add_argument('--hosts', type=int, required=True, help="Number of hosts.")
+    parser.add_argument('--subnets', type=int, default=None, help="Number of subnets (excluding the internet).")
+    parser.add_argument('--seed', type=int, default=0, help="Generator seed.")
+    parser.add_argument('--topology-density', type=float, default=0.2)
+    parser.add_argument('--firewall-sparsity', type=float, default=0.5)
+    parser.add_argument('--os', type=int, default=2, dest='n_os')
+    parser.add_argument('--services', type=int, default=3)
+    parser.add_argument('--processes', type=int, default=3)
+    parser.add_argument('--exploits', type=int, default=None)
+    parser.add_argument('--privescs', type=int, default=None)
+    parser.add_argument('--sensitive', type=int, default=2)
+    parser.add_argument('--public', type=int, default=1)
+    parser.add_argument('--host-firewall-rate', type=float, default=0.0)
+    parser.add_argument('--output', default=None, help="Scenario file; config/generated/<hosts>_<seed>.yaml by default.")
+    parser.add_argument('--config', default=None, help="Main configuration file pointing to the scenario.")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join('config', 'generated', f'{args.hosts}_{args.seed}.yaml')
+    generated = generate_scenario(
+        args.hosts, n_subnets=args.subnets, seed=args.seed, topology_density=args.topology_density,
+        firewall_sparsity=args.firewall_sparsity, n_os=args.n_os, n_services=args.services,
+        n_processes=args.processes, n_exploits=args.exploits, n_privescs=args.privescs,
+        n_sensitive=args.sensitive, n_public=args.public, host_firewall_rate=args.host_firewall_rate
+    )
+    write_scenario(generated, output, args.config)
+    print(f"Wrote {args.hosts}-host scenario to {output}")
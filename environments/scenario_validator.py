@@ -0,0 +1,484 @@
+# environments/scenario_validator.py
+
+import os
+import re
+import time
+import signal
+import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from nasim.envs import NASimEnv
+from environments.environment_loader import CachedScenarioLoader
+from utils.scenario_cache import parse_yaml_bytes
+from utils.fingerprint import scenario_fingerprint
+from utils.result_store import ResultStore
+from simulations.scenario import parse_address
+
+# Outcome of validating one candidate; stage is where it stopped ('ok' if valid) and the
+# fingerprint (see utils.fingerprint) is set once the structure is valid
+ValidationResult = namedtuple('ValidationResult', ['valid', 'stage', 'errors', 'elapsed_s', 'fingerprint'])
+
+# One reason a candidate was rejected: a stable code for aggregation and a readable message
+ValidationIssue = namedtuple('ValidationIssue', ['code', 'message'])
+
+STAGE_OK = 'ok'
+STAGE_PARSE = 'parse'
+STAGE_STRUCTURE = 'structure'
+STAGE_NASIM = 'nasim'
+STAGE_TIMEOUT = 'timeout'
+STAGE_CRASH = 'crash'
+
+# Top-level sections of a NASim scenario and their types (optional sections may be absent)
+REQUIRED_SECTIONS = {
+    'subnets': list,
+    'topology': list,
+    'sensitive_hosts': dict,
+    'os': list,
+    'services': list,
+    'processes': list,
+    'exploits': dict,
+    'privilege_escalation': dict,
+    'service_scan_cost': (int, float),
+    'subnet_scan_cost': (int, float),
+    'os_scan_cost': (int, float),
+    'process_scan_cost': (int, float),
+    'host_configurations': dict,
+    'firewall': dict
+}
+OPTIONAL_SECTIONS = {'step_limit': int}
+
+ACCESS_LEVELS = ('user', 'root')
+
+DEFAULT_TIMEOUT = 10.0
+
+_FENCE = re.compile(r'```[A-Za-z]*[ \t]*\n(.*?)```', re.DOTALL)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def extract_yaml(text):
+    """
+    Returns the YAML document of an LLM answer: the first fenced code block if
+    there is one, the whole text otherwise.
+    """
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _address(key, issues, code, where):
+    """
+    Parses an address key into a tuple of two ints, recording an issue if it is not one.
+    """
+    try:
+        address = parse_address(key)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        address = None
+    if (address is None or len(address) != 2
+            or not all(type(part) is int and part >= 0 for part in address)):
+        issues.append(ValidationIssue(code, f"{where}: {key!r} is not a (subnet, host) address"))
+        return None
+    return address
+
+
+def _check_names(doc, section, issues):
+    names = doc[section]
+    if not all(isinstance(name, str) for name in names):
+        issues.append(ValidationIssue('bad_name', f"{section} must be a list of strings"))
+    elif len(set(names)) != len(names):
+        issues.append(ValidationIssue('duplicate_name', f"{section} contains duplicates"))
+    return set(name for name in names if isinstance(name, str))
+
+
+def _check_actions(actions, section, target, targets, os_names, issues):
+    for name, action in actions.items():
+        where = f"{section} {name}"
+        if not isinstance(action, dict):
+            issues.append(ValidationIssue('bad_action', f"{where} must be a mapping"))
+            continue
+        missing = [key for key in (target, 'os', 'prob', 'cost', 'access') if key not in action]
+        if missing:
+            issues.append(ValidationIssue('bad_action', f"{where} is missing {', '.join(missing)}"))
+            continue
+        if action[target] not in targets:
+            issues.append(ValidationIssue(f'unknown_{target}', f"{where} uses unknown {target} {action[target]!r}"))
+        if action['os'] is not None and action['os'] not in os_names:
+            issues.append(ValidationIssue('unknown_os', f"{where} uses unknown os {action['os']!r}"))
+        prob, cost = action['prob'], action['cost']
+        if not isinstance(prob, (int, float)) or isinstance(prob, bool) or not 0 <= prob <= 1:
+            issues.append(ValidationIssue('bad_probability', f"{where} prob {prob!r} is not in [0, 1]"))
+        if not isinstance(cost, (int, float)) or isinstance(cost, bool) or cost < 0:
+            issues.append(ValidationIssue('bad_cost', f"{where} cost {cost!r} is not a non-negative number"))
+        if action['access'] not in ACCESS_LEVELS:
+            issues.append(ValidationIssue('bad_access', f"{where} access {action['access']!r} is not user or root"))
+
+
+def check_structure(doc):
+    """
+    Checks the structure of a parsed scenario without building it.
+
+    Covers what makes most generated scenarios fail: missing or mistyped sections,
+    a topology that is not a (1 + len(subnets)) square 0/1 matrix, host
+    configurations that do not match the subnet sizes, references to unknown OSes,
+    services and processes, and missing firewall rules for linked subnets. Every
+    address key is also checked to be a literal (subnet, host) pair, since NASim
+    evaluates them as Python expressions.
+
+    Parameters:
+    - doc: Parsed scenario document.
+
+    Returns:
+    - issues (list of ValidationIssue): Problems found; empty if the structure is valid.
+    """
+    if not isinstance(doc, dict):
+        return [ValidationIssue('not_mapping', f"scenario must be a mapping, not {type(doc).__name__}")]
+
+    issues = []
+    for section, expected in REQUIRED_SECTIONS.items():
+        if section not in doc:
+            issues.append(ValidationIssue('missing_section', f"missing section {section}"))
+        elif not isinstance(doc[section], expected) or isinstance(doc[section], bool):
+            issues.append(ValidationIssue('bad_type', f"section {section} has type {type(doc[section]).__name__}"))
+    for section, value in doc.items():
+        if section not in REQUIRED_SECTIONS and section not in OPTIONAL_SECTIONS:
+            issues.append(ValidationIssue('unknown_section', f"unknown section {section!r}"))
+        elif section in OPTIONAL_SECTIONS and not isinstance(value, OPTIONAL_SECTIONS[section]):
+            issues.append(ValidationIssue('bad_type', f"section {section} has type {type(value).__name__}"))
+    if issues:
+        return issues
+
+    subnets = doc['subnets']
+    if not subnets or not all(type(size) is int and size > 0 for size in subnets):
+        return [ValidationIssue('bad_subnets', "subnets must be a non-empty list of positive ints")]
+
+    n_subnets = len(subnets) + 1
+    topology = doc['topology']
+    if len(topology) != n_subnets or not all(isinstance(row, list) and len(row) == n_subnets for row in topology):
+        shape = 'x'.join(str(n) for n in (len(topology), len(topology[0]) if topology and isinstance(topology[0], list) else 0))
+        issues.append(ValidationIssue(
+            'topology_shape', f"topology is {shape}, expected {n_subnets}x{n_subnets} (internet + {len(subnets)} subnets)"))
+        topology = None
+    elif not all(type(cell) is int and cell in (0, 1) for row in topology for cell in row):
+        issues.append(ValidationIssue('topology_value', "topology may only contain 0 and 1"))
+        topology = None
+
+    os_names = _check_names(doc, 'os', issues)
+    services = _check_names(doc, 'services', issues)
+    processes = _check_names(doc, 'processes', issues)
+    _check_actions(doc['exploits'], 'exploit', 'service', services, os_names, issues)
+    _check_actions(doc['privilege_escalation'], 'privilege escalation', 'process', processes, os_names, issues)
+
+    expected_hosts = {(subnet + 1, host) for subnet, size in enumerate(subnets) for host in range(size)}
+    n_hosts = len(expected_hosts)
+    host_configs = doc['host_configurations']
+    if len(host_configs) != n_hosts:
+        issues.append(ValidationIssue(
+            'host_count', f"{len(host_configs)} host configurations for {n_hosts} hosts (sum of subnets)"))
+    seen = set()
+    for key, config in host_configs.items():
+        address = _address(key, issues, 'bad_address', 'host_configurations')
+        if address is None:
+            continue
+        if address not in expected_hosts:
+            issues.append(ValidationIssue('unknown_host', f"host {key} is not in the subnets"))
+        elif address in seen:
+            issues.append(ValidationIssue('duplicate_host', f"host {key} is configured twice"))
+        seen.add(address)
+        if not isinstance(config, dict) or any(field not in config for field in ('os', 'services', 'processes')):
+            issues.append(ValidationIssue('bad_host', f"host {key} needs os, services and processes"))
+            continue
+        if config['os'] not in os_names:
+            issues.append(ValidationIssue('unknown_os', f"host {key} runs unknown os {config['os']!r}"))
+        for field, known, code in (('services', services, 'unknown_service'), ('processes', processes, 'unknown_process')):
+            values = config[field]
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                issues.append(ValidationIssue('bad_host', f"host {key} {field} must be a list of names"))
+                continue
+            unknown = [value for value in values if value not in known]
+            if unknown:
+                issues.append(ValidationIssue(code, f"host {key} uses unknown {field} {unknown}"))
+            if len(set(values)) != len(values):
+                issues.append(ValidationIssue('duplicate_name', f"host {key} {field} contains duplicates"))
+        host_firewall = config.get('firewall')
+        if host_firewall is None:
+            continue
+        if not isinstance(host_firewall, dict):
+            issues.append(ValidationIssue('bad_firewall', f"host {key} firewall must be a mapping"))
+            continue
+        for source, denied in host_firewall.items():
+            source_address = _address(source, issues, 'bad_address', f"host {key} firewall")
+            if source_address is not None and source_address not in expected_hosts:
+                issues.append(ValidationIssue('unknown_host', f"host {key} firewall names unknown host {source}"))
+            if not isinstance(denied, list) or any(service not in services for service in denied):
+                issues.append(ValidationIssue('unknown_service', f"host {key} firewall rule {denied!r} uses unknown services"))
+    missing = expected_hosts - seen
+    if missing and len(host_configs) >= n_hosts:
+        issues.append(ValidationIssue('missing_host', f"no configuration for hosts {sorted(missing)[:5]}"))
+
+    sensitive_hosts = doc['sensitive_hosts']
+    if not sensitive_hosts:
+        issues.append(ValidationIssue('no_sensitive_hosts', "at least one sensitive host is required"))
+    for key, value in sensitive_hosts.items():
+        address = _address(key, issues, 'bad_address', 'sensitive_hosts')
+        if address is not None and address not in expected_hosts:
+            issues.append(ValidationIssue('unknown_host', f"sensitive host {key} is not in the subnets"))
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+            issues.append(ValidationIssue('bad_value', f"sensitive host {key} value {value!r} is not positive"))
+
+    links = set()
+    for key, allowed in doc['firewall'].items():
+        link = _address(key, issues, 'bad_address', 'firewall')
+        if link is None:
+            continue
+        links.add(link)
+        if not isinstance(allowed, list) or any(service not in services for service in allowed):
+            issues.append(ValidationIssue('unknown_service', f"firewall rule {key} {allowed!r} uses unknown services"))
+        elif len(set(allowed)) != len(allowed):
+            issues.append(ValidationIssue('duplicate_name', f"firewall rule {key} contains duplicates"))
+    if topology is not None:
+        missing_links = [
+            (src, dst) for src, row in enumerate(topology) for dst, connected in enumerate(row)
+            if connected and src != dst and ((src, dst) not in links or (dst, src) not in links)
+        ]
+        if missing_links:
+            issues.append(ValidationIssue(
+                'missing_firewall', f"no firewall rule in both directions for links {missing_links[:5]}"))
+    return issues
+
+
+def _nasim_check(doc, build_env):
+    """
+    Loads a structurally valid scenario with NASim and optionally builds its environment.
+    """
+    scenario = CachedScenarioLoader().load_dict(doc, 'candidate')
+    if build_env:
+        env = NASimEnv(scenario, fully_obs=True, flat_actions=True, flat_obs=True)
+        env.reset()
+        env.close()
+
+
+def _validate(text, build_env, store):
+    try:
+        doc = parse_yaml_bytes(extract_yaml(text))
+    except _Timeout:
+        raise
+    except Exception as e:
+        message = str(e).splitlines()[0] if str(e) else type(e).__name__
+        return STAGE_PARSE, [ValidationIssue('yaml_error', message)], None
+
+    issues = check_structure(doc)
+    if issues:
+        return STAGE_STRUCTURE, issues, None
+
+    fingerprint = scenario_fingerprint(doc)
+    params = {'build_env': build_env}
+    if store is not None:
+        stored = store.get(fingerprint, 'validation', params)
+        if stored is not None:
+            stage, errors = stored
+            return stage, [ValidationIssue(*issue) for issue in errors], fingerprint
+
+    try:
+        _nasim_check(doc, build_env)
+        stage, errors = STAGE_OK, []
+    except _Timeout:
+        raise
+    except Exception as e:
+        stage, errors = STAGE_NASIM, [ValidationIssue(type(e).__name__, str(e) or type(e).__name__)]
+    if store is not None:
+        store.put(fingerprint, 'validation', params, (stage, [tuple(issue) for issue in errors]))
+    return stage, errors, fingerprint
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def validate_scenario_text(text, timeout=None, build_env=True, store=None):
+    """
+    Validates one candidate scenario in this process.
+
+    The text goes through three stages, stopping at the first that fails: YAML
+    parsing, the structural checks of check_structure, and a NASim load (plus
+    building and resetting the environment, the equivalent of running nasim.demo
+    on it).
+
+    Parameters:
+    - text (str or bytes): Candidate scenario, optionally inside a fenced code block.
+    - timeout (float): Seconds before the candidate is rejected with stage 'timeout';
+      enforced with SIGALRM, so only on Unix and in the main thread. None to disable.
+    - build_env (bool): Build and reset a NASimEnv after loading the scenario.
+    - store (ResultStore): Memo of NASim outcomes by fingerprint; a scenario equivalent to
+      one already loaded skips the NASim stage.
+
+    Returns:
+    - result (ValidationResult): valid, stage, errors (list of ValidationIssue), elapsed_s and
+      fingerprint.
+    """
+    start = time.perf_counter()
+    use_alarm = (timeout is not None and hasattr(signal, 'setitimer')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        stage, errors, fingerprint = _validate(text, build_env, store)
+    except _Timeout:
+        stage, fingerprint = STAGE_TIMEOUT, None
+        errors = [ValidationIssue('timeout', f"validation took more than {timeout}s")]
+    except (MemoryError, RecursionError) as e:
+        stage, fingerprint = STAGE_CRASH, None
+        errors = [ValidationIssue(type(e).__name__, "candidate exhausted resources")]
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return ValidationResult(stage == STAGE_OK, stage, errors, time.perf_counter() - start, fingerprint)
+
+
+def _validate_chunk(texts, timeout, build_env, store_dir):
+    """
+    Validates a chunk of candidates in a worker process.
+    """
+    store = ResultStore(store_dir) if store_dir else None
+    return [validate_scenario_text(text, timeout=timeout, build_env=build_env, store=store) for text in texts]
+
+
+def _failed(stage, code, message):
+    return ValidationResult(False, stage, [ValidationIssue(code, message)], 0.0, None)
+
+
+def _run_chunks(texts, indexes, chunksize, max_workers, timeout, build_env, store_dir, results):
+    """
+    Validates texts[i] for i in indexes on a fresh process pool, storing results in place.
+
+    Returns the indexes whose worker died before returning a result, in input order.
+    """
+    chunks = [indexes[i:i + chunksize] for i in range(0, len(indexes), chunksize)]
+    # In-worker alarms enforce the per-candidate timeout; this deadline only catches
+    # workers stuck in C code, where signals are not delivered.
+    deadline = None if timeout is None else time.monotonic() + 2 * timeout * len(indexes) + 30
+    crashed = []
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(_validate_chunk, [texts[i] for i in chunk], timeout, build_env, store_dir): chunk
+            for chunk in chunks
+        }
+        pending = set(futures)
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    for i in futures[future]:
+                        results[i] = _failed(STAGE_TIMEOUT, 'timeout', "worker did not return before the batch deadline")
+                for process in list(getattr(executor, '_processes', {}).values()):
+                    process.terminate()
+                break
+            for future in done:
+                try:
+                    for i, result in zip(futures[future], future.result()):
+                        results[i] = result
+                except BrokenProcessPool:
+                    crashed.extend(futures[future])
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return sorted(crashed)
+
+
+def validate_batch(texts, max_workers=None, timeout=DEFAULT_TIMEOUT, build_env=True, chunksize=None,
+                   store_dir=None):
+    """
+    Validates candidate scenarios in parallel on a process pool.
+
+    Candidates are sent to the workers in chunks to keep the inter-process overhead
+    per candidate small, and each one is validated under its own timeout. If a worker
+    dies (e.g. a candidate exhausts memory) every unfinished candidate is validated
+    again one per task on a fresh pool; if that pool breaks too, the earliest lost
+    candidates, among which is the one that was running, are validated one at a time
+    until the culprit is found and reported with stage 'crash'.
+
+    Parameters:
+    - texts (list of str): Candidate scenarios.
+    - max_workers (int): Worker processes; os.cpu_count() if None.
+    - timeout (float): Per-candidate timeout in seconds (None to disable).
+    - build_env (bool): Build and reset a NASimEnv for candidates that load.
+    - chunksize (int): Candidates per task; about four tasks per worker if None.
+    - store_dir (str): ResultStore directory shared by the workers, so candidates equivalent
+      to one already validated skip the NASim stage; None to disable.
+
+    Returns:
+    - results (list of ValidationResult): One result per candidate, in input order.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(texts)))
+    if chunksize is None:
+        chunksize = max(1, min(64, len(texts) // (4 * max_workers)))
+
+    results = [None] * len(texts)
+    lost = _run_chunks(texts, list(range(len(texts))), chunksize, max_workers, timeout, build_env, store_dir,
+                       results)
+    while lost:
+        lost = _run_chunks(texts, lost, 1, max_workers, timeout, build_env, store_dir, results)
+        if not lost:
+            break
+        # The pool hands out tasks in order, so the candidate that killed a worker is
+        # among the first max_workers + 1 lost; on a single worker it is the first lost
+        suspects = lost[:max_workers + 1]
+        lost_suspects = _run_chunks(texts, suspects, 1, 1, timeout, build_env, store_dir, results)
+        if lost_suspects:
+            results[lost_suspects[0]] = _failed(
+                STAGE_CRASH, 'worker_died', "the worker process died while validating the candidate")
+        lost = lost_suspects[1:] + lost[len(suspects):]
+    return results
+
+
+def summarize(results):
+    """
+    Counts results by stage and by error code.
+
+    Returns:
+    - summary (dict): {'valid': n, 'stages': {stage: n}, 'errors': {code: n}}.
+    """
+    stages = {}
+    errors = {}
+    for result in results:
+        stages[result.stage] = stages.get(result.stage, 0) + 1
+        for issue in result.errors:
+            errors[issue.code] = errors.get(issue.code, 0) + 1
+    return {'valid': sum(result.valid for result in results), 'stages': stages, 'errors': errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate NASim scenario files.")
+    parser.add_argument('files', nargs='+', help="Scenario YAML files (raw LLM answers are accepted).")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Per-candidate timeout in seconds.")
+    parser.add_argument('--no-env', action='store_true', help="Skip building the NASim environment.")
+    parser.add_argument('--result-store', default=None, help="ResultStore directory memoizing NASim outcomes.")
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.files:
+        with open(path, 'r') as file:
+            texts.append(file.read())
+    start = time.perf_counter()
+    results = validate_batch(texts, max_workers=args.workers, timeout=args.timeout, build_env=not args.no_env,
+                             store_dir=args.result_store)
+    elapsed = time.perf_counter() - start
+
+    for path, result in zip(args.files, results):
+        reason = '; '.join(f"{issue.code}: {issue.message}" for issue in result.errors)
+        print(f"{'VALID  ' if result.valid else 'INVALID'} {path} [{result.stage}] {reason}")
+    summary = summarize(results)
+    print(f"{summary['valid']}/{len(results)} valid in {elapsed:.2f}s; stages={summary['stages']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 # main.py
 
 import os
+import argparse
 import pandas as pd
-from simulations.approach0 import run_ppo_simulation
+from simulations.approach0 import DEFAULT_PPO_ENVS, run_ppo_simulation
 from simulations.approach1 import run_approach1
 from simulations.approach2 import run_approach2
 from simulations.approach3 import run_approach3
+from simulations.sweep import (RUN_TIME_COLUMNS, STOPPING_COLUMNS, build_result_row, cell_seed, discard_partial_results,
+                               run_journaled, run_parallel_sweep)
+from simulations.sweep_journal import DEFAULT_BASE_SEED, SweepJournal
 from utils.helpers import setup_logger
+from utils.results_sink import ResultsSink, export_results
 from datetime import datetime
 
 
@@ -28,7 +33,9 @@ def write_results_to_csv_pandas(all_results, filename='simulation_report.csv'):
     df = pd.DataFrame(all_results, columns=[
         'Iteration', 'Datestamp', 'Approach', 'Total Runs',
         'Successful Attacks', 'Unsuccessful Attacks',
-        'Total Time Taken (s)', 'Average Time per Run (s)'
+        'Total Time Taken (s)', 'Average Time per Run (s)',
+        'Monte Carlo Success Rate', 'Exact Success Probability', 'Expected Step Cost',
+        *STOPPING_COLUMNS, *RUN_TIME_COLUMNS, 'Phase Timings'
     ])
 
     try:
@@ -40,10 +47,35 @@ def write_results_to_csv_pandas(all_results, filename='simulation_report.csv'):
         print(f"Failed to write simulation report to CSV using pandas: {e}")
 
 
-def main(config_file='config/config.yaml', main_log_dir='logs', master_number=10):
+def main(config_file='config/config.yaml', main_log_dir='logs', master_number=10, vectorized=False, analytic=True,
+         ppo_envs=None, batched_eval=False, log_options=None, results_dir=None, topology_aware=False,
+         result_store_dir=None, journal=None, stopping=None, base_seed=None, iteration=0,
+         common_random_numbers=False, fused_env=False, numpy_inference=False):
     """
     Main function to run all simulation approaches.
 
+    Parameters:
+    - config_file (str): Path to the main configuration YAML file.
+    - main_log_dir (str): Root directory for the logs of every approach.
+    - master_number (int): Number of runs per approach.
+    - vectorized (bool): Use the NumPy batch engine for approaches 1-3.
+    - analytic (bool): Add the exact success probability of approaches 1-3 to their results.
+    - ppo_envs (int): Number of parallel PPO training environments; DEFAULT_PPO_ENVS if None.
+    - batched_eval (bool): Evaluate PPO on a persistent vector of environments with batched inference.
+    - log_options (dict): Logging options passed to every approach (see setup_logger).
+    - results_dir (str): Directory receiving one per-run results file per approach; none if None.
+    - topology_aware (bool): Plan approaches 1-3 along the cheapest paths permitted by the topology and firewalls.
+    - result_store_dir (str): ResultStore directory answering approaches already run on an equivalent scenario.
+    - journal (SweepJournal): Sweep journal; approaches it holds a valid result for are not run again.
+    - stopping (dict): Sequential stopping options of every approach (see SequentialStopper);
+      master_number runs each if None.
+    - base_seed (int): Seed of the sweep; each approach gets the cell seed the parallel sweep
+      would give it (see cell_seed). DEFAULT_BASE_SEED if None.
+    - iteration (int): Index of the configuration file in the sweep.
+    - common_random_numbers (bool): Run every approach on the same random streams.
+    - fused_env (bool): Step the PPO environments through the fused wrapper (see FusedMonitorWrapper).
+    - numpy_inference (bool): Evaluate PPO greedily with its policy exported to NumPy (see NumpyPolicy).
+
     Returns:
     - aggregate_results (dict): Dictionary containing results from all simulation approaches.
     """
@@ -53,36 +85,85 @@ def main(config_file='config/config.yaml', main_log_dir='logs', master_number=10
 
     main_logger.info("Starting all simulation approaches.")
 
+    if base_seed is None:
+        base_seed = DEFAULT_BASE_SEED
+    seeds = [cell_seed(base_seed, iteration, index, common_random_numbers) for index in range(4)]
+
     # Approach 0: PPO-Based Simulation
     approach0_log_dir = os.path.join(main_log_dir, 'approach0_logs')
-    approach0_results = run_ppo_simulation(
+    approach0_results = run_journaled(
+        run_ppo_simulation,
+        'approach0',
+        journal,
+        result_store_dir,
         master_number=master_number,
         config_file=config_file,
-        log_dir=approach0_log_dir
+        log_dir=approach0_log_dir,
+        seed=seeds[0],
+        n_envs=ppo_envs or DEFAULT_PPO_ENVS,
+        batched_eval=batched_eval,
+        fused_env=fused_env,
+        numpy_inference=numpy_inference,
+        log_options=log_options,
+        results_path=os.path.join(results_dir, 'approach0') if results_dir else None,
+        stopping=stopping
     )
 
     # Approach 1: Manual Attack Simulation
     approach1_log_dir = os.path.join(main_log_dir, 'approach1_logs')
-    approach1_results = run_approach1(
+    approach1_results = run_journaled(
+        run_approach1,
+        'approach1',
+        journal,
+        result_store_dir,
         master_number=master_number,
         config_file=config_file,
-        log_dir=approach1_log_dir
+        log_dir=approach1_log_dir,
+        seed=seeds[1],
+        vectorized=vectorized,
+        analytic=analytic,
+        log_options=log_options,
+        topology_aware=topology_aware,
+        results_path=os.path.join(results_dir, 'approach1') if results_dir else None,
+        stopping=stopping
     )
 
     # Approach 2: Cyber Kill Chain Simulation
     approach2_log_dir = os.path.join(main_log_dir, 'approach2_logs')
-    approach2_results = run_approach2(
+    approach2_results = run_journaled(
+        run_approach2,
+        'approach2',
+        journal,
+        result_store_dir,
         master_number=master_number,
         config_file=config_file,
-        log_dir=approach2_log_dir
+        log_dir=approach2_log_dir,
+        seed=seeds[2],
+        vectorized=vectorized,
+        analytic=analytic,
+        log_options=log_options,
+        topology_aware=topology_aware,
+        results_path=os.path.join(results_dir, 'approach2') if results_dir else None,
+        stopping=stopping
     )
 
     # Approach 3: Privilege Escalation Simulation
     approach3_log_dir = os.path.join(main_log_dir, 'approach3_logs')
-    approach3_results = run_approach3(
+    approach3_results = run_journaled(
+        run_approach3,
+        'approach3',
+        journal,
+        result_store_dir,
         master_number=master_number,
         config_file=config_file,
-        log_dir=approach3_log_dir
+        log_dir=approach3_log_dir,
+        seed=seeds[3],
+        vectorized=vectorized,
+        analytic=analytic,
+        log_options=log_options,
+        topology_aware=topology_aware,
+        results_path=os.path.join(results_dir, 'approach3') if results_dir else None,
+        stopping=stopping
     )
 
     # Aggregate all results
@@ -119,42 +200,130 @@ def main(config_file='config/config.yaml', main_log_dir='logs', master_number=10
 
 
 if __name__ == "__main__":
-    all_results = []
-    i = 0
-    while i < 6:
-        # Capture the current timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Run the main simulation with the specific config file
-        aggregate_results = main(config_file=f'config/config{i}.yaml', main_log_dir='logs', master_number=100)
-
-        # Iterate through each approach's results and append to all_results with iteration and timestamp
-        for approach, result in aggregate_results.items():
-            if result:
-                row = {
-                    'Iteration': i,
-                    'Datestamp': timestamp,
-                    'Approach': approach,
-                    'Total Runs': result.get('Total Runs', 0),
-                    'Successful Attacks': result.get('Successful Attacks', 0),
-                    'Unsuccessful Attacks': result.get('Unsuccessful Attacks', 0),
-                    'Total Time Taken (s)': round(result.get('Total Time Taken', 0), 4),
-                    'Average Time per Run (s)': round(result.get('Average Time per Run', 0), 4)
-                }
-            else:
-                row = {
-                    'Iteration': i,
-                    'Datestamp': timestamp,
-                    'Approach': approach,
-                    'Total Runs': 'N/A',
-                    'Successful Attacks': 'N/A',
-                    'Unsuccessful Attacks': 'N/A',
-                    'Total Time Taken (s)': 'N/A',
-                    'Average Time per Run (s)': 'N/A'
-                }
-            all_results.append(row)
-
-        i += 1
+    parser = argparse.ArgumentParser(description="Run the simulation sweep over config0..config5.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes; 1 runs the sweep sequentially.")
+    parser.add_argument('--master-number', type=int, default=100, help="Number of runs per approach.")
+    parser.add_argument('--seed', type=int, default=None, help="Base seed for the parallel sweep; DEFAULT_BASE_SEED (0) if not given.")
+    parser.add_argument('--vectorized', action='store_true', help="Use the NumPy batch engine for approaches 1-3.")
+    parser.add_argument('--ppo-envs', type=int, default=DEFAULT_PPO_ENVS,
+                        help="Parallel PPO training environments per PPO run (default: %(default)s).")
+    parser.add_argument('--batched-eval', action='store_true',
+                        help="Evaluate PPO with persistent vectorized environments and batched inference.")
+    parser.add_argument('--fused-env', action='store_true',
+                        help="Step the PPO environments through one fused wrapper instead of the wrapper stack.")
+    parser.add_argument('--numpy-inference', action='store_true',
+                        help="Evaluate PPO greedily with its policy exported to NumPy, without torch on a cache hit.")
+    parser.add_argument('--quiet', action='store_true', help="Drop the per-run console output of every approach.")
+    parser.add_argument('--queued-logs', action='store_true',
+                        help="Write approach logs from a background thread instead of the simulation loop.")
+    parser.add_argument('--log-sample-every', type=int, default=1,
+                        help="Keep the per-run log records of one run in every N.")
+    parser.add_argument('--log-rate-limit', type=float, default=None,
+                        help="Maximum per-run log records per second for each approach.")
+    parser.add_argument('--topology-aware', action='store_true',
+                        help="Attack along the cheapest topology- and firewall-permitted paths in approaches 1-3.")
+    parser.add_argument('--result-store', default=None,
+                        help="Directory memoizing approach results by exact scenario fingerprint; identical scenarios are not re-run.")
+    parser.add_argument('--results-dir', default='results',
+                        help="Root directory of the per-run results; each sweep writes a timestamped subdirectory.")
+    parser.add_argument('--resume', default=None, metavar='SWEEP_DIR',
+                        help="Resume the sweep of a previous run's directory, rerunning only unfinished or "
+                             "invalidated cells.")
+    parser.add_argument('--ci-width', type=float, default=None,
+                        help="Stop an approach's runs once the confidence interval of its success rate is this wide.")
+    parser.add_argument('--sprt', type=float, nargs=2, default=None, metavar=('P0', 'P1'),
+                        help="Stop an approach's runs once an SPRT of success rate P0 against P1 decides.")
+    parser.add_argument('--common-random-numbers', action='store_true',
+                        help="Give every approach of a configuration the same random streams, for paired comparisons.")
+    parser.add_argument('--min-runs', type=int, default=10,
+                        help="Runs before --ci-width or --sprt may stop an approach.")
+    args = parser.parse_args()
+
+    log_options = {
+        'queued': args.queued_logs,
+        'quiet': args.quiet,
+        'sample_every': args.log_sample_every,
+        'rate_limit': args.log_rate_limit
+    }
+
+    stopping = None
+    if args.ci_width is not None or args.sprt is not None:
+        stopping = {'ci_width': args.ci_width, 'sprt': args.sprt, 'min_runs': args.min_runs}
+
+    config_files = [f'config/config{i}.yaml' for i in range(6)]
+
+    # Per-run records and report rows are streamed to disk as they are produced, and each
+    # finished cell is journaled so an interrupted sweep can be resumed
+    if args.resume:
+        sweep_dir = args.resume
+        discard_partial_results(os.path.join(sweep_dir, 'report'))  # rewritten in full below
+    else:
+        sweep_dir = os.path.join(args.results_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    runs_dir = os.path.join(sweep_dir, 'runs')
+    report_sink = ResultsSink(os.path.join(sweep_dir, 'report'))
+    journal = SweepJournal(sweep_dir, base_seed=args.seed)
+    print(f"Sweep directory: {sweep_dir} (resume with --resume {sweep_dir})")
+
+    if args.workers > 1:
+        # Each (config, approach) cell runs in its own pool worker
+        all_results = run_parallel_sweep(
+            config_files,
+            main_log_dir='logs',
+            master_number=args.master_number,
+            max_workers=args.workers,
+            base_seed=journal.base_seed,
+            options={'vectorized': args.vectorized, 'analytic': True, 'log_options': log_options,
+                     'topology_aware': args.topology_aware, 'stopping': stopping},
+            ppo_options={'n_envs': args.ppo_envs, 'batched_eval': args.batched_eval, 'fused_env': args.fused_env,
+                         'numpy_inference': args.numpy_inference, 'log_options': log_options, 'stopping': stopping},
+            results_dir=runs_dir,
+            report_sink=report_sink,
+            result_store_dir=args.result_store,
+            journal=journal,
+            common_random_numbers=args.common_random_numbers
+        )
+    else:
+        all_results = []
+        i = 0
+        while i < len(config_files):
+            # Capture the current timestamp
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            # Run the main simulation with the specific config file
+            aggregate_results = main(
+                config_file=config_files[i],
+                main_log_dir='logs',
+                master_number=args.master_number,
+                vectorized=args.vectorized,
+                ppo_envs=args.ppo_envs,
+                batched_eval=args.batched_eval,
+                fused_env=args.fused_env,
+                numpy_inference=args.numpy_inference,
+                log_options=log_options,
+                results_dir=os.path.join(runs_dir, f'config{i}'),
+                topology_aware=args.topology_aware,
+                result_store_dir=args.result_store,
+                journal=journal,
+                stopping=stopping,
+                base_seed=journal.base_seed,
+                iteration=i,
+                common_random_numbers=args.common_random_numbers
+            )
+
+            # Iterate through each approach's results and append to all_results with iteration and timestamp
+            for approach, result in aggregate_results.items():
+                row = build_result_row(i, timestamp, approach, result)
+                all_results.append(row)
+                report_sink.append(row)
+            report_sink.flush()
+
+            i += 1
+
+    report_sink.close()
+    journal.close()
 
     # Write all collected results to the CSV file
     write_results_to_csv_pandas(all_results)
+    export_results(runs_dir, os.path.join('reports', 'run_results.csv'))
+    print(f"Per-run results saved under {runs_dir}")
@@ -0,0 +1,264 @@
+# simulations/analytic.py
+
+import time
+
+
+def _add(distribution, key, prob, cost_mass):
+    """
+    Accumulates probability and probability-weighted cost for a state.
+    """
+    entry = distribution.get(key)
+    if entry is None:
+        distribution[key] = [prob, cost_mass]
+    else:
+        entry[0] += prob
+        entry[1] += cost_mass
+
+
+def _accumulate(distribution, key, prob):
+    """
+    Accumulates probability for a state.
+    """
+    distribution[key] = distribution.get(key, 0.0) + prob
+
+
+def solve_manual_attack(scenario):
+    """
+    Computes the exact outcome of the Approach 1/2 simulation without sampling.
+
+    The scalar simulation is a fixed sequence of independent Bernoulli attempts whose
+    only state is the step counter (checked against step_limit before each host),
+    whether a sensitive host has already ended the run, and which predecessors (see
+    CompiledScenario.restricted) have been exploited. The solver propagates the exact
+    joint distribution of the step counter and those predecessors through that sequence.
+
+    Parameters:
+    - scenario (CompiledScenario): Compiled scenario.
+
+    Returns:
+    - solution (dict): 'success_probability' and 'expected_step_cost' of one run.
+    """
+    scan_cost = scenario.service_scan_cost + scenario.os_scan_cost + scenario.process_scan_cost
+    step_limit = scenario.step_limit
+
+    # Predecessors held or exploited so far are part of the state; other hosts are not tracked
+    parents = set(scenario.predecessors.values())
+    owned = frozenset(host for host in scenario.initial_hosts if host in parents)
+    running = {(0, owned): 1.0}  # (steps, owned predecessors) -> probability for runs still attacking
+    finished = {}                # steps -> probability for runs that stopped at the step limit
+    p_returned = 0.0
+    returned_cost = 0.0
+
+    for host in scenario.attack_order:
+        record = scenario.host(host)
+        is_sensitive = scenario.is_sensitive(host)
+        parent = scenario.predecessors.get(host)
+        tracked = host in parents
+
+        # Runs over the step limit stop before scanning this host; runs without its predecessor skip it
+        scanned = {}
+        skipped = {}
+        for (steps, owned), prob in running.items():
+            if steps >= step_limit:
+                finished[steps] = finished.get(steps, 0.0) + prob
+            elif parent is not None and parent not in owned:
+                skipped[(steps, owned)] = prob
+            else:
+                key = (steps + scan_cost, owned)
+                scanned[key] = scanned.get(key, 0.0) + prob
+        running = scanned
+
+        for service in record.services:
+            exploit = scenario.find_exploit(service, record.os)
+            if not exploit:
+                continue
+            p_exploit = exploit.get('prob', 0)
+            exploit_cost = exploit.get('cost', 1)
+
+            after_service = {}
+            for (steps, owned), prob in running.items():
+                if p_exploit < 1:
+                    _accumulate(after_service, (steps, owned), prob * (1 - p_exploit))
+                if p_exploit <= 0:
+                    continue
+
+                # Exploit succeeded: every matching privilege escalation is attempted in turn
+                if tracked:
+                    owned = owned | {host}
+                branch = {steps + exploit_cost: prob * p_exploit}
+                for process in record.processes:
+                    pe = scenario.find_privesc(process, record.os)
+                    if not pe:
+                        continue
+                    p_pe = pe.get('prob', 0)
+                    pe_cost = pe.get('cost', 1)
+                    next_branch = {}
+                    for branch_steps, branch_prob in branch.items():
+                        if p_pe < 1:
+                            next_branch[branch_steps] = next_branch.get(branch_steps, 0.0) + branch_prob * (1 - p_pe)
+                        if p_pe <= 0:
+                            continue
+                        escalated_steps = branch_steps + pe_cost
+                        if is_sensitive:
+                            p_returned += branch_prob * p_pe
+                            returned_cost += branch_prob * p_pe * escalated_steps
+                        else:
+                            next_branch[escalated_steps] = next_branch.get(escalated_steps, 0.0) + branch_prob * p_pe
+                    branch = next_branch
+                for branch_steps, branch_prob in branch.items():
+                    _accumulate(after_service, (branch_steps, owned), branch_prob)
+            running = after_service
+        for key, prob in skipped.items():
+            _accumulate(running, key, prob)
+
+    for (steps, _), prob in running.items():
+        finished[steps] = finished.get(steps, 0.0) + prob
+
+    fallback = any(scenario.is_sensitive(host) for host in scenario.initial_hosts)
+    p_remaining = sum(finished.values())
+    return {
+        'success_probability': p_returned + (p_remaining if fallback else 0.0),
+        'expected_step_cost': returned_cost + sum(steps * prob for steps, prob in finished.items())
+    }
+
+
+def solve_privilege_escalation(scenario):
+    """
+    Computes the exact outcome of the Approach 3 simulation without sampling.
+
+    Each (host, service) pair yields at most one access, and the order in which
+    accesses are processed is fixed, so the only state carried between pairs is the
+    set of attack order hosts already escalated to root and the set of predecessors
+    (see CompiledScenario.restricted) already exploited. Approach 3 does not count steps;
+    its step cost is taken as the summed cost of the successful exploits (all of
+    which are attempted before any escalation) and of the privilege escalations made
+    before the run ends.
+
+    Parameters:
+    - scenario (CompiledScenario): Compiled scenario.
+
+    Returns:
+    - solution (dict): 'success_probability' and 'expected_step_cost' of one run.
+    """
+    attack_order = set(scenario.attack_order)
+    parents = set(scenario.predecessors.values())
+    owned = frozenset(host for host in scenario.initial_hosts if host in parents)
+    # (escalated attack order hosts, owned predecessors) -> [probability, escalation cost mass]
+    states = {(frozenset(), owned): [1.0, 0.0]}
+    p_returned = 0.0
+    terminal_cost = 0.0
+    exploit_cost = 0.0
+    # Every exploit is attempted before any escalation, so its cost only depends on
+    # whether the host's predecessor was exploited, whatever the escalations did
+    p_owned = {host: 1.0 for host in scenario.initial_hosts}
+
+    for host, host_exploits in scenario.host_exploits.items():
+        is_sensitive = scenario.is_sensitive(host)
+        parent = scenario.predecessors.get(host)
+        tracked = host in parents
+        p_attempt = 1.0 if parent is None else p_owned.get(parent, 0.0)
+        p_untouched = 1.0
+        privescs = [pe for _, pe in scenario.host_privescs[host]]
+
+        # Probability and expected cost of escalating once user access is gained
+        p_escalate = 0.0
+        escalate_cost = 0.0
+        p_none = 1.0
+        for pe in privescs:
+            p_first = p_none * pe.get('prob', 0)
+            p_escalate += p_first
+            escalate_cost += p_first * pe.get('cost', 1)
+            p_none *= 1 - pe.get('prob', 0)
+
+        for service, candidates in host_exploits:
+            if not candidates:
+                continue
+
+            # Distribution of the first successful exploit
+            p_user = p_other = 0.0
+            p_none = 1.0
+            for _, exploit in candidates:
+                p_first = p_none * exploit.get('prob', 0)
+                if exploit.get('access', 'user') == 'user':
+                    p_user += p_first
+                else:
+                    p_other += p_first
+                exploit_cost += p_attempt * p_first * exploit.get('cost', 1)
+                p_none *= 1 - exploit.get('prob', 0)
+            p_untouched *= p_none
+
+            next_states = {}
+            for (escalated, owned), (prob, cost_mass) in states.items():
+                if parent is not None and parent not in owned:
+                    # The predecessor was not exploited, so this host is not attacked
+                    _add(next_states, (escalated, owned), prob, cost_mass)
+                    continue
+
+                # No exploit succeeded
+                _add(next_states, (escalated, owned), prob * p_none, cost_mass * p_none)
+                if tracked:
+                    owned = owned | {host}
+
+                # Non-user access: only an already escalated sensitive host ends the run
+                if p_other > 0:
+                    p = prob * p_other
+                    c = cost_mass * p_other
+                    if host in escalated and is_sensitive:
+                        p_returned += p
+                        terminal_cost += c
+                    else:
+                        _add(next_states, (escalated, owned), p, c)
+
+                if p_user <= 0:
+                    continue
+
+                # User access followed by a successful privilege escalation
+                p = prob * p_user * p_escalate
+                c = cost_mass * p_user * p_escalate + prob * p_user * escalate_cost
+                if p > 0:
+                    if host not in attack_order:
+                        # The scalar run raises here and is counted as unsuccessful
+                        terminal_cost += c
+                    elif is_sensitive:
+                        p_returned += p
+                        terminal_cost += c
+                    else:
+                        _add(next_states, (escalated | {host}, owned), p, c)
+
+                # User access without escalation
+                p = prob * p_user * (1 - p_escalate)
+                c = cost_mass * p_user * (1 - p_escalate)
+                if host in escalated and is_sensitive:
+                    p_returned += p
+                    terminal_cost += c
+                else:
+                    _add(next_states, (escalated, owned), p, c)
+            states = next_states
+        p_owned[host] = 1.0 if host in scenario.initial_hosts else p_attempt * (1 - p_untouched)
+
+    fallback = any(scenario.is_sensitive(host) for host in scenario.initial_hosts)
+    p_remaining = sum(prob for prob, _ in states.values())
+    return {
+        'success_probability': p_returned + (p_remaining if fallback else 0.0),
+        'expected_step_cost': exploit_cost + terminal_cost + sum(cost_mass for _, cost_mass in states.values())
+    }
+
+
+def solve_with_timing(solver, scenario):
+    """
+    Runs an exact solver and reports the results in the runners' summary format.
+
+    Parameters:
+    - solver (callable): solve_manual_attack or solve_privilege_escalation.
+    - scenario (CompiledScenario): Compiled scenario.
+
+    Returns:
+    - results (dict): Exact success probability, expected step cost and solve time.
+    """
+    start_time = time.perf_counter()
+    solution = solver(scenario)
+    return {
+        'Exact Success Probability': solution['success_probability'],
+        'Expected Step Cost': solution['expected_step_cost'],
+        'Analytic Solve Time': time.perf_counter() - start_time
+    }
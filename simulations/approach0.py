@@ -1,13 +1,107 @@
-import os
-import time
-import traceback
-from tqdm import tqdm
 import pandas as pd
 from agents.ppo_agent import StablePPOAgent
-from utils.helpers import load_yaml_config, setup_logger
+from agents.model_cache import ModelCache
+from simulations.harness import AttackStrategy, register_strategy, run_strategy
 
+# Parallel training environments of a PPO run when none are given; fixed rather than the
+# core count, since it sets the rollout split and so the trained policy (see StablePPOAgent)
+DEFAULT_PPO_ENVS = 8
 
-def run_ppo_simulation(master_number=10, config_file='config/config.yaml', log_dir='approach0_logs'):
+
+@register_strategy
+class PPOStrategy(AttackStrategy):
+    """
+    Approach 0: a PPO agent trained once, then evaluated one episode per run.
+
+    Only the evaluation (inference) is timed; training, or loading the cached policy,
+    happens in setup.
+    """
+
+    name = 'approach0'
+    label = 'Approach 0'
+    total_time_key = 'Total Evaluation Time (s)'
+    average_time_key = 'Average Evaluation Time per Run (s)'
+
+    def __init__(self, log_dir='approach0_logs', n_envs=DEFAULT_PPO_ENVS, start_method=None, eval_envs=8,
+                 model_cache_dir='model_cache', fused_env=False, numpy_inference=False):
+        """
+        Parameters:
+            log_dir (str): Directory to save models.
+            n_envs (int): Number of parallel training environments; DEFAULT_PPO_ENVS if None.
+            start_method (str): Multiprocessing start method for the training environments.
+            eval_envs (int): Number of environments in the batched evaluation vector.
+            model_cache_dir (str): Directory of the trained-policy cache; None retrains every time.
+            fused_env (bool): Use the fused environment wrapper (see FusedMonitorWrapper).
+            numpy_inference (bool): Evaluate the policy exported to NumPy (see NumpyPolicy).
+        """
+        self.log_dir = log_dir
+        self.n_envs = n_envs
+        self.start_method = start_method
+        self.eval_envs = eval_envs
+        self.model_cache_dir = model_cache_dir
+        self.fused_env = fused_env
+        self.numpy_inference = numpy_inference
+        self.agent = None
+
+    def setup(self, config_file, seed, logger, timer):
+        super().setup(config_file, seed, logger, timer)
+        self.agent = StablePPOAgent(
+            config_file=config_file,
+            log_dir=self.log_dir,
+            total_timesteps=100000,
+            n_eval_episodes=1,  # We'll evaluate once per run, but agent is trained once below
+            seed=seed,
+            n_envs=self.n_envs or DEFAULT_PPO_ENVS,
+            start_method=self.start_method,
+            model_cache=ModelCache(self.model_cache_dir) if self.model_cache_dir else None,
+            fused_env=self.fused_env,
+            numpy_inference=self.numpy_inference
+        )
+
+        # Train the agent once (ignore this time for the "time_taken" metric)
+        logger.info("Training PPO agent once, ignoring training time for subsequent calculations...")
+        self.agent.train()
+        if self.agent.cache_hit:
+            logger.info("Loaded trained PPO policy from the model cache.")
+
+    def run_once(self, run):
+        # This call should only perform inference/evaluation, not training
+        state = self.agent.evaluate(timer=self.timer)
+        self.logger.debug(f"Run {run} - Evaluation State: {state}")
+
+        # Check whether state is a DataFrame with a 'success' column, a bool, or something else
+        if isinstance(state, pd.DataFrame) and 'success' in state.columns and not state.empty:
+            return bool(state['success'].iloc[0])
+        if isinstance(state, list) and state:
+            return bool(state[0])
+        if isinstance(state, bool):
+            return state
+        return False
+
+    def run_batch(self, n_runs):
+        # Persistent evaluation environments with batched inference
+        episodes = self.agent.evaluate_batch(n_runs, n_envs=self.eval_envs, timer=self.timer)
+        return {
+            'success': episodes['success'],
+            'episode_return': episodes['return'],
+            'episode_length': episodes['length']
+        }
+
+    def after_batch(self, columns):
+        if len(columns['success']) > 0:
+            self.logger.info(f"Average episode return: {columns['episode_return'].mean():.2f}, "
+                             f"average episode length: {columns['episode_length'].mean():.2f}")
+
+    def close(self):
+        # Release the persistent evaluation environments
+        if self.agent is not None:
+            self.agent.close()
+
+
+def run_ppo_simulation(master_number=10, config_file='config/config.yaml', log_dir='approach0_logs', seed=None,
+                       n_envs=DEFAULT_PPO_ENVS, start_method=None, batched_eval=False, eval_envs=8,
+                       model_cache_dir='model_cache', log_options=None, results_path=None, stopping=None,
+                       fused_env=False, numpy_inference=False):
     """
     Runs the PPO-based simulation approach multiple times, but:
       - Trains the PPO agent only once outside the main loop.
@@ -17,125 +111,34 @@ def run_ppo_simulation(master_number=10, config_file='config/config.yaml', log_d
         master_number (int): Number of evaluation runs (NOT training runs).
         config_file (str): Path to the main configuration YAML file.
         log_dir (str): Directory to save logs and models.
+        seed (int): Seed for PPO training and evaluation; unseeded if None.
+        n_envs (int): Number of parallel training environments; DEFAULT_PPO_ENVS if None.
+        start_method (str): Multiprocessing start method for the training environments.
+        batched_eval (bool): Run all evaluation episodes as one vector of persistent
+            environments with batched inference instead of one call per run.
+        eval_envs (int): Number of environments in the batched evaluation vector.
+        model_cache_dir (str): Directory of the trained-policy cache; None retrains every time.
+        log_options (dict): Keyword arguments for setup_logger (queued, quiet, sample_every,
+            rate_limit); quiet also drops the per-run console output.
+        results_path (str): Results file receiving one record per run (see ResultsSink); none if None.
+        stopping (dict): Stop evaluating early once the success rate is known well enough;
+            keyword arguments of SequentialStopper, with master_number as the maximum
+            number of runs. None to always do master_number runs.
+        fused_env (bool): Step the training and evaluation environments through one fused
+            wrapper instead of the action, step API and Monitor wrapper stack.
+        numpy_inference (bool): Evaluate greedily with the trained policy exported to NumPy
+            instead of calling model.predict; a policy exported to the model cache is
+            evaluated without importing torch.
 
     Returns:
-        results (dict): Dictionary containing success/failure stats and timing.
+        results (dict): Dictionary containing success/failure stats and timing, including
+            per-phase latency histograms under 'Phase Timings'.
     """
-    # Ensure the logging directory exists
-    os.makedirs(log_dir, exist_ok=True)
-    logger = setup_logger('approach0', os.path.join(log_dir, 'approach0.log'))
-
-    test_results = []
-    successful_attacks = []
-    unsuccessful_attacks = []
-    time_taken = []
-
-    # Initialize the PPO agent
-    agent = StablePPOAgent(
-        config_file=config_file,
-        log_dir=log_dir,
-        total_timesteps=100000,
-        n_eval_episodes=1  # We'll evaluate once per run, but agent is trained once below
-    )
-
-    # 1) Train the agent once (ignore this time for the "time_taken" metric)
-    logger.info("Training PPO agent once, ignoring training time for subsequent calculations...")
-    agent.train()
-
-    # Path to the CSV file (if you want to save results per run)
-    file_path = '/Users/fabio/PycharmProjects/PythonProject/simulations/test.csv'
-
-    # 2) Evaluate multiple times, measuring only evaluation (inference) time
-    for run in tqdm(range(1, master_number + 1), desc="Running PPO Experiments"):
-        logger.info(f"Starting Evaluation Run {run}/{master_number}")
-
-        # Start timing *only* the evaluation
-        start_run_time = time.time()
-
-        try:
-            # This call should only perform inference/evaluation, not training
-            state = agent.evaluate()  # <-- Replace with your agent's evaluation method
-
-            logger.debug(f"Run {run} - Evaluation State: {state}")
-
-            # Check whether state is a DataFrame with a 'success' column, a bool, or something else
-            success_value = False
-            if isinstance(state, pd.DataFrame) and 'success' in state.columns and not state.empty:
-                success_value = bool(state['success'].iloc[0])
-            elif isinstance(state, bool):
-                success_value = state
-
-            if success_value:
-                test_results.append(1)
-                successful_attacks.append(1)
-                unsuccessful_attacks.append(0)
-            else:
-                test_results.append(0)
-                successful_attacks.append(0)
-                unsuccessful_attacks.append(1)
-
-            elapsed_time = time.time() - start_run_time
-            time_taken.append(elapsed_time)
-
-            print(
-                f"Run {run} Completed - Success: {success_value}, "
-                f"Evaluation Time: {elapsed_time:.2f} seconds"
-            )
-
-            # (Optional) If you want to store run-by-run results in a CSV:
-            run_data = pd.DataFrame({
-                "Run": [run],
-                "Success": [success_value],
-                "EvaluationTime_s": [elapsed_time]
-            })
-            if not os.path.exists(file_path):
-                run_data.to_csv(file_path, index=False)
-            else:
-                run_data.to_csv(file_path, mode="a", header=False, index=False)
-
-        except Exception as e:
-            logger.error(f"Run {run} - Exception occurred: {e}")
-            logger.error(traceback.format_exc())
-            test_results.append(0)
-            successful_attacks.append(0)
-            unsuccessful_attacks.append(1)
-
-            elapsed_time = time.time() - start_run_time
-            time_taken.append(elapsed_time)
-            print(
-                f"Run {run} Failed - Exception: {e}, "
-                f"Evaluation Time: {elapsed_time:.2f} seconds"
-            )
-
-    # Aggregate results (only for the evaluation)
-    total_success = sum(successful_attacks)
-    total_unsuccessful = sum(unsuccessful_attacks)
-    total_eval_time = sum(time_taken)
-    average_eval_time = (total_eval_time / master_number) if master_number > 0 else 0
-
-    results = {
-        'Total Runs': master_number,
-        'Successful Attacks': total_success,
-        'Unsuccessful Attacks': total_unsuccessful,
-        'Total Evaluation Time (s)': total_eval_time,
-        'Average Evaluation Time per Run (s)': average_eval_time
-    }
-
-    # Log summary
-    logger.info("\n======================================")
-    logger.info("Approach 0 Experiment Summary")
-    logger.info("======================================")
-    for key, value in results.items():
-        logger.info(f"{key}: {value}")
-
-    # Print summary to console
-    print("\n======================================")
-    print("Approach 0 Experiment Summary")
-    print("======================================")
-    for key, value in results.items():
-        print(f"{key}: {value}")
-
-    return results
+    strategy = PPOStrategy(log_dir=log_dir, n_envs=n_envs, start_method=start_method, eval_envs=eval_envs,
+                           model_cache_dir=model_cache_dir, fused_env=fused_env,
+                           numpy_inference=numpy_inference)
+    return run_strategy(strategy, master_number, config_file, log_dir, seed=seed, batched=batched_eval,
+                        log_options=log_options, results_path=results_path, stopping=stopping)
 
 
 if __name__ == "__main__":
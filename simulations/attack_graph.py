@@ -0,0 +1,252 @@
+# simulations/attack_graph.py
+
+import heapq
+import math
+import numpy as np
+
+# Pseudo-host index of the attacker's starting point (the internet, subnet 0)
+INTERNET = -1
+
+
+def _iter_bits(mask):
+    """
+    Yields the indexes of the set bits of an int bitset.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AttackGraph:
+    """
+    Reachability and attack-path engine compiled from a scenario's network layout.
+
+    Hosts are numbered in YAML order and sets of hosts are int bitsets. For every
+    service the engine precomputes which hosts each subnet can reach through the
+    topology and subnet firewall (hosts in the same subnet always reach each other),
+    which hosts run an exploitable instance of it, and which (source, service) pairs a
+    host firewall denies. The attacker starts on the internet (subnet 0) and may
+    attack from any host it has compromised, as in NASim.
+    """
+
+    def __init__(self, scenario, expected_cost=False):
+        """
+        Compiles the reachability structure of a scenario.
+
+        Parameters:
+        - scenario (CompiledScenario): Compiled scenario.
+        - expected_cost (bool): Weight exploits by cost / prob (the expected cost of
+          retrying until success) instead of their cost alone.
+        """
+        self.scenario = scenario
+        encoded = scenario.encoded
+        self.host_names = encoded.host_names
+        self.index = encoded.host_ids
+        addresses = [tuple(address) for address in encoded.addresses.tolist()]
+        self.host_subnet = encoded.addresses[:, 0].tolist()
+        address_index = {address: i for i, address in enumerate(addresses)}
+
+        n_subnets = max([len(scenario.topology)] + [subnet + 1 for subnet in self.host_subnet])
+        subnet_hosts = [0] * n_subnets
+        for i, subnet in enumerate(self.host_subnet):
+            subnet_hosts[subnet] |= 1 << i
+
+        # Services in order of first appearance in the host configurations
+        service_ids, first = np.unique(encoded.service_ids, return_index=True)
+        service_ids = service_ids[np.argsort(first)].tolist()
+        self.services = [encoded.services[i] for i in service_ids]
+        self.service_index = {service: k for k, service in enumerate(self.services)}
+        k_of_service = {service_id: k for k, service_id in enumerate(service_ids)}
+
+        # reach[k][subnet]: hosts that traffic for service k may reach from the subnet
+        self.reach = [[subnet_hosts[subnet] for subnet in range(n_subnets)] for _ in self.services]
+        topology = scenario.topology
+        for (src, dst), allowed in scenario.firewall.items():
+            if src == dst or src >= n_subnets or dst >= n_subnets:
+                continue
+            if src < len(topology) and dst < len(topology[src]) and not topology[src][dst]:
+                continue
+            for service in allowed:
+                k = self.service_index.get(service)
+                if k is not None:
+                    self.reach[k][src] |= subnet_hosts[dst]
+
+        # denied[(source, k)]: hosts whose own firewall drops service k from the source host
+        self.denied = {}
+        for host, rules in scenario.host_firewalls.items():
+            target = self.index[host]
+            for source, blocked in rules.items():
+                source_index = address_index.get(source)
+                if source_index is None:
+                    continue
+                for service in blocked:
+                    k = self.service_index.get(service)
+                    if k is not None:
+                        key = (source_index, k)
+                        self.denied[key] = self.denied.get(key, 0) | (1 << target)
+
+        # Cheapest way in through each service, scans included, and the cheapest way to root
+        scan_cost = scenario.service_scan_cost + scenario.os_scan_cost + scenario.process_scan_cost
+        self.entry_cost = [{} for _ in self.services]
+        self.exploitable = [0] * len(self.services)
+        self.root_cost = [None] * len(self.host_names)
+        # Cheapest candidate per (service, os) pair, then per host entry of the encoding
+        exploit_weight = {
+            (encoded.services.id(service), encoded.os.id(os_)): min(
+                self._weight(exploit, expected_cost) for _, exploit in candidates
+            )
+            for (service, os_), candidates in scenario.exploit_index.items()
+        }
+        entry_hosts = np.repeat(np.arange(len(self.host_names)), np.diff(encoded.service_indptr)).tolist()
+        entry_os = encoded.host_os[entry_hosts].tolist() if entry_hosts else []
+        for i, service_id, os_id in zip(entry_hosts, encoded.service_ids.tolist(), entry_os):
+            cost = exploit_weight.get((service_id, os_id), math.inf)
+            if cost < math.inf:
+                k = k_of_service[service_id]
+                self.entry_cost[k][i] = scan_cost + cost
+                self.exploitable[k] |= 1 << i
+        privesc_weight = np.array([self._weight(pe, expected_cost) for _, pe in scenario.privesc_order])
+        if len(privesc_weight):
+            root_cost = np.full(len(self.host_names), math.inf)
+            pair_hosts = np.repeat(np.arange(len(self.host_names)), np.diff(encoded.privesc_indptr))
+            np.minimum.at(root_cost, pair_hosts, privesc_weight[encoded.privesc_host_ids])
+            self.root_cost = [cost if cost < math.inf else None for cost in root_cost.tolist()]
+
+    @staticmethod
+    def _weight(action, expected_cost):
+        prob = action.get('prob', 0)
+        if prob <= 0:
+            return math.inf
+        cost = action.get('cost', 1)
+        return cost / prob if expected_cost else cost
+
+    def reachable_from(self, source, service):
+        """
+        Returns the bitset of hosts that accept traffic for a service from a source.
+
+        Parameters:
+        - source (int): Host index, or INTERNET.
+        - service (str): Service name.
+        """
+        k = self.service_index.get(service)
+        if k is None:
+            return 0
+        if source == INTERNET:
+            return self.reach[k][0]
+        return self.reach[k][self.host_subnet[source]] & ~self.denied.get((source, k), 0)
+
+    def shortest_paths(self):
+        """
+        Runs Dijkstra from the internet over the hosts, weighted by scan and exploit cost.
+
+        The cost of entering a host through a service does not depend on where the
+        attack comes from, so the first settled source that reaches a (host, service)
+        pair gives its best relaxation; each pair is therefore relaxed once, and a
+        settled source only touches the pairs still unreached, found with bitset
+        operations.
+
+        Returns:
+        - (distance, parent) (tuple of lists): Cost of user access on every host (inf
+          if unreachable) and the host it is attacked from (INTERNET for the first hop).
+        """
+        n_hosts = len(self.host_names)
+        distance = [math.inf] * n_hosts
+        parent = [INTERNET] * n_hosts
+        settled = [False] * n_hosts
+        unreached = list(self.exploitable)
+        heap = []
+
+        def expand(source, source_distance):
+            for k, entry_cost in enumerate(self.entry_cost):
+                if not unreached[k]:
+                    continue
+                new = self.reachable_from(source, self.services[k]) & unreached[k]
+                if not new:
+                    continue
+                unreached[k] &= ~new
+                for target in _iter_bits(new):
+                    candidate = source_distance + entry_cost[target]
+                    if candidate < distance[target]:
+                        distance[target] = candidate
+                        parent[target] = source
+                        heapq.heappush(heap, (candidate, target))
+
+        expand(INTERNET, 0)
+        while heap:
+            host_distance, host = heapq.heappop(heap)
+            if settled[host] or host_distance > distance[host]:
+                continue
+            settled[host] = True
+            expand(host, host_distance)
+        return distance, parent
+
+    def attack_paths(self):
+        """
+        Returns the cheapest attack path to root on every sensitive host.
+
+        Returns:
+        - paths (dict): Sensitive host -> {'cost', 'path'} with the hosts to compromise in
+          order (ending with the target), or None if the host cannot be reached or rooted.
+        """
+        distance, parent = self.shortest_paths()
+        paths = {}
+        for name in self.scenario.sensitive_hosts:
+            target = self.index.get(name)
+            if target is None or distance[target] == math.inf or self.root_cost[target] is None:
+                paths[name] = None
+                continue
+            path = []
+            host = target
+            while host != INTERNET:
+                path.append(self.host_names[host])
+                host = parent[host]
+            paths[name] = {'cost': distance[target] + self.root_cost[target], 'path': path[::-1]}
+        return paths
+
+    def attack_plan(self):
+        """
+        Returns the hosts on the cheapest paths to the sensitive hosts, each once, in
+        the order an attacker following those paths would compromise them, with the
+        host each is attacked from.
+
+        The paths all follow the tree of shortest_paths, so a host has one predecessor
+        and it comes earlier in the order.
+
+        Returns:
+        - plan (dict): Host -> predecessor host, or None for a host attacked from the internet.
+        """
+        plan = {}
+        paths = sorted((path for path in self.attack_paths().values() if path), key=lambda path: path['cost'])
+        for path in paths:
+            hosts = path['path']
+            for i, host in enumerate(hosts):
+                plan.setdefault(host, hosts[i - 1] if i else None)
+        return plan
+
+    def attack_order(self):
+        """
+        Returns the hosts of attack_plan() in attack order.
+        """
+        return list(self.attack_plan())
+
+
+def plan_attack(scenario, expected_cost=False):
+    """
+    Restricts a scenario to the hosts on the cheapest attack paths to its sensitive hosts.
+
+    The attack paths start from the internet, so the attacker holds no host when a run
+    starts: every host, sensitive ones included, must be taken along the path instead
+    of being counted as compromised through the fixed INITIAL_HOSTS. A host is only
+    attacked in a run once its predecessor on the path has been compromised.
+
+    Parameters:
+    - scenario (CompiledScenario): Compiled scenario.
+    - expected_cost (bool): Weight exploits by their expected cost (see AttackGraph).
+
+    Returns:
+    - scenario (CompiledScenario): Scenario whose attack order and predecessors follow the
+      attack paths, with no initial hosts.
+    """
+    plan = AttackGraph(scenario, expected_cost=expected_cost).attack_plan()
+    return scenario.restricted(list(plan), initial_hosts=[], predecessors=plan)
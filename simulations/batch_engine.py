@@ -0,0 +1,188 @@
+# simulations/batch_engine.py
+
+import numpy as np
+from simulations.random_streams import RandomStreams
+
+# Number of runs simulated per NumPy pass; bounds the size of the working arrays
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def _iter_chunks(n_runs, chunk_size):
+    """
+    Yields the sizes of the chunks covering n_runs runs.
+    """
+    remaining = n_runs
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield size
+        remaining -= size
+
+
+def simulate_manual_attack_batch(scenario, n_runs, streams=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulates n_runs Approach 1/2 attacks at once.
+
+    Every exploit and privilege escalation attempt the scalar simulation could make
+    reads its event column of the random streams, and all runs are advanced together
+    with boolean masks. Step-limit checks, early termination on a sensitive host and
+    the final compromise check follow the scalar `simulate_attack()`. A host whose
+    predecessor (see CompiledScenario.restricted) was not exploited in a run is
+    skipped in that run.
+
+    Parameters:
+    - scenario (CompiledScenario): Compiled scenario.
+    - n_runs (int): Number of simulation runs.
+    - streams (RandomStreams): Random streams, advanced by n_runs runs; fresh ones if None.
+    - chunk_size (int): Maximum number of runs simulated per pass.
+
+    Returns:
+    - outcomes (np.ndarray): Boolean array, True where the network was compromised.
+    """
+    streams = streams if streams is not None else RandomStreams()
+
+    scan_cost = scenario.service_scan_cost + scenario.os_scan_cost + scenario.process_scan_cost
+    step_limit = scenario.step_limit
+
+    # Build the attempt plan once: per host, the exploit for each service and the
+    # privilege escalations tried after a successful exploit
+    plan = []
+    for host in scenario.attack_order:
+        record = scenario.host(host)
+        service_attempts = []
+        for service_index, service in enumerate(record.services):
+            exploit = scenario.find_exploit(service, record.os)
+            if not exploit:
+                continue
+            privesc_attempts = []
+            for process in record.processes:
+                candidates = scenario.privesc_index.get((process, record.os))
+                if not candidates:
+                    continue
+                name, pe = candidates[0]
+                privesc_attempts.append((scenario.privesc_column(host, service_index, name),
+                                         pe.get('prob', 0), pe.get('cost', 1)))
+            service_attempts.append((scenario.exploit_column(host, service_index), exploit.get('prob', 0),
+                                     exploit.get('cost', 1), privesc_attempts))
+        plan.append((host, scenario.predecessors.get(host), scenario.is_sensitive(host), service_attempts))
+
+    # The scalar simulation always falls back to checking the initial hosts
+    fallback = any(scenario.is_sensitive(host) for host in scenario.initial_hosts)
+
+    outcomes = np.empty(n_runs, dtype=bool)
+    offset = 0
+    for size in _iter_chunks(n_runs, chunk_size):
+        run_keys = streams.run_keys(streams.take_runs(size))
+        steps = np.zeros(size)
+        returned = np.zeros(size, dtype=bool)
+        # Hosts held or exploited per run
+        owned = {host: np.ones(size, dtype=bool) for host in scenario.initial_hosts}
+
+        for host, parent, is_sensitive, service_attempts in plan:
+            active = ~returned & (steps < step_limit)
+            if not active.any():
+                break
+            if parent is not None:
+                active &= owned.get(parent, False)
+            steps[active] += scan_cost
+
+            gained = owned.setdefault(host, np.zeros(size, dtype=bool))
+            for exploit_column, exploit_prob, exploit_cost, privesc_attempts in service_attempts:
+                exploited = active & (streams.column(run_keys, exploit_column) < exploit_prob)
+                gained |= exploited
+                steps[exploited] += exploit_cost
+                for pe_column, pe_prob, pe_cost in privesc_attempts:
+                    escalated = exploited & (streams.column(run_keys, pe_column) < pe_prob)
+                    steps[escalated] += pe_cost
+                    if is_sensitive:
+                        returned |= escalated
+                        exploited &= ~escalated
+                        active &= ~escalated
+
+        outcomes[offset:offset + size] = returned | fallback
+        offset += size
+
+    return outcomes
+
+
+def simulate_privilege_escalation_batch(scenario, n_runs, streams=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulates n_runs Approach 3 attacks at once.
+
+    The exploit phase reads one event column per candidate exploit of every
+    (host, service) pair and keeps the first success; the privilege escalation phase
+    then walks the gained accesses in the same order as the scalar simulation. A run
+    that escalates on a host outside the attack order fails, as the scalar run
+    raises there, and a host whose predecessor was not exploited is skipped.
+
+    Parameters:
+    - scenario (CompiledScenario): Compiled scenario.
+    - n_runs (int): Number of simulation runs.
+    - streams (RandomStreams): Random streams, advanced by n_runs runs; fresh ones if None.
+    - chunk_size (int): Maximum number of runs simulated per pass.
+
+    Returns:
+    - outcomes (np.ndarray): Boolean array, True where the network was compromised.
+    """
+    streams = streams if streams is not None else RandomStreams()
+
+    # Build the attempt plan once: one entry per (host, service) pair with its
+    # candidate exploits and the privilege escalations applicable to the host
+    plan = []
+    for host, host_exploits in scenario.host_exploits.items():
+        for service_index, (service, candidates) in enumerate(host_exploits):
+            if not candidates:
+                continue
+            exploit_attempts = []
+            for position, (_, exploit) in enumerate(candidates):
+                exploit_attempts.append((scenario.exploit_column(host, service_index, position),
+                                         exploit.get('prob', 0), exploit.get('access', 'user') == 'user'))
+            privesc_attempts = []
+            for name, pe in scenario.host_privescs[host]:
+                privesc_attempts.append((scenario.privesc_column(host, service_index, name), pe.get('prob', 0)))
+            plan.append((host, scenario.predecessors.get(host), scenario.is_sensitive(host), exploit_attempts,
+                         privesc_attempts))
+
+    fallback = any(scenario.is_sensitive(host) for host in scenario.initial_hosts)
+
+    outcomes = np.empty(n_runs, dtype=bool)
+    offset = 0
+    for size in _iter_chunks(n_runs, chunk_size):
+        run_keys = streams.run_keys(streams.take_runs(size))
+        root = {host: np.zeros(size, dtype=bool) for host in scenario.attack_order}
+        returned = np.zeros(size, dtype=bool)
+        failed = np.zeros(size, dtype=bool)
+        # Hosts held or exploited per run
+        owned = {host: np.ones(size, dtype=bool) for host in scenario.initial_hosts}
+
+        for host, parent, is_sensitive, exploit_attempts, privesc_attempts in plan:
+            active = ~(returned | failed)
+            if parent is not None:
+                active &= owned.get(parent, False)
+
+            # First successful exploit decides whether and with which access the host is entered
+            gained = np.zeros(size, dtype=bool)
+            user_access = np.zeros(size, dtype=bool)
+            for column, prob, is_user in exploit_attempts:
+                hit = ~gained & (streams.column(run_keys, column) <= prob)
+                if is_user:
+                    user_access |= hit
+                gained |= hit
+            gained &= active
+            user_access &= active
+            owned[host] = owned.get(host, False) | gained
+
+            escalated = np.zeros(size, dtype=bool)
+            for column, prob in privesc_attempts:
+                escalated |= user_access & ~escalated & (streams.column(run_keys, column) <= prob)
+
+            if host in root:
+                root[host] |= escalated
+                if is_sensitive:
+                    returned |= gained & root[host]
+            else:
+                failed |= escalated
+
+        outcomes[offset:offset + size] = returned | (~failed & fallback)
+        offset += size
+
+    return outcomes
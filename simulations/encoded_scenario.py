@@ -0,0 +1,314 @@
+# simulations/encoded_scenario.py
+
+import ast
+import functools
+import numpy as np
+
+# Sentinel of the id tables for a missing entry
+MISSING = -1
+
+
+def _address(name):
+    """
+    Parses a host key such as '(1, 0)' without going through the Python parser.
+    """
+    if isinstance(name, tuple):
+        return name
+    try:
+        subnet, host = name.strip('() ').split(',')
+        return int(subnet), int(host)
+    except ValueError:
+        return tuple(ast.literal_eval(name))
+
+
+class Vocabulary:
+    """
+    Interned names numbered in order of first appearance.
+    """
+
+    __slots__ = ('names', 'ids')
+
+    def __init__(self, names=()):
+        """
+        Parameters:
+        - names (iterable of str): Initial names, in id order.
+        """
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        """
+        Returns the id of a name, adding it if it is new.
+        """
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def id(self, name):
+        """
+        Returns the id of a name, or MISSING.
+        """
+        return self.ids.get(name, MISSING)
+
+    def __getitem__(self, name_id):
+        return self.names[name_id]
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _csr(rows):
+    """
+    Packs lists of ids into (indptr, ids) compressed-row arrays.
+    """
+    lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    ids = np.fromiter((i for row in rows for i in row), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, ids
+
+
+def _bitmasks(indptr, ids, width):
+    """
+    Packs compressed rows of ids into one row of bits per host.
+    """
+    n_rows = len(indptr) - 1
+    dense = np.zeros((n_rows, max(width, 1)), dtype=bool)
+    dense[np.repeat(np.arange(n_rows), np.diff(indptr)), ids] = True
+    return np.packbits(dense, axis=1)
+
+
+class EncodedScenario:
+    """
+    Integer encoding of a NASim scenario, held mostly in NumPy arrays.
+
+    Hosts are numbered in YAML order; OSes, services, processes and access levels are
+    interned into vocabularies. Per host, the OS id, the sensitive value and the
+    address live in NumPy arrays, the service and process lists (YAML order kept) in
+    compressed-row arrays, and their sets in packed bitmasks for membership tests.
+    Exploits and privilege escalations are parallel arrays, with (service, os) and
+    (process, os) tables giving each key's candidates in YAML order, and the privilege
+    escalations applicable to each host in compressed-row arrays. The only per-host
+    Python objects are the host name list and name-to-id map; a 100,000-host scenario
+    takes about 10 MB of arrays and as much again for those.
+
+    The arrays and the small remaining metadata can be split apart and put back
+    together (see arrays, metadata and from_parts), so the arrays can be
+    memory-mapped read-only by other processes (see simulations.shared_scenario).
+    Host names are also kept as a byte table; an encoding rebuilt from its parts
+    decodes the name list and name-to-id map from it on first use.
+    """
+
+    def __init__(self, network_config):
+        """
+        Encodes a parsed scenario configuration.
+
+        Parameters:
+        - network_config (dict): Parsed NASim scenario configuration.
+        """
+        self.os = Vocabulary(network_config.get('os', []) or [])
+        self.services = Vocabulary(network_config.get('services', []) or [])
+        self.processes = Vocabulary(network_config.get('processes', []) or [])
+        self.access = Vocabulary(['user', 'root'])
+
+        # Exploit and privilege escalation tables
+        exploits = network_config.get('exploits', {}) or {}
+        self.exploit_names = list(exploits)
+        self.exploit_service = np.array([self.services.intern(e.get('service')) for e in exploits.values()],
+                                        dtype=np.int32)
+        self.exploit_os = np.array([self.os.intern(e.get('os')) for e in exploits.values()], dtype=np.int32)
+        self.exploit_prob = np.array([e.get('prob', 0) for e in exploits.values()], dtype=float)
+        self.exploit_cost = np.array([e.get('cost', 1) for e in exploits.values()], dtype=float)
+        self.exploit_access = np.array([self.access.intern(e.get('access', 'user')) for e in exploits.values()],
+                                       dtype=np.int32)
+
+        privescs = network_config.get('privilege_escalation', {}) or {}
+        self.privesc_names = list(privescs)
+        self.privesc_ids = {name: i for i, name in enumerate(self.privesc_names)}
+        self.privesc_process = np.array([self.processes.intern(pe.get('process')) for pe in privescs.values()],
+                                        dtype=np.int32)
+        self.privesc_os = np.array([self.os.intern(pe.get('os')) for pe in privescs.values()], dtype=np.int32)
+        self.privesc_prob = np.array([pe.get('prob', 0) for pe in privescs.values()], dtype=float)
+        self.privesc_cost = np.array([pe.get('cost', 1) for pe in privescs.values()], dtype=float)
+        self.privesc_access = np.array([self.access.intern(pe.get('access', 'root')) for pe in privescs.values()],
+                                       dtype=np.int32)
+
+        # Hosts
+        host_configurations = network_config.get('host_configurations', {}) or {}
+        sensitive_hosts = network_config.get('sensitive_hosts', {}) or {}
+        self.host_names = list(host_configurations)
+        self.host_ids = {name: i for i, name in enumerate(self.host_names)}
+        self.host_name_table = np.array([name.encode('utf-8') for name in self.host_names], dtype=bytes)
+        n_hosts = len(self.host_names)
+        self.addresses = np.array([_address(name) for name in self.host_names], dtype=np.int32).reshape(n_hosts, 2)
+        self.host_os = np.empty(n_hosts, dtype=np.int32)
+        service_rows = []
+        process_rows = []
+        for i, config in enumerate(host_configurations.values()):
+            config = config or {}
+            self.host_os[i] = self.os.intern(config.get('os', ''))
+            service_rows.append([self.services.intern(s) for s in config.get('services', []) or []])
+            process_rows.append([self.processes.intern(p) for p in config.get('processes', []) or []])
+        self.service_indptr, self.service_ids = _csr(service_rows)
+        self.process_indptr, self.process_ids = _csr(process_rows)
+        del service_rows, process_rows
+        self.service_bits = _bitmasks(self.service_indptr, self.service_ids, len(self.services))
+        self.process_bits = _bitmasks(self.process_indptr, self.process_ids, len(self.processes))
+        sensitive = [(self.host_ids[name], value) for name, value in sensitive_hosts.items() if name in self.host_ids]
+        self.sensitive = np.zeros(n_hosts, dtype=bool)
+        self.sensitive_value = np.zeros(n_hosts)
+        for host_id, value in sensitive:
+            self.sensitive[host_id] = True
+            self.sensitive_value[host_id] = value
+
+        # Candidates per (service, os) and (process, os), in YAML order
+        self.exploit_candidates = {}
+        for exploit_id, key in enumerate(zip(self.exploit_service.tolist(), self.exploit_os.tolist())):
+            self.exploit_candidates.setdefault(key, []).append(exploit_id)
+        self.privesc_candidates = {}
+        for privesc_id, key in enumerate(zip(self.privesc_process.tolist(), self.privesc_os.tolist())):
+            self.privesc_candidates.setdefault(key, []).append(privesc_id)
+        self.exploit_count = np.zeros((len(self.services), len(self.os)), dtype=np.int32)
+        np.add.at(self.exploit_count, (self.exploit_service, self.exploit_os), 1)
+
+        self._encode_event_columns()
+
+    def _encode_event_columns(self):
+        """
+        Numbers the random event columns of the scenario (see RandomStreams) arithmetically.
+
+        Every exploitable (host, service) entry takes one column per candidate exploit
+        followed by one per privilege escalation applicable to the host, in host and
+        service-list order; service_event_offset holds the first column of each entry.
+        A privilege escalation's rank among the host's columns is its position in the
+        host's row of privesc_indptr/privesc_host_ids.
+        """
+        n_hosts = len(self.host_names)
+        host_of_entry = np.repeat(np.arange(n_hosts), np.diff(self.service_indptr))
+        candidates = self.exploit_count[self.service_ids, self.host_os[host_of_entry]]
+
+        # Privilege escalations applicable to each host (its process bit set and its OS), in id order
+        pair_hosts = []
+        pair_privescs = []
+        for privesc_id, (process, os_id) in enumerate(zip(self.privesc_process, self.privesc_os)):
+            hosts = np.flatnonzero(self.has_processes(process) & (self.host_os == os_id))
+            pair_hosts.append(hosts)
+            pair_privescs.append(np.full(len(hosts), privesc_id, dtype=np.int32))
+        pair_hosts = np.concatenate(pair_hosts) if pair_hosts else np.zeros(0, dtype=np.int64)
+        pair_privescs = np.concatenate(pair_privescs) if pair_privescs else np.zeros(0, dtype=np.int32)
+        order = np.lexsort((pair_privescs, pair_hosts))
+        host_privescs = np.bincount(pair_hosts, minlength=n_hosts)
+        self.privesc_indptr = np.zeros(n_hosts + 1, dtype=np.int64)
+        np.cumsum(host_privescs, out=self.privesc_indptr[1:])
+        self.privesc_host_ids = pair_privescs[order]
+        del pair_hosts, pair_privescs, order
+
+        widths = np.where(candidates > 0, candidates + host_privescs[host_of_entry], 0)
+        self.service_event_offset = np.cumsum(widths) - widths
+        self.service_event_offset[candidates == 0] = MISSING
+        self.n_event_columns = int(widths.sum())
+
+    @classmethod
+    def from_parts(cls, arrays, metadata):
+        """
+        Rebuilds an encoding from its arrays and metadata.
+
+        Parameters:
+        - arrays (dict): Arrays returned by arrays(), possibly memory-mapped.
+        - metadata (dict): Metadata returned by metadata().
+
+        Returns:
+        - encoded (EncodedScenario): Encoding sharing the given arrays.
+        """
+        encoded = cls.__new__(cls)
+        encoded.__dict__.update(metadata)
+        encoded.__dict__.update(arrays)
+        return encoded
+
+    def arrays(self):
+        """
+        Returns the NumPy arrays of the encoding by attribute name.
+        """
+        return {name: value for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+
+    def metadata(self):
+        """
+        Returns the picklable attributes other than the arrays and the decoded host names.
+        """
+        return {
+            name: value for name, value in vars(self).items()
+            if not isinstance(value, np.ndarray) and name not in ('host_names', 'host_ids')
+        }
+
+    @functools.cached_property
+    def host_names(self):
+        return [name.decode('utf-8') for name in self.host_name_table.tolist()]
+
+    @functools.cached_property
+    def host_ids(self):
+        return {name: i for i, name in enumerate(self.host_names)}
+
+    def has_processes(self, process_id):
+        """
+        Returns a boolean array, True for the hosts running the process.
+        """
+        return ((self.process_bits[:, process_id >> 3] >> (7 - (process_id & 7))) & 1).astype(bool)
+
+    def has_service(self, host_id, service_id):
+        """
+        Returns True if the host runs the service.
+        """
+        if service_id < 0 or service_id >= len(self.services):
+            return False
+        return bool((self.service_bits[host_id, service_id >> 3] >> (7 - (service_id & 7))) & 1)
+
+    def host_services(self, host_id):
+        """
+        Returns the service ids of a host in YAML order.
+        """
+        return self.service_ids[self.service_indptr[host_id]:self.service_indptr[host_id + 1]]
+
+    def host_processes(self, host_id):
+        """
+        Returns the process ids of a host in YAML order.
+        """
+        return self.process_ids[self.process_indptr[host_id]:self.process_indptr[host_id + 1]]
+
+    def host_privescs(self, host_id):
+        """
+        Returns the ids of the privilege escalations applicable to a host, in id order.
+        """
+        return self.privesc_host_ids[self.privesc_indptr[host_id]:self.privesc_indptr[host_id + 1]]
+
+    def exploit_column(self, host_id, service_index, position=0):
+        """
+        Returns the random event column of a candidate exploit of a host's service entry.
+        """
+        offset = self.service_event_offset[self.service_indptr[host_id] + service_index]
+        if offset == MISSING:
+            raise KeyError(('exploit', self.host_names[host_id], service_index, position))
+        return int(offset) + position
+
+    def privesc_column(self, host_id, service_index, privesc_id):
+        """
+        Returns the random event column of a privilege escalation tried after exploiting
+        a host's service entry.
+        """
+        entry = self.service_indptr[host_id] + service_index
+        offset = self.service_event_offset[entry]
+        applicable = self.host_privescs(host_id)
+        rank = int(np.searchsorted(applicable, privesc_id))
+        if offset == MISSING or rank == len(applicable) or applicable[rank] != privesc_id:
+            raise KeyError(('privesc', self.host_names[host_id], service_index, self.privesc_names[privesc_id]))
+        candidates = self.exploit_count[self.service_ids[entry], self.host_os[host_id]]
+        return int(offset + candidates + rank)
+
+    def nbytes(self):
+        """
+        Returns the bytes held by the NumPy arrays of the encoding.
+        """
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
@@ -0,0 +1,232 @@
+# simulations/harness.py
+
+import os
+import abc
+import traceback
+import numpy as np
+from tqdm import tqdm
+from utils.helpers import setup_logger, set_log_run
+from utils.timing import PhaseTimer
+from utils.results_sink import ResultsSink, RUN_RECORD_SCHEMA
+from simulations.stopping import make_stopper, simulate_until_stopped
+
+# Registered strategy classes by name (see register_strategy)
+STRATEGIES = {}
+
+
+def register_strategy(cls):
+    """
+    Class decorator adding an AttackStrategy subclass to STRATEGIES under its name.
+    """
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+class AttackStrategy(abc.ABC):
+    """
+    One way of attacking a scenario, run by run_strategy.
+
+    A strategy only knows how to prepare itself and how to play runs: one run at a
+    time (run_once) and many runs at once (run_batch). Scheduling,
+    batching, early stopping, timing, per-run records, aggregation and the summary
+    are done by the harness, the same way for every strategy.
+    """
+
+    # Logger, record and registry name, e.g. 'approach1'
+    name = None
+    # Name used in progress bars and summaries, e.g. 'Approach 1'
+    label = None
+    # Result keys of the total and average time of the runs
+    total_time_key = 'Total Time Taken'
+    average_time_key = 'Average Time per Run'
+
+    def setup(self, config_file, seed, logger, timer):
+        """
+        Prepares the strategy; an exception makes the harness return no results.
+
+        Parameters:
+        - config_file (str): Path to the main configuration YAML file.
+        - seed (int): Seed of the strategy's randomness; unseeded if None.
+        - logger (logging.Logger): Strategy logger.
+        - timer (PhaseTimer): Collects the strategy's phase latencies.
+        """
+        self.logger = logger
+        self.timer = timer
+
+    @abc.abstractmethod
+    def run_once(self, run):
+        """
+        Plays one run and returns True if the network was compromised.
+        """
+
+    @abc.abstractmethod
+    def run_batch(self, n_runs):
+        """
+        Plays n_runs runs at once.
+
+        Returns:
+        - columns (dict): Per-run arrays; 'success' (bool) is required, other columns are
+          written to the results file as they are.
+        """
+
+    def after_batch(self, columns):
+        """
+        Called with the columns of all batched runs before aggregation.
+        """
+
+    def extra_results(self):
+        """
+        Returns entries added to the results after aggregation (e.g. exact figures).
+        """
+        return {}
+
+    def close(self):
+        """
+        Releases the resources of the strategy.
+        """
+
+
+def _timed_batch(strategy, timer):
+    """
+    Returns a run_batch wrapper recording each batch as one 'batch' sample and its
+    average time per run as one 'run' sample per run.
+    """
+    def run_batch(n_runs):
+        start_ns = timer.now()
+        columns = strategy.run_batch(n_runs)
+        elapsed_ns = timer.since('batch', start_ns) - start_ns
+        n = len(columns['success'])
+        if n:
+            timer.record('run', elapsed_ns // n, n)
+        return columns
+    return run_batch
+
+
+def run_strategy(strategy, master_number, config_file, log_dir, seed=None, batched=False, log_options=None,
+                 results_path=None, stopping=None):
+    """
+    Runs a strategy master_number times and aggregates the outcomes.
+
+    Parameters:
+    - strategy (AttackStrategy): Strategy to run.
+    - master_number (int): Number of runs (the maximum if stopping is given).
+    - config_file (str): Path to the main configuration YAML file.
+    - log_dir (str): Directory to save logs.
+    - seed (int): Seed passed to the strategy; unseeded if None.
+    - batched (bool): Play the runs with run_batch instead of one run_once call per run. Each
+      batch is then timed as a whole, so the 'run' latencies are its average time per run.
+    - log_options (dict): Keyword arguments for setup_logger (queued, quiet, sample_every,
+      rate_limit); quiet also drops the per-run console output.
+    - results_path (str): Results file receiving one record per run (see ResultsSink); none if None.
+    - stopping (dict): Keyword arguments of SequentialStopper to stop early once the success
+      rate is known well enough; None to always do master_number runs.
+
+    Returns:
+    - results (dict): Success and failure counts and timing information, including per-phase
+      latency histograms under 'Phase Timings'; empty if the strategy could not be set up.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    log_options = log_options or {}
+    logger = setup_logger(strategy.name, os.path.join(log_dir, f'{strategy.name}.log'), **log_options)
+    quiet = log_options.get('quiet', False)
+    timer = PhaseTimer()
+
+    try:
+        strategy.setup(config_file, seed, logger, timer)
+    except Exception as e:
+        logger.error(f"Failed to set up {strategy.label}: {e}")
+        logger.debug(traceback.format_exc())
+        strategy.close()
+        return {}
+
+    # Per-run records, written in batches
+    sink = None
+    if results_path:
+        sink = ResultsSink(results_path, metadata={'approach': strategy.name, 'config_file': config_file, 'seed': seed},
+                           schema=RUN_RECORD_SCHEMA)
+
+    stopper = make_stopper(stopping, master_number)
+
+    if batched:
+        logger.info(f"Starting {master_number} batched runs")
+        start_ns = timer.now()
+        columns = simulate_until_stopped(_timed_batch(strategy, timer), master_number, stopper)
+        total_time = (timer.now() - start_ns) / 1e9
+        if not isinstance(columns, dict):
+            columns = {'success': columns}  # no batch was run
+        outcomes = columns['success']
+        total_runs = len(outcomes)
+
+        if sink is not None:
+            sink.append_columns({'run': np.arange(1, total_runs + 1), **columns})
+        strategy.after_batch(columns)
+
+        total_success = int(np.count_nonzero(outcomes))
+    else:
+        total_runs = 0
+        total_success = 0
+        total_time = 0.0
+        for run in tqdm(range(1, master_number + 1), desc=f"Running {strategy.label} Simulations"):
+            set_log_run(run)
+            logger.info(f"Starting Run {run}/{master_number}")
+            start_run_ns = timer.now()
+            error = None
+
+            try:
+                success = bool(strategy.run_once(run))
+                logger.debug(f"Run {run}: {'Successful' if success else 'Unsuccessful'} Attack")
+            except Exception as e:
+                logger.error(f"Run {run} failed: {e}")
+                logger.debug(traceback.format_exc())
+                success = False
+                error = str(e)
+
+            elapsed_time = (timer.since('run', start_run_ns) - start_run_ns) / 1e9
+            total_runs += 1
+            total_success += success
+            total_time += elapsed_time
+
+            if sink is not None:
+                record = {'run': run, 'success': success, 'elapsed_s': elapsed_time}
+                if error is not None:
+                    record['error'] = error
+                sink.append(record)
+
+            if error is None:
+                logger.info(f"Run {run} Completed - Success: {success}, Time Taken: {elapsed_time:.2f} seconds")
+                if not quiet:
+                    print(f"Run {run} Completed - Success: {success}, Time Taken: {elapsed_time:.2f} seconds")
+            elif not quiet:
+                print(f"Run {run} Failed - Error: {error}, Time Taken: {elapsed_time:.2f} seconds")
+
+            if stopper is not None and stopper.update(success):
+                logger.info(f"Stopping after {run} runs: {stopper.decision}")
+                break
+
+        set_log_run(None)
+
+    if sink is not None:
+        sink.close()
+
+    results = {
+        'Total Runs': total_runs,
+        'Successful Attacks': total_success,
+        'Unsuccessful Attacks': total_runs - total_success,
+        strategy.total_time_key: total_time,
+        strategy.average_time_key: total_time / total_runs if total_runs > 0 else 0,
+        'Phase Timings': timer.summary()
+    }
+    if stopper is not None:
+        results.update(stopper.summary())
+    results.update(strategy.extra_results())
+    strategy.close()
+
+    # Log and print the summary
+    for output in (logger.info, print):
+        output("\n======================================")
+        output(f"{strategy.label} Experiment Summary")
+        output("======================================")
+        for key, value in results.items():
+            output(f"{key}: {value}")
+
+    return results
@@ -0,0 +1,83 @@
+# simulations/random_streams.py
+
+import numpy as np
+
+_MASK = (1 << 64) - 1
+
+# SplitMix64 constants: the Weyl increment separating counters, and the finalizer multipliers
+_GAMMA = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+
+
+def _mix(x):
+    """
+    SplitMix64 finalizer of a Python int.
+    """
+    x = ((x ^ (x >> 30)) * _MIX1) & _MASK
+    x = ((x ^ (x >> 27)) * _MIX2) & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    """
+    SplitMix64 finalizer of a uint64 array (wrapping arithmetic).
+    """
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(_MIX1)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(_MIX2)
+    return x ^ (x >> np.uint64(31))
+
+
+class RandomStreams:
+    """
+    Counter-based random numbers addressed by (run, event).
+
+    Every exploit or privilege escalation attempt of a run reads the uniform of its
+    event column (see CompiledScenario.exploit_column and privesc_column) in that run
+    instead of the next number of a shared generator. Each run therefore has its own
+    stream, independent of the others and of how runs are split into batches, the
+    scalar and vectorized simulations consume the same numbers, and two approaches
+    given the same seed see the same draw for the same attempt: common random numbers,
+    so their difference is estimated from paired runs with far less variance.
+
+    The key of the streams is derived from the seed with a NumPy SeedSequence, and
+    uniforms are SplitMix64 hashes of the key, the run and the column.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Parameters:
+        - seed (int): Seed of the streams; fresh entropy if None.
+        """
+        self.seed = seed
+        self.key = int(np.random.SeedSequence(seed).generate_state(1, dtype=np.uint64)[0])
+        self.next_run = 0
+
+    def take_runs(self, n_runs):
+        """
+        Returns the indexes of the next n_runs runs, so successive batches get new runs.
+        """
+        runs = np.arange(self.next_run, self.next_run + n_runs, dtype=np.uint64)
+        self.next_run += n_runs
+        return runs
+
+    def run_keys(self, runs):
+        """
+        Returns the per-run stream keys of an array of run indexes.
+        """
+        return _mix_array(np.uint64(self.key) + (runs + np.uint64(1)) * np.uint64(_GAMMA))
+
+    def column(self, run_keys, column):
+        """
+        Returns the uniforms in [0, 1) of one event column for the runs of run_keys.
+        """
+        bits = _mix_array(run_keys + np.uint64(((column + 1) * _GAMMA) & _MASK))
+        return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def uniform(self, run, column):
+        """
+        Returns the uniform in [0, 1) of one event column in one run; equal to column().
+        """
+        run_key = _mix((self.key + (run + 1) * _GAMMA) & _MASK)
+        bits = _mix((run_key + (column + 1) * _GAMMA) & _MASK)
+        return (bits >> 11) * (1.0 / (1 << 53))
@@ -0,0 +1,208 @@
+# simulations/scenario.py
+
+import ast
+import copy
+from collections import namedtuple
+from collections.abc import Mapping
+from simulations.encoded_scenario import EncodedScenario
+
+# Hosts the scripted approaches treat as already compromised
+INITIAL_HOSTS = ['(1, 0)', '(2, 0)']
+
+# Static description of a host as read from host_configurations
+HostRecord = namedtuple('HostRecord', ['os', 'services', 'processes'])
+
+EMPTY_HOST = HostRecord('', [], [])
+
+
+def parse_address(key):
+    """
+    Parses a host or subnet-link key such as '(1, 0)' into a tuple of ints.
+    """
+    if isinstance(key, tuple):
+        return key
+    return tuple(ast.literal_eval(key))
+
+
+class _HostView(Mapping):
+    """
+    Read-only host-keyed mapping decoded on access from a CompiledScenario's encoding.
+    """
+
+    def __init__(self, scenario, decode):
+        self._scenario = scenario
+        self._decode = decode
+
+    def __getitem__(self, host):
+        return self._decode(self._scenario.encoded.host_ids[host])
+
+    def __contains__(self, host):
+        return host in self._scenario.encoded.host_ids
+
+    def __iter__(self):
+        return iter(self._scenario.encoded.host_names)
+
+    def __len__(self):
+        return len(self._scenario.encoded.host_names)
+
+
+class CompiledScenario:
+    """
+    Scenario compiled once from the NASim YAML for the scripted approaches.
+
+    Exploits are indexed by (service, os) and privilege escalations by (process, os),
+    keeping the YAML order within each key so the first entry is the one a linear scan
+    would have found. Hosts are held in an EncodedScenario; `hosts`, `host_exploits`
+    and `host_privescs` are views decoding a host's record, candidate exploits and
+    applicable privilege escalations on access, so memory stays proportional to the
+    encoded arrays as scenarios grow.
+    """
+
+    def __init__(self, network_config, encoded=None):
+        """
+        Compiles a parsed scenario configuration.
+
+        Parameters:
+        - network_config (dict): Parsed NASim scenario configuration.
+        - encoded (EncodedScenario): Encoding of the scenario's hosts, e.g. attached from
+          shared memory; host_configurations then only needs the host firewall rules.
+          Encoded from network_config if None.
+        """
+        self.sensitive_hosts = network_config.get('sensitive_hosts', {}) or {}
+        self.service_scan_cost = network_config.get('service_scan_cost', 1)
+        self.os_scan_cost = network_config.get('os_scan_cost', 1)
+        self.process_scan_cost = network_config.get('process_scan_cost', 1)
+        self.step_limit = network_config.get('step_limit', 1000)
+        self.initial_hosts = list(INITIAL_HOSTS)
+        # Hosts approaches 1-2 attack, in order, and approach 3 may take over; the initial hosts unless restricted
+        self.attack_order = list(INITIAL_HOSTS)
+        # Host of the attack order -> host that must be compromised before it is attacked
+        self.predecessors = {}
+
+        # Network layout: subnet 0 is the internet, firewall rules list the services allowed per subnet link
+        self.subnets = list(network_config.get('subnets', []) or [])
+        self.topology = [list(row) for row in network_config.get('topology', []) or []]
+        self.firewall = {
+            parse_address(link): list(services or [])
+            for link, services in (network_config.get('firewall', {}) or {}).items()
+        }
+
+        # Hosts in integer-encoded form, and per host the services it denies to given source hosts
+        self.encoded = encoded if encoded is not None else EncodedScenario(network_config)
+        self.host_firewalls = {}
+        for host, config in (network_config.get('host_configurations', {}) or {}).items():
+            denied = (config or {}).get('firewall', {}) or {}
+            if denied:
+                self.host_firewalls[host] = {
+                    parse_address(source): list(services or []) for source, services in denied.items()
+                }
+
+        # Hash indexes keyed by (service, os) and (process, os)
+        self.exploit_index = {}
+        for name, exploit in (network_config.get('exploits', {}) or {}).items():
+            key = (exploit.get('service'), exploit.get('os'))
+            self.exploit_index.setdefault(key, []).append((name, exploit))
+
+        self.privesc_index = {}
+        self.privesc_order = []
+        for name, pe in (network_config.get('privilege_escalation', {}) or {}).items():
+            key = (pe.get('process'), pe.get('os'))
+            self.privesc_index.setdefault(key, []).append((name, pe))
+            self.privesc_order.append((name, pe))
+
+        # Per host: its record, candidate exploits for each listed service, and applicable privilege escalations
+        self.hosts = _HostView(self, self._host_record)
+        self.host_exploits = _HostView(self, self._host_exploits)
+        self.host_privescs = _HostView(self, self._host_privescs)
+
+    def _host_record(self, host_id):
+        encoded = self.encoded
+        return HostRecord(
+            encoded.os[encoded.host_os[host_id]],
+            [encoded.services[i] for i in encoded.host_services(host_id)],
+            [encoded.processes[i] for i in encoded.host_processes(host_id)]
+        )
+
+    def _host_exploits(self, host_id):
+        encoded = self.encoded
+        os_ = encoded.os[encoded.host_os[host_id]]
+        return [(encoded.services[i], self.exploit_index.get((encoded.services[i], os_), []))
+                for i in encoded.host_services(host_id)]
+
+    def _host_privescs(self, host_id):
+        return [self.privesc_order[i] for i in self.encoded.host_privescs(host_id).tolist()]
+
+    def restricted(self, hosts, initial_hosts=None, predecessors=None):
+        """
+        Returns a copy of the scenario that attacks only the given hosts, in order.
+
+        The hosts become the attack order of approaches 1-2 and the only hosts
+        approach 3 attempts to exploit; the initial hosts, which every run starts
+        out holding, are kept unless given. The compiled indexes are shared.
+
+        Parameters:
+        - hosts (list of str): Host keys, in attack order.
+        - initial_hosts (list of str): Foothold of the restricted scenario; unchanged if None.
+        - predecessors (dict): Host -> host that must be compromised in a run before the host
+          is attacked (None or absent for no condition); no conditions if None.
+
+        Returns:
+        - scenario (CompiledScenario): Restricted scenario.
+        """
+        restricted = copy.copy(self)
+        restricted.attack_order = list(hosts)
+        if initial_hosts is not None:
+            restricted.initial_hosts = list(initial_hosts)
+        restricted.predecessors = {host: parent for host, parent in (predecessors or {}).items() if parent is not None}
+        restricted.host_exploits = {host: self.host_exploits[host] for host in hosts if host in self.host_exploits}
+        return restricted
+
+    def exploit_column(self, host, service_index, position=0):
+        """
+        Returns the random event column of an exploit attempt (see RandomStreams).
+
+        Columns are numbered over every host of the scenario, so restricted copies
+        and every approach agree on them.
+
+        Parameters:
+        - host (str): Host key.
+        - service_index (int): Position of the service in the host's service list.
+        - position (int): Position of the exploit among the candidates for the service.
+
+        Returns:
+        - column (int): Event column.
+        """
+        return self.encoded.exploit_column(self.encoded.host_ids[host], service_index, position)
+
+    def privesc_column(self, host, service_index, name):
+        """
+        Returns the random event column of a privilege escalation attempted after
+        exploiting the service at service_index of the host.
+        """
+        return self.encoded.privesc_column(self.encoded.host_ids[host], service_index, self.encoded.privesc_ids[name])
+
+    def host(self, host):
+        """
+        Returns the HostRecord of a host, or an empty record for unknown hosts.
+        """
+        return self.hosts.get(host, EMPTY_HOST)
+
+    def find_exploit(self, service, os_):
+        """
+        Returns the first exploit for a (service, os) pair, or None.
+        """
+        candidates = self.exploit_index.get((service, os_))
+        return candidates[0][1] if candidates else None
+
+    def find_privesc(self, process, os_):
+        """
+        Returns the first privilege escalation for a (process, os) pair, or None.
+        """
+        candidates = self.privesc_index.get((process, os_))
+        return candidates[0][1] if candidates else None
+
+    def is_sensitive(self, host):
+        """
+        Returns True if the host is listed in sensitive_hosts.
+        """
+        return host in self.sensitive_hosts
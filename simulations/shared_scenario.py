@@ -0,0 +1,149 @@
+# simulations/shared_scenario.py
+
+import os
+import pickle
+import shutil
+import hashlib
+import numpy as np
+from simulations.scenario import CompiledScenario
+from simulations.encoded_scenario import EncodedScenario
+from utils.helpers import load_yaml_config
+from utils.scenario_cache import DEFAULT_CACHE_DIR, private_cache_dir
+
+# Bumped whenever the published layout or the arrays of EncodedScenario change
+SHARED_FORMAT_VERSION = 2
+
+# Metadata file of a published scenario; written last, so its presence marks a complete publication
+META_NAME = 'meta.pickle'
+
+# (absolute path, mtime_ns, size) -> attached CompiledScenario, per process
+_attached = {}
+
+
+def scenario_header(network_config):
+    """
+    Returns a scenario configuration without the host records an EncodedScenario holds.
+
+    Only the host firewall rules are kept from host_configurations, since
+    CompiledScenario still reads them from the configuration.
+    """
+    header = {key: value for key, value in network_config.items() if key != 'host_configurations'}
+    header['host_configurations'] = {
+        host: {'firewall': config['firewall']}
+        for host, config in (network_config.get('host_configurations', {}) or {}).items()
+        if config and config.get('firewall')
+    }
+    return header
+
+
+def published_dir(scenario_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns the directory a scenario file is published to, named after the SHA-256 of its bytes.
+    """
+    with open(scenario_file, 'rb') as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    return os.path.join(cache_dir, 'compiled', f'{digest}.v{SHARED_FORMAT_VERSION}')
+
+
+def publish_scenario(scenario_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Compiles a scenario once and writes its encoded arrays for memory mapping.
+
+    Each array of the EncodedScenario goes to its own .npy file, next to a pickle of
+    the remaining metadata and the scenario header. The files are written to a
+    private directory that is then renamed into place, so concurrent publishers and
+    readers never see a partial publication. A scenario already published is not
+    compiled again. Raises PermissionError if cache_dir could have been written by
+    another user, since the metadata is unpickled when attaching.
+
+    Parameters:
+    - scenario_file (str): Path to the NASim scenario YAML file.
+    - cache_dir (str): Root directory of the published scenarios.
+
+    Returns:
+    - directory (str): Directory of the published scenario.
+    """
+    if private_cache_dir(cache_dir) is None:
+        raise PermissionError(f"Cache directory is not private to the user: {cache_dir}")
+    directory = published_dir(scenario_file, cache_dir)
+    if os.path.exists(os.path.join(directory, META_NAME)):
+        return directory
+
+    network_config = load_yaml_config(scenario_file)
+    encoded = EncodedScenario(network_config)
+    arrays = encoded.arrays()
+    tmp_dir = f'{directory}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), array, allow_pickle=False)
+        meta = {'arrays': list(arrays), 'metadata': encoded.metadata(), 'header': scenario_header(network_config)}
+        with open(os.path.join(tmp_dir, META_NAME), 'wb') as file:
+            pickle.dump(meta, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_dir, directory)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, META_NAME)):
+            raise
+        # another process published the scenario first
+    return directory
+
+
+def _map_array(path):
+    """
+    Maps a published array read-only; empty arrays, which cannot be mapped, are loaded.
+    """
+    try:
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError:
+        return np.load(path, allow_pickle=False)
+
+
+def attach_scenario(directory):
+    """
+    Builds a CompiledScenario on the memory-mapped arrays of a published scenario.
+
+    The arrays are read-only views of the page cache, shared by every process that
+    attaches the same publication; only the small metadata is unpickled.
+
+    Parameters:
+    - directory (str): Directory returned by publish_scenario.
+
+    Returns:
+    - scenario (CompiledScenario): Compiled scenario.
+    """
+    with open(os.path.join(directory, META_NAME), 'rb') as file:
+        meta = pickle.load(file)
+    arrays = {name: _map_array(os.path.join(directory, f'{name}.npy')) for name in meta['arrays']}
+    return CompiledScenario(meta['header'], encoded=EncodedScenario.from_parts(arrays, meta['metadata']))
+
+
+def load_compiled_scenario(scenario_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns the compiled scenario of a file, attaching its publication when possible.
+
+    The scenario is published on first use, then attached once per process and
+    served from memory; it is shared, so callers must not modify it (restricted()
+    returns a copy). Falls back to compiling in process if the cache directory is
+    disabled or cannot be written.
+
+    Parameters:
+    - scenario_file (str): Path to the NASim scenario YAML file.
+    - cache_dir (str): Root directory of the published scenarios; None to always compile.
+
+    Returns:
+    - scenario (CompiledScenario): Compiled scenario.
+    """
+    if not cache_dir:
+        return CompiledScenario(load_yaml_config(scenario_file))
+    path = os.path.abspath(scenario_file)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    scenario = _attached.get(key)
+    if scenario is None:
+        try:
+            scenario = attach_scenario(publish_scenario(scenario_file, cache_dir))
+        except OSError:
+            return CompiledScenario(load_yaml_config(scenario_file))
+        _attached[key] = scenario
+    return scenario
@@ -0,0 +1,183 @@
+# simulations/stopping.py
+
+import math
+from statistics import NormalDist
+import numpy as np
+
+DEFAULT_CONFIDENCE = 0.95
+
+# Stopping decisions reported in the results
+DECISION_CI_WIDTH = 'ci_width'
+DECISION_ACCEPT_H0 = 'sprt_accept_h0'
+DECISION_ACCEPT_H1 = 'sprt_accept_h1'
+DECISION_MAX_RUNS = 'max_runs'
+
+
+def wilson_interval(successes, n, confidence=DEFAULT_CONFIDENCE):
+    """
+    Wilson score interval of a binomial success rate.
+
+    Unlike the normal approximation it stays inside [0, 1] and has a sensible width
+    when every run succeeds or fails, which is the common case for easy scenarios.
+
+    Parameters:
+    - successes (int): Number of successful runs.
+    - n (int): Number of runs.
+    - confidence (float): Two-sided confidence level.
+
+    Returns:
+    - (low, high) (tuple of float): Interval bounds; (0, 1) if n is 0.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class SequentialStopper:
+    """
+    Decides when a Monte Carlo estimate of a success rate has seen enough runs.
+
+    Two rules can be combined; the first one met stops the runs:
+    - ci_width: the Wilson interval of the success rate is at most this wide.
+    - sprt: Wald's sequential probability ratio test of H0: p = p0 against H1: p = p1
+      reached a decision at error rates alpha and beta.
+    No decision is taken before min_runs runs, and max_runs is never exceeded.
+    """
+
+    def __init__(self, max_runs, ci_width=None, confidence=DEFAULT_CONFIDENCE, sprt=None, alpha=0.05, beta=0.05,
+                 min_runs=10):
+        """
+        Parameters:
+        - max_runs (int): Maximum number of runs (the runner's master_number).
+        - ci_width (float): Target width of the confidence interval; None to disable.
+        - confidence (float): Confidence level of the interval.
+        - sprt (tuple of float): (p0, p1) with p0 < p1 for the SPRT; None to disable.
+        - alpha (float): SPRT probability of accepting H1 when H0 holds.
+        - beta (float): SPRT probability of accepting H0 when H1 holds.
+        - min_runs (int): Runs before any decision.
+        """
+        if ci_width is None and sprt is None:
+            raise ValueError("SequentialStopper needs ci_width, sprt or both")
+        self.max_runs = max_runs
+        self.ci_width = ci_width
+        self.confidence = confidence
+        self.min_runs = min_runs
+        self.successes = 0
+        self.n = 0
+        self.decision = None
+
+        self.sprt = tuple(sprt) if sprt is not None else None
+        if self.sprt is not None:
+            p0, p1 = self.sprt
+            if not 0 < p0 < p1 < 1:
+                raise ValueError(f"SPRT needs 0 < p0 < p1 < 1, got {self.sprt}")
+            self._success_step = math.log(p1 / p0)
+            self._failure_step = math.log((1 - p1) / (1 - p0))
+            self._upper = math.log((1 - beta) / alpha)
+            self._lower = math.log(beta / (1 - alpha))
+            self.log_likelihood_ratio = 0.0
+
+    def _decide(self):
+        if self.n >= self.min_runs:
+            if self.sprt is not None:
+                if self.log_likelihood_ratio >= self._upper:
+                    self.decision = DECISION_ACCEPT_H1
+                elif self.log_likelihood_ratio <= self._lower:
+                    self.decision = DECISION_ACCEPT_H0
+            if self.decision is None and self.ci_width is not None:
+                low, high = wilson_interval(self.successes, self.n, self.confidence)
+                if high - low <= self.ci_width:
+                    self.decision = DECISION_CI_WIDTH
+        if self.decision is None and self.n >= self.max_runs:
+            self.decision = DECISION_MAX_RUNS
+        return self.decision is not None
+
+    def update(self, success):
+        """
+        Adds one run and returns True once the runs should stop.
+        """
+        return self.update_batch(int(bool(success)), 1)
+
+    def update_batch(self, successes, n):
+        """
+        Adds n runs with the given number of successes and returns True once the runs should stop.
+        """
+        self.successes += successes
+        self.n += n
+        if self.sprt is not None:
+            self.log_likelihood_ratio += successes * self._success_step + (n - successes) * self._failure_step
+        return self._decide()
+
+    def next_batch_size(self):
+        """
+        Returns the number of runs to simulate before the next check of a batched runner.
+
+        Batches double the runs done so far (at least min_runs), so a batched runner
+        checks O(log n) times and overshoots the stopping point by at most a factor of two.
+        """
+        return max(1, min(self.max_runs - self.n, max(self.min_runs, self.n)))
+
+    def summary(self):
+        """
+        Returns the runs used, the interval achieved and the decision, for the runner results.
+        """
+        low, high = wilson_interval(self.successes, self.n, self.confidence)
+        return {
+            'Runs Used': self.n,
+            'Success CI Low': low,
+            'Success CI High': high,
+            'Confidence': self.confidence,
+            'Stopping Decision': self.decision
+        }
+
+
+def make_stopper(stopping, max_runs):
+    """
+    Builds a SequentialStopper from a runner's stopping option.
+
+    Parameters:
+    - stopping (dict): Keyword arguments of SequentialStopper except max_runs; None for
+      a fixed number of runs.
+    - max_runs (int): Maximum number of runs.
+
+    Returns:
+    - stopper (SequentialStopper): Stopper, or None if stopping is None.
+    """
+    if stopping is None:
+        return None
+    return SequentialStopper(max_runs, **stopping)
+
+
+def simulate_until_stopped(simulate_batch, max_runs, stopper=None):
+    """
+    Runs a batched simulation until a stopper decides, or max_runs runs in one batch
+    without a stopper.
+
+    Parameters:
+    - simulate_batch (callable): Takes a number of runs and returns their boolean outcomes,
+      or a dict of per-run arrays with the outcomes under 'success'.
+    - max_runs (int): Maximum number of runs.
+    - stopper (SequentialStopper): Stopping rule; None for exactly max_runs runs.
+
+    Returns:
+    - outcomes (np.ndarray or dict): Boolean outcome of every run simulated, or every
+      column of every run if simulate_batch returns columns.
+    """
+    if stopper is None:
+        return simulate_batch(max_runs)
+    batches = []
+    while stopper.decision is None and stopper.n < max_runs:
+        batch = simulate_batch(stopper.next_batch_size())
+        batches.append(batch)
+        outcomes = batch['success'] if isinstance(batch, dict) else batch
+        stopper.update_batch(int(np.count_nonzero(outcomes)), len(outcomes))
+    if not batches:
+        return np.zeros(0, dtype=bool)
+    if isinstance(batches[0], dict):
+        return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+    return np.concatenate(batches)
@@ -0,0 +1,190 @@
+# simulations/strategies.py
+
+from utils.helpers import load_yaml_config
+from simulations.harness import AttackStrategy
+from simulations.shared_scenario import load_compiled_scenario
+from simulations.attack_graph import plan_attack
+from simulations.analytic import solve_manual_attack, solve_with_timing
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_manual_attack_batch
+
+
+class ScriptedStrategy(AttackStrategy):
+    """
+    Strategy playing a fixed attack script on the compiled scenario.
+
+    Loads the scenario named by the main configuration, optionally re-planned from the
+    network topology, and draws every attempt from counter-based random streams (see
+    RandomStreams), so the scalar and batched runs of a seed give the same outcomes.
+    Subclasses set batch_simulation and analytic_solver and implement run_once.
+    """
+
+    # Batched simulation of the script: (scenario, n_runs, streams=) -> boolean outcomes
+    batch_simulation = None
+    # Exact solver of the script: scenario -> results entries
+    analytic_solver = None
+
+    def __init__(self, analytic=False, topology_aware=False):
+        """
+        Parameters:
+        - analytic (bool): Also compute the exact success probability and expected step cost.
+        - topology_aware (bool): Attack the hosts on the cheapest topology- and firewall-permitted
+          paths to the sensitive hosts instead of the fixed initial hosts.
+        """
+        self.analytic = analytic
+        self.topology_aware = topology_aware
+
+    def setup(self, config_file, seed, logger, timer):
+        super().setup(config_file, seed, logger, timer)
+        # One counter-based random stream per run (see RandomStreams)
+        self.streams = RandomStreams(seed)
+
+        main_config = load_yaml_config(config_file)
+        scenario_file = main_config.get('network_config_file')
+        if not scenario_file:
+            logger.error("network_config_file not specified in config.yaml")
+            raise ValueError("network_config_file not specified in config.yaml")
+
+        # Attach the compiled scenario, published once for every process (see shared_scenario)
+        self.scenario = load_compiled_scenario(scenario_file)
+        logger.info(f"Loaded network configuration from {scenario_file}")
+        if self.topology_aware:
+            self.scenario = plan_attack(self.scenario)
+            logger.info(f"Attack plan from the network topology: {self.scenario.attack_order}")
+
+    def run_batch(self, n_runs):
+        return {'success': self.batch_simulation(self.scenario, n_runs, streams=self.streams)}
+
+    def extra_results(self):
+        if not self.analytic:
+            return {}
+        # Exact figures to report next to the Monte Carlo estimate
+        return solve_with_timing(self.analytic_solver, self.scenario)
+
+    def initial_network_map(self):
+        """
+        Returns the network map a run starts from: the initial hosts compromised with
+        user access and the other hosts of the attack order not compromised yet.
+        """
+        network_map = {}
+        for host in self.scenario.initial_hosts:
+            network_map[host] = {'compromised': True, 'access_level': 'user'}
+            self.logger.debug(f"Host {host} compromised with 'user' access.")
+        for host in self.scenario.attack_order:
+            network_map.setdefault(host, {'compromised': False, 'access_level': None})
+        return network_map
+
+    def reachable(self, host, owned):
+        """
+        Returns True unless the host's predecessor (see CompiledScenario.restricted) is
+        missing from owned, the hosts held or exploited so far in the run.
+        """
+        parent = self.scenario.predecessors.get(host)
+        if parent is None or parent in owned:
+            return True
+        self.logger.debug(f"Skipping {host}: {parent} is not compromised.")
+        return False
+
+    def outcome(self, network_map):
+        """
+        Returns True if a host of the network map is sensitive, logging the verdict.
+        """
+        compromised_hosts = [h for h, status in network_map.items() if status.get('compromised', False)]
+        if any(self.scenario.is_sensitive(host) for host in compromised_hosts):
+            self.logger.info("Network was compromised.")
+            return True
+        self.logger.info("Network was not compromised.")
+        return False
+
+
+class ManualAttackStrategy(ScriptedStrategy):
+    """
+    Scans each host of the attack order whose predecessor is compromised, exploits its services with the first matching exploit and
+    escalates with the first matching privilege escalation of each process, within the
+    scenario's step limit.
+    """
+
+    batch_simulation = staticmethod(simulate_manual_attack_batch)
+    analytic_solver = staticmethod(solve_manual_attack)
+
+    def run_once(self, run):
+        scenario = self.scenario
+        streams = self.streams
+        logger = self.logger
+        timer = self.timer
+        now = timer.now
+        steps = 0
+        run_index = int(streams.take_runs(1)[0])
+
+        def exploit_func(host, service_index, service, os_):
+            """
+            Attempts to exploit a service on a host.
+
+            Returns:
+            - access_level (str or None): The level of access gained or None if failed.
+            """
+            nonlocal steps
+            exploit = scenario.find_exploit(service, os_)
+            if not exploit:
+                return None
+            if streams.uniform(run_index, scenario.exploit_column(host, service_index)) < exploit.get('prob', 0):
+                steps += exploit.get('cost', 1)
+                return exploit.get('access', 'user')
+            return None
+
+        def escalate_privileges(host, service_index, process, os_):
+            """
+            Attempts privilege escalation on a host.
+
+            Returns:
+            - access_level (str or None): The new level of access or None if failed.
+            """
+            nonlocal steps
+            candidates = scenario.privesc_index.get((process, os_))
+            if not candidates:
+                return None
+            name, pe = candidates[0]
+            if streams.uniform(run_index, scenario.privesc_column(host, service_index, name)) < pe.get('prob', 0):
+                steps += pe.get('cost', 1)
+                return pe.get('access', 'root')
+            return None
+
+        # Initial compromised hosts
+        network_map = self.initial_network_map()
+        owned = set(scenario.initial_hosts)
+
+        for host in scenario.attack_order:
+            if steps >= scenario.step_limit:
+                logger.debug("Step limit reached. Ending simulation.")
+                break
+            if not self.reachable(host, owned):
+                continue
+
+            # Service, OS and process scans
+            start_ns = now()
+            config = scenario.host(host)
+            services, os_, processes = config.services, config.os, config.processes
+            steps += scenario.service_scan_cost + scenario.os_scan_cost + scenario.process_scan_cost
+            timer.since('scan', start_ns)
+
+            for service_index, service in enumerate(services):
+                start_ns = now()
+                access = exploit_func(host, service_index, service, os_)
+                timer.since('exploit', start_ns)
+                if access:
+                    owned.add(host)
+                    network_map[host]['access_level'] = access
+                    logger.debug(f"Host {host} compromised with '{access}' access.")
+                    for process in processes:
+                        start_ns = now()
+                        escalated_access = escalate_privileges(host, service_index, process, os_)
+                        timer.since('privesc', start_ns)
+                        if escalated_access:
+                            network_map[host]['access_level'] = escalated_access
+                            logger.info(f"Privilege escalation successful on {host}, access level: {escalated_access}")
+                            if scenario.is_sensitive(host):
+                                logger.info(f"Sensitive host {host} compromised.")
+                                return True
+            logger.debug(f"Completed scanning for host {host}. Steps taken: {steps}")
+
+        return self.outcome(network_map)
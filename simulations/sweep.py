@@ -0,0 +1,385 @@
+# simulations/sweep.py
+
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+from simulations.approach0 import DEFAULT_PPO_ENVS, run_ppo_simulation
+from simulations.approach1 import run_approach1
+from simulations.approach2 import run_approach2
+from simulations.approach3 import run_approach3
+from environments.environment_loader import resolve_scenario_file
+from utils.helpers import close_logger
+from utils.fingerprint import scenario_file_fingerprint
+from utils.result_store import ResultStore
+from utils.results_sink import RESULTS_SUFFIX
+from simulations.sweep_journal import DEFAULT_BASE_SEED, cell_key, code_hash
+from simulations.shared_scenario import publish_scenario
+from simulations.stopping import DEFAULT_CONFIDENCE, wilson_interval
+from utils.timing import PERCENTILES, format_phase_summary
+
+# Per-run latency columns of the report, in milliseconds
+RUN_TIME_COLUMNS = [f'Run Time p{q} (ms)' for q in PERCENTILES] + ['Run Time Max (ms)']
+
+# Confidence interval of the Monte Carlo success rate and why the runs stopped
+STOPPING_COLUMNS = ['Success CI Low', 'Success CI High', 'Stopping Decision']
+
+# Approaches in report order: (label, runner, logger name, accepts scripted-only options)
+APPROACHES = [
+    ('Approach 0 (PPO-Based)', run_ppo_simulation, 'approach0', False),
+    ('Approach 1 (Manual Attack)', run_approach1, 'approach1', True),
+    ('Approach 2 (Cyber Kill Chain Simulation)', run_approach2, 'approach2', True),
+    ('Approach 3 (Privilege Escalation)', run_approach3, 'approach3', True),
+]
+
+# Runner arguments that do not change a result and are left out of its memo key
+NON_RESULT_OPTIONS = {'config_file', 'log_dir', 'seed', 'log_options', 'results_path', 'model_cache_dir',
+                      'start_method', 'fused_env'}
+
+
+def build_result_row(iteration, timestamp, approach, result):
+    """
+    Builds one row of the simulation report from an approach's summary.
+
+    Parameters:
+    - iteration (int): Index of the configuration file in the sweep.
+    - timestamp (str): Datestamp recorded for the iteration.
+    - approach (str): Approach label.
+    - result (dict): Summary returned by the approach runner (may be empty).
+
+    Returns:
+    - row (dict): Row in the format expected by `write_results_to_csv_pandas`.
+    """
+    if result:
+        total_runs = result.get('Total Runs', 0)
+        success_rate = result.get('Successful Attacks', 0) / total_runs if total_runs else None
+        exact = result.get('Exact Success Probability')
+        step_cost = result.get('Expected Step Cost')
+        phase_timings = result.get('Phase Timings') or {}
+        run_stats = phase_timings.get('run', {})
+        run_times = [run_stats.get(key) for key in [f'p{q}' for q in PERCENTILES] + ['max']]
+        row = {
+            'Iteration': iteration,
+            'Datestamp': timestamp,
+            'Approach': approach,
+            'Total Runs': result.get('Total Runs', 0),
+            'Successful Attacks': result.get('Successful Attacks', 0),
+            'Unsuccessful Attacks': result.get('Unsuccessful Attacks', 0),
+            'Total Time Taken (s)': round(result.get('Total Time Taken', 0), 4),
+            'Average Time per Run (s)': round(result.get('Average Time per Run', 0), 4),
+            'Monte Carlo Success Rate': round(success_rate, 4) if success_rate is not None else 'N/A',
+            'Exact Success Probability': round(exact, 4) if exact is not None else 'N/A',
+            'Expected Step Cost': round(step_cost, 4) if step_cost is not None else 'N/A'
+        }
+        if total_runs:
+            low, high = wilson_interval(result.get('Successful Attacks', 0), total_runs,
+                                        result.get('Confidence', DEFAULT_CONFIDENCE))
+            row['Success CI Low'] = round(low, 4)
+            row['Success CI High'] = round(high, 4)
+        else:
+            row['Success CI Low'] = row['Success CI High'] = 'N/A'
+        row['Stopping Decision'] = result.get('Stopping Decision') or 'fixed'
+        for column, value in zip(RUN_TIME_COLUMNS, run_times):
+            row[column] = round(value / 1e6, 4) if value is not None else 'N/A'
+        row['Phase Timings'] = format_phase_summary(phase_timings) if phase_timings else 'N/A'
+        return row
+    row = {
+        'Iteration': iteration,
+        'Datestamp': timestamp,
+        'Approach': approach,
+        'Total Runs': 'N/A',
+        'Successful Attacks': 'N/A',
+        'Unsuccessful Attacks': 'N/A',
+        'Total Time Taken (s)': 'N/A',
+        'Average Time per Run (s)': 'N/A',
+        'Monte Carlo Success Rate': 'N/A',
+        'Exact Success Probability': 'N/A',
+        'Expected Step Cost': 'N/A'
+    }
+    for column in STOPPING_COLUMNS + RUN_TIME_COLUMNS + ['Phase Timings']:
+        row[column] = 'N/A'
+    return row
+
+
+def cell_seed(base_seed, iteration, approach_index, common_random_numbers=False):
+    """
+    Derives an independent seed for one (config, approach) cell.
+
+    Parameters:
+    - base_seed (int): Seed of the whole sweep; fresh entropy if None.
+    - iteration (int): Index of the configuration file.
+    - approach_index (int): Index of the approach in APPROACHES.
+    - common_random_numbers (bool): Give every approach of a configuration the same seed,
+      so the scripted approaches see the same draw for the same attempt (see RandomStreams)
+      and can be compared run by run.
+
+    Returns:
+    - seed (int): 32-bit seed for the cell.
+    """
+    entropy = base_seed if base_seed is not None else np.random.SeedSequence().entropy
+    if common_random_numbers:
+        approach_index = 0
+    return int(np.random.SeedSequence([entropy, iteration, approach_index]).generate_state(1)[0])
+
+
+def result_params(kwargs):
+    """
+    Returns the runner arguments that can change a result (see NON_RESULT_OPTIONS).
+    """
+    return {key: value for key, value in kwargs.items() if key not in NON_RESULT_OPTIONS}
+
+
+def config_fingerprint(config_file):
+    """
+    Returns the exact fingerprint of the scenario named by a main configuration file, or
+    None if it cannot be loaded.
+    """
+    try:
+        return scenario_file_fingerprint(resolve_scenario_file(config_file), exact=True)
+    except Exception as e:
+        print(f"Could not fingerprint {config_file}: {e}")
+        return None
+
+
+def run_memoized(runner, kind, result_store_dir, **kwargs):
+    """
+    Runs an approach runner, answering from the result store when the same scenario
+    (same exact fingerprint, see utils.fingerprint) has already been run by the same
+    code (see code_hash) with the same seed and options.
+
+    A hit returns the stored summary as is, without writing per-run records.
+
+    Parameters:
+    - runner (callable): Approach runner.
+    - kind (str): Result kind in the store (the approach's logger name).
+    - result_store_dir (str): ResultStore directory; None to always run.
+    - **kwargs: Runner arguments, including config_file.
+
+    Returns:
+    - result (dict): Runner summary.
+    """
+    if not result_store_dir:
+        return runner(**kwargs)
+
+    fingerprint = config_fingerprint(kwargs['config_file'])
+    if fingerprint is None:
+        return runner(**kwargs)
+
+    store = ResultStore(result_store_dir)
+    params = dict(result_params(kwargs), seed=kwargs.get('seed'))
+    code_digest = code_hash(kind)
+    result = store.get(fingerprint, kind, params, code_digest)
+    if result is not None:
+        print(f"{kind} for {kwargs['config_file']} answered from the result store ({fingerprint[:12]})")
+        return result
+    result = runner(**kwargs)
+    if result:
+        store.put(fingerprint, kind, params, result, code_digest)
+    return result
+
+
+def journal_lookup(journal, kind, config_file, seed, params):
+    """
+    Looks a cell up in a sweep journal.
+
+    Returns:
+    - (key, fingerprint, code_digest, result) (tuple): The cell's journal key, scenario
+      fingerprint and code hash, and its stored result if the cell finished with the
+      same scenario and code (None otherwise).
+    """
+    key = cell_key(config_file, kind, seed, params)
+    fingerprint = config_fingerprint(config_file)
+    code_digest = code_hash(kind)
+    return key, fingerprint, code_digest, journal.lookup(key, fingerprint, code_digest)
+
+
+def discard_partial_results(results_path):
+    """
+    Removes the per-run results a crashed or invalidated cell left behind, so its rerun
+    does not append to them.
+    """
+    if results_path:
+        path = results_path if results_path.endswith(RESULTS_SUFFIX) else results_path + RESULTS_SUFFIX
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run_journaled(runner, kind, journal, result_store_dir=None, **kwargs):
+    """
+    Runs an approach runner unless the sweep journal holds a valid result for the cell.
+
+    Parameters:
+    - runner (callable): Approach runner.
+    - kind (str): Approach name (its logger name).
+    - journal (SweepJournal): Journal of the sweep; None to always run.
+    - result_store_dir (str): ResultStore directory (see run_memoized).
+    - **kwargs: Runner arguments, including config_file.
+
+    Returns:
+    - result (dict): Runner summary.
+    """
+    if journal is None:
+        return run_memoized(runner, kind, result_store_dir, **kwargs)
+
+    config_file = kwargs['config_file']
+    key, fingerprint, code_digest, result = journal_lookup(
+        journal, kind, config_file, kwargs.get('seed'), result_params(kwargs)
+    )
+    if result is not None:
+        print(f"{kind} for {config_file} already finished; reusing its journaled result")
+        return result
+
+    discard_partial_results(kwargs.get('results_path'))
+    result = run_memoized(runner, kind, result_store_dir, **kwargs)
+    if result:
+        journal.record(key, config_file, kind, kwargs.get('seed'), fingerprint, code_digest, result,
+                       artifacts={'results_path': kwargs.get('results_path'), 'log_dir': kwargs.get('log_dir')})
+    return result
+
+
+def run_sweep_cell(iteration, approach_index, config_file, log_dir, master_number, seed, options=None,
+                   ppo_options=None, results_path=None, result_store_dir=None):
+    """
+    Runs a single (config, approach) cell. Executed inside a pool worker.
+
+    Parameters:
+    - iteration (int): Index of the configuration file.
+    - approach_index (int): Index of the approach in APPROACHES.
+    - config_file (str): Path to the main configuration YAML file.
+    - log_dir (str): Log directory reserved for this cell.
+    - master_number (int): Number of runs.
+    - seed (int): Seed for this cell.
+    - options (dict): Extra keyword arguments for the scripted approaches.
+    - ppo_options (dict): Extra keyword arguments for the PPO approach.
+    - results_path (str): Results file for the cell's per-run records; none if None.
+    - result_store_dir (str): ResultStore directory (see run_memoized); None to always run.
+
+    Returns:
+    - (iteration, approach_index, result) (tuple): Cell coordinates and the runner summary.
+    """
+    label, runner, logger_name, scripted = APPROACHES[approach_index]
+
+    # Pool workers are reused across cells; drop handlers pointing at a previous cell's log dir
+    close_logger(logger_name)
+
+    kwargs = dict(options or {}) if scripted else dict(ppo_options or {})
+    if results_path:
+        kwargs['results_path'] = results_path
+    try:
+        result = run_memoized(runner, logger_name, result_store_dir, master_number=master_number,
+                              config_file=config_file, log_dir=log_dir, seed=seed, **kwargs)
+    except Exception as e:
+        print(f"{label} failed for {config_file}: {e}")
+        print(traceback.format_exc())
+        result = {}
+    finally:
+        close_logger(logger_name)  # drain a queued logger before the result is reported
+    return iteration, approach_index, result
+
+
+def run_parallel_sweep(config_files, main_log_dir='logs', master_number=100, max_workers=None, base_seed=None,
+                       options=None, ppo_options=None, results_dir=None, report_sink=None, approaches=None,
+                       result_store_dir=None, journal=None, common_random_numbers=False):
+    """
+    Runs every (config, approach) cell of a sweep on a process pool.
+
+    Parameters:
+    - config_files (list of str): Main configuration files, one per iteration.
+    - main_log_dir (str): Root log directory; each cell logs under <config>/<approach>_logs.
+    - master_number (int): Number of runs per cell.
+    - max_workers (int): Number of worker processes; defaults to the CPU count.
+    - base_seed (int): Seed from which every cell seed is derived; DEFAULT_BASE_SEED if None.
+    - options (dict): Extra keyword arguments for the scripted approaches.
+    - ppo_options (dict): Extra keyword arguments for the PPO approach. n_envs defaults to
+      DEFAULT_PPO_ENVS, as in main(), so a cell has the same journal key whichever path ran it.
+    - results_dir (str): Root directory of the per-run results; each cell writes <config>/<approach>.
+    - report_sink (ResultsSink): Receives each report row as soon as its cell finishes.
+    - approaches (list of int): Indexes in APPROACHES to run; all of them if None.
+    - result_store_dir (str): ResultStore directory memoizing cell results by scenario
+      fingerprint (see run_memoized); None to always run.
+    - journal (SweepJournal): Journal of the sweep. Cells it holds a valid result for are
+      not run again, finished cells are recorded as they complete, and base_seed defaults
+      to the journal's.
+    - common_random_numbers (bool): Run every approach of a configuration on the same random
+      streams (see cell_seed).
+
+    Returns:
+    - all_results (list of dict): Report rows ordered by iteration and approach.
+    """
+    os.makedirs(main_log_dir, exist_ok=True)
+    approaches = list(range(len(APPROACHES))) if approaches is None else list(approaches)
+    ppo_options = dict(ppo_options or {})
+    ppo_options['n_envs'] = ppo_options.get('n_envs') or DEFAULT_PPO_ENVS
+    if journal is not None and base_seed is None:
+        base_seed = journal.base_seed
+    if base_seed is None:
+        base_seed = DEFAULT_BASE_SEED
+    timestamps = {}
+    results = {}
+    pending_cells = {}
+    start_time = time.time()
+
+    def report(iteration, approach_index, result):
+        results[(iteration, approach_index)] = result
+        if report_sink is not None:
+            report_sink.append(build_result_row(
+                iteration, timestamps[iteration], APPROACHES[approach_index][0], result
+            ))
+            report_sink.flush()
+
+    # Compile every scenario once here; the workers memory-map the published arrays
+    for config_file in dict.fromkeys(config_files):
+        try:
+            publish_scenario(resolve_scenario_file(config_file))
+        except Exception as e:
+            print(f"Could not publish the scenario of {config_file}: {e}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for iteration, config_file in enumerate(config_files):
+            timestamps[iteration] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for approach_index in approaches:
+                _, _, logger_name, scripted = APPROACHES[approach_index]
+                log_dir = os.path.join(main_log_dir, f'config{iteration}', f'{logger_name}_logs')
+                results_path = os.path.join(results_dir, f'config{iteration}', logger_name) if results_dir else None
+                seed = cell_seed(base_seed, iteration, approach_index, common_random_numbers)
+                if journal is not None:
+                    params = result_params(options or {}) if scripted else result_params(ppo_options)
+                    params['master_number'] = master_number
+                    key, fingerprint, code_digest, result = journal_lookup(
+                        journal, logger_name, config_file, seed, params
+                    )
+                    if result is not None:
+                        print(f"Reusing journaled {APPROACHES[approach_index][0]} for {config_file}")
+                        report(iteration, approach_index, result)
+                        continue
+                    pending_cells[(iteration, approach_index)] = (
+                        key, config_file, logger_name, seed, fingerprint, code_digest,
+                        {'results_path': results_path, 'log_dir': log_dir}
+                    )
+                    discard_partial_results(results_path)
+                futures.append(executor.submit(
+                    run_sweep_cell, iteration, approach_index, config_file, log_dir, master_number,
+                    seed, options, ppo_options, results_path, result_store_dir
+                ))
+
+        for future in as_completed(futures):
+            iteration, approach_index, result = future.result()
+            cell = pending_cells.get((iteration, approach_index))
+            if cell is not None and result:
+                key, config_file, logger_name, seed, fingerprint, code_digest, artifacts = cell
+                journal.record(key, config_file, logger_name, seed, fingerprint, code_digest, result, artifacts)
+            report(iteration, approach_index, result)
+            print(f"Finished {APPROACHES[approach_index][0]} for {config_files[iteration]}")
+
+    print(f"Sweep of {len(futures)} cells completed in {time.time() - start_time:.2f} seconds")
+
+    all_results = []
+    for iteration in range(len(config_files)):
+        for approach_index in approaches:
+            all_results.append(build_result_row(
+                iteration, timestamps[iteration], APPROACHES[approach_index][0], results.get((iteration, approach_index))
+            ))
+    return all_results
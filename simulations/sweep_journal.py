@@ -0,0 +1,155 @@
+# simulations/sweep_journal.py
+
+import os
+import json
+import glob
+import hashlib
+import functools
+from utils.results_sink import ResultsSink, iter_chunks, RESULTS_SUFFIX
+
+# Journal file name inside a sweep directory
+JOURNAL_NAME = 'journal'
+
+# Base seed of a sweep run without --seed; fixed so repeated sweeps derive the same
+# cell seeds and reuse the same cached PPO models
+DEFAULT_BASE_SEED = 0
+
+# Directories whose Python sources determine a cell's result
+CODE_DIRS = ['simulations', 'agents', 'environments', 'wrappers', 'utils']
+
+# Column types of the journal entries
+JOURNAL_SCHEMA = {
+    'key': 'object',
+    'config_file': 'object',
+    'approach': 'object',
+    'seed': 'object',
+    'base_seed': 'object',
+    'fingerprint': 'object',
+    'code_hash': 'object',
+    'result': 'object',
+    'artifacts': 'object'
+}
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=None)
+def code_hash(approach):
+    """
+    Hashes the sources that can change an approach's results.
+
+    Covers every module of CODE_DIRS except the other approaches' own modules, so
+    editing approach2.py invalidates approach 2 cells only, while a change to shared
+    code invalidates them all.
+
+    Parameters:
+    - approach (str): Approach module name, e.g. 'approach1'.
+
+    Returns:
+    - digest (str): Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for directory in CODE_DIRS:
+        for path in sorted(glob.glob(os.path.join(_ROOT, directory, '**', '*.py'), recursive=True)):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if directory == 'simulations' and name.startswith('approach') and name != approach:
+                continue
+            digest.update(os.path.relpath(path, _ROOT).encode('utf-8'))
+            with open(path, 'rb') as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+def cell_key(config_file, approach, seed, params):
+    """
+    Identifies a sweep cell by its configuration file, approach, seed and result-changing options.
+
+    Returns:
+    - key (str): Hex SHA-256 digest.
+    """
+    payload = json.dumps({'config_file': config_file, 'approach': approach, 'seed': seed, 'params': params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SweepJournal:
+    """
+    Crash-safe record of the completed cells of a sweep.
+
+    Each finished (config, approach, seed) cell is appended with its summary, the
+    fingerprint of its scenario, the hash of the code that produced it and the paths
+    of its artifacts, and forced to disk (the journal is a ResultsSink file, so a
+    crash loses at most the cell being written). A resumed sweep reuses a cell only
+    if its scenario fingerprint and code hash still match; otherwise the cell is
+    recomputed and its new entry supersedes the old one.
+    """
+
+    def __init__(self, sweep_dir, base_seed=None):
+        """
+        Opens or creates the journal of a sweep directory.
+
+        Parameters:
+        - sweep_dir (str): Sweep directory holding the journal.
+        - base_seed (int): Base seed of the sweep. If None, the seed recorded by a previous
+          run of the sweep is reused, or DEFAULT_BASE_SEED, so a resumed sweep derives
+          the same cell seeds.
+        """
+        self.path = os.path.join(sweep_dir, JOURNAL_NAME + RESULTS_SUFFIX)
+        self.entries = {}
+        recorded_seed = None
+        if os.path.exists(self.path):
+            for chunk in iter_chunks(self.path):
+                for i, key in enumerate(chunk['key']):
+                    self.entries[key] = {column: values[i] for column, values in chunk.items()}
+                    recorded_seed = chunk['base_seed'][i]
+        if base_seed is None:
+            base_seed = recorded_seed if recorded_seed is not None else DEFAULT_BASE_SEED
+        self.base_seed = base_seed
+        self._sink = ResultsSink(self.path, schema=JOURNAL_SCHEMA, batch_size=1, flush_interval=None, fsync=True)
+
+    def lookup(self, key, fingerprint, code_digest):
+        """
+        Returns the stored result of a finished cell, or None if the cell is missing or
+        was produced from a different scenario or code.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry['fingerprint'] != fingerprint or entry['code_hash'] != code_digest:
+            return None
+        return entry['result']
+
+    def record(self, key, config_file, approach, seed, fingerprint, code_digest, result, artifacts=None):
+        """
+        Appends a finished cell and forces it to disk.
+
+        Parameters:
+        - key (str): Cell key from cell_key().
+        - config_file (str): Main configuration file of the cell.
+        - approach (str): Approach name.
+        - seed (int): Seed of the cell.
+        - fingerprint (str): Scenario fingerprint.
+        - code_digest (str): code_hash() of the approach.
+        - result (dict): Runner summary.
+        - artifacts (dict): Paths produced by the cell (results file, log directory, ...).
+        """
+        entry = {
+            'key': key,
+            'config_file': config_file,
+            'approach': approach,
+            'seed': seed,
+            'base_seed': self.base_seed,
+            'fingerprint': fingerprint,
+            'code_hash': code_digest,
+            'result': result,
+            'artifacts': artifacts or {}
+        }
+        self._sink.append(entry)
+        self.entries[key] = entry
+
+    def close(self):
+        self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -0,0 +1,23 @@
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.analytic import solve_manual_attack, solve_privilege_escalation
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_privilege_escalation_batch
+
+def test_exact_solution_tiny():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    manual = solve_manual_attack(scenario)
+    privesc = solve_privilege_escalation(scenario)
+    assert abs(manual['success_probability'] - 1.0) < 1e-12, "Approach 1 should always succeed on tiny.yaml"
+    assert abs(privesc['success_probability'] - 0.84) < 1e-12, "Approach 3 success should be 0.8 + 0.2 * 0.2"
+
+def test_exact_solution_matches_batch_engine():
+    scenario = CompiledScenario(load_yaml_config('config/3.yaml'))
+    exact = solve_privilege_escalation(scenario)['success_probability']
+    outcomes = simulate_privilege_escalation_batch(scenario, 400000, streams=RandomStreams(1))
+    assert abs(outcomes.mean() - exact) < 0.005, f"Monte Carlo {outcomes.mean()} far from exact {exact}"
+
+if __name__ == "__main__":
+    test_exact_solution_tiny()
+    test_exact_solution_matches_batch_engine()
+    print("Analytic solver tests passed.")
@@ -0,0 +1,60 @@
+import logging
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.attack_graph import AttackGraph, INTERNET, plan_attack
+from simulations.analytic import solve_manual_attack, solve_privilege_escalation
+from simulations.batch_engine import simulate_manual_attack_batch, simulate_privilege_escalation_batch
+from simulations.random_streams import RandomStreams
+from simulations.approach1 import Approach1Strategy
+from simulations.approach3 import PrivilegeEscalationStrategy
+from utils.timing import PhaseTimer
+
+def test_tiny_attack_paths():
+    graph = AttackGraph(CompiledScenario(load_yaml_config('config/tiny.yaml')))
+    # (2, 0) denies ssh from (1, 0), so it must be reached through (3, 0) as in the scenario's optimal path
+    paths = graph.attack_paths()
+    assert paths['(2, 0)']['path'] == ['(1, 0)', '(3, 0)', '(2, 0)']
+    assert paths['(3, 0)']['path'] == ['(1, 0)', '(3, 0)']
+    assert graph.reachable_from(INTERNET, 'ssh') == 1 << graph.index['(1, 0)'], "Only subnet 1 is public"
+
+def test_plan_attack_restricts_hosts():
+    scenario = plan_attack(CompiledScenario(load_yaml_config('config/tiny.yaml')))
+    assert scenario.attack_order == ['(1, 0)', '(3, 0)', '(2, 0)']
+    assert list(scenario.host_exploits) == scenario.attack_order
+    # The attacker starts from the internet, not holding the planned hosts
+    assert scenario.initial_hosts == []
+    # Each hop is only attacked from the host before it
+    assert scenario.predecessors == {'(3, 0)': '(1, 0)', '(2, 0)': '(3, 0)'}
+
+def test_unreachable_parent_zeroes_child_success():
+    base = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    # (2, 0) is the only sensitive host here and its parent (3, 0) is never attacked
+    scenario = base.restricted(['(1, 0)', '(2, 0)'], initial_hosts=[], predecessors={'(1, 0)': None, '(2, 0)': '(3, 0)'})
+    ungated = base.restricted(['(1, 0)', '(2, 0)'], initial_hosts=[])
+    logger = logging.getLogger('test_unreachable_parent')
+    logger.disabled = True
+    for strategy_class, solver, simulate in [(Approach1Strategy, solve_manual_attack, simulate_manual_attack_batch),
+                                             (PrivilegeEscalationStrategy, solve_privilege_escalation, simulate_privilege_escalation_batch)]:
+        assert solver(ungated)['success_probability'] > 0
+        assert solver(scenario)['success_probability'] == 0
+        assert not simulate(scenario, 500, streams=RandomStreams(0)).any()
+        strategy = strategy_class()
+        strategy.logger, strategy.timer, strategy.scenario, strategy.streams = logger, PhaseTimer(), scenario, RandomStreams(0)
+        assert not any(strategy.run_once(run) for run in range(1, 101))
+
+def test_planned_success_is_not_trivial():
+    # The sensitive host (2, 0) of config/1.yaml is one of the fixed initial hosts
+    scenario = plan_attack(CompiledScenario(load_yaml_config('config/1.yaml')))
+    for solver, simulate in [(solve_manual_attack, simulate_manual_attack_batch),
+                             (solve_privilege_escalation, simulate_privilege_escalation_batch)]:
+        p = solver(scenario)['success_probability']
+        assert 0.5 < p < 0.75
+        rate = simulate(scenario, 4000, streams=RandomStreams(0)).mean()
+        assert abs(rate - p) < 0.03
+
+if __name__ == "__main__":
+    test_tiny_attack_paths()
+    test_plan_attack_restricts_hosts()
+    test_unreachable_parent_zeroes_child_success()
+    test_planned_success_is_not_trivial()
+    print("Attack graph tests passed.")
@@ -0,0 +1,21 @@
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_manual_attack_batch, simulate_privilege_escalation_batch
+
+def test_manual_attack_batch_tiny():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    outcomes = simulate_manual_attack_batch(scenario, 1000, streams=RandomStreams(0))
+    assert outcomes.shape == (1000,), "One outcome expected per run"
+    assert outcomes.all(), "Sensitive initial host (2, 0) should always be compromised"
+
+def test_privilege_escalation_batch_tiny():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    outcomes = simulate_privilege_escalation_batch(scenario, 200000, streams=RandomStreams(0), chunk_size=30000)
+    # (2, 0) is exploited with p=0.8; otherwise (3, 0) must also fail (p=0.2) for the fallback check to be reached
+    assert abs(outcomes.mean() - 0.84) < 0.005, f"Unexpected success rate {outcomes.mean()}"
+
+if __name__ == "__main__":
+    test_manual_attack_batch_tiny()
+    test_privilege_escalation_batch_tiny()
+    print("Batch engine tests passed.")
@@ -0,0 +1,20 @@
+from benchmarks.suite import compare, format_result
+
+def _entry(results):
+    return {'timestamp': 'now', 'results': {name: {'p50_s': value} for name, value in results.items()}}
+
+def test_compare_flags_regressions():
+    baseline = _entry({'a': 1.0, 'b': 1.0, 'c': 1.0, 'gone': 1.0})
+    current = _entry({'a': 1.05, 'b': 1.5, 'c': 0.5, 'added': 1.0})
+    status = {row['name']: row['status'] for row in compare(baseline, current, threshold=0.1)}
+    assert status == {'a': 'ok', 'b': 'regression', 'c': 'improvement', 'gone': 'missing', 'added': 'new'}
+
+def test_format_result_without_throughput():
+    line = format_result('too fast', {'p50_s': 0.0, 'ops_per_s': None})
+    assert line.endswith('n/a ops/s') and '0.000 ms' in line
+    assert format_result('timed', {'p50_s': 0.5, 'ops_per_s': 2.0}).endswith('2.0 ops/s')
+
+if __name__ == "__main__":
+    test_compare_flags_regressions()
+    test_format_result_without_throughput()
+    print("Benchmark comparison tests passed.")
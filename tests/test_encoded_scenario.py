@@ -0,0 +1,53 @@
+from environments.scenario_generator import generate_scenario
+from simulations.scenario import CompiledScenario, HostRecord
+
+def test_encoding_round_trips_hosts_and_tables():
+    config = generate_scenario(500, seed=3)
+    scenario = CompiledScenario(config)
+    encoded = scenario.encoded
+    assert list(scenario.hosts) == list(config['host_configurations'])
+    for host, host_config in config['host_configurations'].items():
+        record = scenario.host(host)
+        assert record == HostRecord(host_config['os'], host_config['services'], host_config['processes'])
+        host_id = encoded.host_ids[host]
+        for service in encoded.services.names:
+            assert encoded.has_service(host_id, encoded.services.id(service)) == (service in record.services)
+        assert scenario.host_privescs[host] == [
+            (name, pe) for name, pe in scenario.privesc_order
+            if pe['process'] in record.processes and pe['os'] == record.os
+        ]
+        assert bool(encoded.sensitive[host_id]) == scenario.is_sensitive(host)
+
+def test_event_columns_are_dense_and_unique():
+    scenario = CompiledScenario(generate_scenario(300, seed=4))
+    columns = []
+    for host, host_exploits in scenario.host_exploits.items():
+        for service_index, (_, candidates) in enumerate(host_exploits):
+            if not candidates:
+                continue
+            columns += [scenario.exploit_column(host, service_index, position) for position in range(len(candidates))]
+            columns += [scenario.privesc_column(host, service_index, name) for name, _ in scenario.host_privescs[host]]
+    assert sorted(columns) == list(range(scenario.encoded.n_event_columns))
+
+def test_encoding_memory_is_linear_in_hosts():
+    small = CompiledScenario(generate_scenario(1000, seed=5)).encoded.nbytes()
+    large = CompiledScenario(generate_scenario(10000, seed=5)).encoded.nbytes()
+    assert large < 12 * small and large / 10000 < 200, f"{large / 10000:.0f} bytes per host"
+
+def test_privesc_tables_do_not_grow_with_hosts_times_privescs():
+    config = generate_scenario(1000, seed=6)
+    base = CompiledScenario(config).encoded.nbytes()
+    # Escalations no host can use only add their own table rows
+    process = config['processes'][0]
+    config['privilege_escalation'].update({
+        f'pe_unused_{i}': {'process': process, 'os': 'no_such_os', 'prob': 1.0, 'cost': 1, 'access': 'root'}
+        for i in range(256)
+    })
+    assert CompiledScenario(config).encoded.nbytes() - base < 16 * 1024
+
+if __name__ == "__main__":
+    test_encoding_round_trips_hosts_and_tables()
+    test_event_columns_are_dense_and_unique()
+    test_encoding_memory_is_linear_in_hosts()
+    test_privesc_tables_do_not_grow_with_hosts_times_privescs()
+    print("Encoded scenario tests passed.")
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from utils.fingerprint import scenario_fingerprint
+from simulations.scenario import CompiledScenario
+from simulations.analytic import solve_privilege_escalation
+from utils.result_store import ResultStore
+from utils.scenario_cache import parse_yaml_bytes
+from environments.scenario_validator import validate_batch, STAGE_OK
+
+def _tiny():
+    with open('config/tiny.yaml', 'r') as file:
+        return parse_yaml_bytes(file.read())
+
+def _reversed(doc):
+    doc['host_configurations'] = dict(reversed(list(doc['host_configurations'].items())))
+    return doc
+
+def test_equivalent_scenarios_share_a_fingerprint():
+    doc = _tiny()
+    variant = _tiny()
+    # Reversed host and key order, unspaced firewall keys and uppercase names
+    variant['host_configurations'] = dict(reversed(list(variant['host_configurations'].items())))
+    variant['firewall'] = {key.replace(' ', ''): value for key, value in reversed(list(variant['firewall'].items()))}
+    variant['services'] = ['SSH']
+    variant['exploits']['e_ssh']['service'] = 'Ssh'
+    variant['exploits'] = {'renamed': variant['exploits'].pop('e_ssh')}
+    variant = dict(reversed(list(variant.items())))
+    assert scenario_fingerprint(variant) == scenario_fingerprint(doc)
+    # ...but the approaches see the host order and names, so the exact fingerprints differ
+    assert scenario_fingerprint(variant, exact=True) != scenario_fingerprint(doc, exact=True)
+
+    different = _tiny()
+    different['exploits']['e_ssh']['prob'] = 0.5
+    assert scenario_fingerprint(different) != scenario_fingerprint(doc)
+
+def test_exact_fingerprint_tracks_approach_results():
+    with open('config/1.yaml', 'r') as file:
+        text = file.read()
+    doc = parse_yaml_bytes(text)
+    variant = _reversed(parse_yaml_bytes(text))
+    # Reversing the hosts changes approach 3's success probability
+    assert (solve_privilege_escalation(CompiledScenario(doc))['success_probability'] !=
+            solve_privilege_escalation(CompiledScenario(variant))['success_probability'])
+    assert scenario_fingerprint(variant) == scenario_fingerprint(doc)
+    assert scenario_fingerprint(variant, exact=True) != scenario_fingerprint(doc, exact=True)
+
+    # Formatting, comments and section order do not change the exact fingerprint
+    reformatted = parse_yaml_bytes('# comment\n' + text.replace(': ', ':   '))
+    reformatted = dict(reversed(list(reformatted.items())))
+    assert scenario_fingerprint(reformatted, exact=True) == scenario_fingerprint(doc, exact=True)
+
+def test_result_store_answers_equivalent_scenarios():
+    store = ResultStore(tempfile.mkdtemp())
+    fingerprint = scenario_fingerprint(_tiny())
+    assert store.get(fingerprint, 'approach1', {'master_number': 10}) is None
+    store.put(fingerprint, 'approach1', {'master_number': 10}, {'Total Runs': 10})
+    assert store.get(fingerprint, 'approach1', {'master_number': 10}) == {'Total Runs': 10}
+    assert store.get(fingerprint, 'approach1', {'master_number': 20}) is None
+    # Results of other code are not reused
+    store.put(fingerprint, 'approach1', {'master_number': 10}, {'Total Runs': 10}, code_digest='a')
+    assert store.get(fingerprint, 'approach1', {'master_number': 10}, code_digest='a') == {'Total Runs': 10}
+    assert store.get(fingerprint, 'approach1', {'master_number': 10}, code_digest='b') is None
+
+    with open('config/tiny.yaml', 'r') as file:
+        text = file.read()
+    store_dir = tempfile.mkdtemp()
+    first, second = validate_batch([text, text.replace('(1, 0)', '(1,0)')], max_workers=1, store_dir=store_dir)
+    assert first.stage == second.stage == STAGE_OK and first.fingerprint == second.fingerprint
+    assert len(os.listdir(os.path.join(store_dir, 'validation'))) == 1
+
+if __name__ == "__main__":
+    test_equivalent_scenarios_share_a_fingerprint()
+    test_exact_fingerprint_tracks_approach_results()
+    test_result_store_answers_equivalent_scenarios()
+    print("Fingerprint tests passed.")
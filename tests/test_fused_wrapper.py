@@ -0,0 +1,75 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from stable_baselines3.common.monitor import Monitor, load_results
+from environments.environment_loader import build_nasim_env, make_nasim_env, load_vec_environment
+from wrappers.custom_wrappers import (NumpyToIntActionWrapper, StepAPICorrector, FusedMonitorWrapper,
+                                      fused_monitor_supported)
+
+def _trace(env, actions):
+    # NASim draws exploit outcomes from the global generator
+    np.random.seed(0)
+    env.reset(seed=0)
+    steps = []
+    for i, action in enumerate(actions):
+        action = (int(action), np.int64(action), np.array(action))[i % 3]
+        obs, reward, terminated, truncated, info = env.step(action)
+        # Episode entries without their wall-clock time
+        episode = {key: value for key, value in info.get('episode', {}).items() if key != 't'}
+        steps.append((obs.tobytes(), float(reward), terminated, truncated, episode))
+        if terminated or truncated:
+            env.reset()
+    return steps, env.get_episode_rewards(), env.get_episode_lengths(), env.get_total_steps()
+
+def test_fused_wrapper_matches_stack():
+    stacked = Monitor(make_nasim_env('config/tiny.yaml'))
+    fused = make_nasim_env('config/tiny.yaml', fused=True)
+    assert isinstance(fused, Monitor)
+    actions = np.random.default_rng(0).integers(stacked.action_space.n, size=2000)
+    expected = _trace(stacked, actions)
+    assert expected[1], "Expected finished episodes"
+    assert _trace(fused, actions) == expected
+
+def test_installed_sb3_is_the_checked_release():
+    # Upgrading Stable Baselines3 needs test_fused_monitor_output_matches_monitor to pass
+    # against the new Monitor before FUSED_MONITOR_SB3_VERSION is bumped
+    assert fused_monitor_supported()
+    assert isinstance(make_nasim_env('config/tiny.yaml', fused=True), FusedMonitorWrapper)
+
+def test_fused_monitor_output_matches_monitor():
+    directory = tempfile.mkdtemp()
+    actions = np.random.default_rng(1).integers(build_nasim_env('config/tiny.yaml').action_space.n, size=1000)
+    traces = {}
+    for name, env in [
+        ('stacked', Monitor(StepAPICorrector(NumpyToIntActionWrapper(build_nasim_env('config/tiny.yaml'))),
+                            filename=os.path.join(directory, 'stacked', 'run'), info_keywords=('success',))),
+        ('fused', FusedMonitorWrapper(build_nasim_env('config/tiny.yaml'),
+                                      filename=os.path.join(directory, 'fused', 'run'), info_keywords=('success',)))
+    ]:
+        traces[name] = _trace(env, actions)
+        env.close()
+    assert traces['fused'] == traces['stacked']
+    # Same monitor file rows, apart from the wall-clock columns
+    stacked, fused = (load_results(os.path.join(directory, name)).drop(columns=['t', 'index'])
+                      for name in ('stacked', 'fused'))
+    assert len(stacked) > 0
+    pd.testing.assert_frame_equal(fused, stacked)
+
+def test_fused_vec_environment_reports_episodes():
+    vec_env = load_vec_environment('config/tiny.yaml', n_envs=2, seed=0, subprocess=False, fused=True)
+    vec_env.reset()
+    rng = np.random.default_rng(0)
+    episodes = 0
+    for _ in range(500):
+        _, _, dones, infos = vec_env.step(rng.integers(vec_env.action_space.n, size=2))
+        episodes += sum('episode' in info for info, done in zip(infos, dones) if done)
+    vec_env.close()
+    assert episodes > 0
+
+if __name__ == "__main__":
+    test_fused_wrapper_matches_stack()
+    test_installed_sb3_is_the_checked_release()
+    test_fused_monitor_output_matches_monitor()
+    test_fused_vec_environment_reports_episodes()
+    print("Fused wrapper tests passed.")
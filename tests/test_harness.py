@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pytest
+from simulations.harness import AttackStrategy, STRATEGIES, run_strategy
+from simulations.approach1 import run_approach1
+from simulations.approach3 import run_approach3
+
+class AlternatingStrategy(AttackStrategy):
+    """Succeeds on odd runs; fails on runs divisible by 5."""
+    name = 'alternating'
+    label = 'Alternating'
+
+    def run_once(self, run):
+        if run % 5 == 0:
+            raise RuntimeError("boom")
+        return run % 2 == 1
+
+    def run_batch(self, n_runs):
+        return {'success': np.arange(n_runs) % 2 == 0}
+
+def test_approaches_are_registered():
+    assert {'approach1', 'approach3'} <= set(STRATEGIES)
+
+def test_harness_aggregates_custom_strategy(tmp_path):
+    results = run_strategy(AlternatingStrategy(), 10, 'config/tiny.yaml', str(tmp_path), log_options={'quiet': True})
+    # Runs 1, 3, 7 and 9 succeed; runs 5 and 10 raise and count as failures
+    assert results['Total Runs'] == 10 and results['Successful Attacks'] == 4
+    assert 'run' in results['Phase Timings']
+    results = run_strategy(AlternatingStrategy(), 1000, 'config/tiny.yaml', str(tmp_path), batched=True,
+                           stopping={'ci_width': 0.2})
+    assert results['Total Runs'] < 1000 and results['Stopping Decision'] == 'ci_width'
+    # Batched runs report the average time per run of their batch as run latencies
+    timings = results['Phase Timings']
+    assert timings['run']['count'] == results['Total Runs'] and timings['batch']['count'] > 1
+
+def test_strategies_must_implement_both_run_methods():
+    class ScalarOnly(AttackStrategy):
+        def run_once(self, run):
+            return True
+    with pytest.raises(TypeError):
+        ScalarOnly()
+
+def test_scalar_and_batched_runs_agree(tmp_path):
+    config_file = os.path.join(str(tmp_path), 'config.yaml')
+    with open(config_file, 'w') as file:
+        file.write("network_config_file: config/tiny.yaml\n")
+    for runner in (run_approach1, run_approach3):
+        scalar, batched = (runner(master_number=200, config_file=config_file, log_dir=str(tmp_path), seed=3,
+                                  vectorized=vectorized, log_options={'quiet': True}) for vectorized in (False, True))
+        assert scalar['Successful Attacks'] == batched['Successful Attacks'], runner.__name__
+
+if __name__ == "__main__":
+    import tempfile
+    test_approaches_are_registered()
+    test_strategies_must_implement_both_run_methods()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_harness_aggregates_custom_strategy(tmp)
+        test_scalar_and_batched_runs_agree(tmp)
+    print("Harness tests passed.")
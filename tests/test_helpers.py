@@ -0,0 +1,52 @@
+import os
+import tempfile
+from unittest import mock
+from utils.helpers import setup_logger, close_logger, set_log_run
+
+def _read(log_file):
+    with open(log_file) as file:
+        return file.read()
+
+def test_sampling_keeps_one_run_in_n():
+    log_file = os.path.join(tempfile.mkdtemp(), 'sampled.log')
+    logger = setup_logger('test_sampled', log_file, quiet=True, sample_every=3)
+    for run in range(1, 8):
+        set_log_run(run)
+        logger.info(f"run {run}")
+    logger.warning("run 8 warning")
+    set_log_run(None)
+    logger.info("outside")
+    close_logger('test_sampled')
+    lines = _read(log_file)
+    assert [f"run {run}" in lines for run in range(1, 8)] == [True, False, False, True, False, False, True]
+    assert "run 8 warning" in lines and "outside" in lines
+
+def test_rate_limit_drops_records_beyond_budget():
+    log_file = os.path.join(tempfile.mkdtemp(), 'limited.log')
+    with mock.patch('utils.helpers.time.monotonic', return_value=100.0):
+        logger = setup_logger('test_limited', log_file, quiet=True, rate_limit=2)
+        for i in range(5):
+            logger.info(f"info {i}")
+        logger.error("error")
+    close_logger('test_limited')
+    lines = _read(log_file)
+    assert [f"info {i}" in lines for i in range(5)] == [True, True, False, False, False]
+    assert "error" in lines
+
+def test_filters_are_reset_on_every_call():
+    log_file = os.path.join(tempfile.mkdtemp(), 'reset.log')
+    logger = setup_logger('test_reset', log_file, quiet=True, sample_every=2, rate_limit=10)
+    assert len(logger.filters) == 2
+    # Same handlers, new options
+    handlers = list(logger.handlers)
+    logger = setup_logger('test_reset', log_file, quiet=True)
+    assert logger.filters == [] and logger.handlers == handlers
+    logger = setup_logger('test_reset', log_file, quiet=True, sample_every=4)
+    assert [type(f).__name__ for f in logger.filters] == ['RunSamplingFilter'] and logger.filters[0].sample_every == 4
+    close_logger('test_reset')
+
+if __name__ == "__main__":
+    test_sampling_keeps_one_run_in_n()
+    test_rate_limit_drops_records_beyond_budget()
+    test_filters_are_reset_on_every_call()
+    print("Logging helper tests passed.")
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import tempfile
+import yaml
+from environments.llm_generator import FakeBackend, GenerationRecord, generate_corpus, build_messages, write_corpus
+from environments.scenario_validator import validate_scenario_text
+
+def _generate(backend, **kwargs):
+    return asyncio.run(generate_corpus(backend, 40, messages=build_messages(), concurrency=8, max_workers=1,
+                                       backoff=0.01, seed=0, **kwargs))
+
+def test_generation_is_concurrent_and_deterministic():
+    backend = FakeBackend(seed=3, latency=(0.01, 0.03), failure_rate=0.2, invalid_rate=0.3)
+    records = _generate(backend)
+    assert [record.index for record in records] == list(range(40))
+    assert 1 < backend.max_in_flight <= 8
+    assert backend.requests > 40, "Failed requests should have been retried"
+    valid = [record.validation.valid for record in records]
+    assert 0 < sum(valid) < 40
+    # Invalid answers are rejected by the validator with a reason
+    assert all(record.validation.errors for record in records if not record.validation.valid)
+
+    again = _generate(FakeBackend(seed=3, latency=(0.01, 0.03), failure_rate=0.2, invalid_rate=0.3))
+    assert [record.text for record in again] == [record.text for record in records]
+
+def test_token_budget_stops_generation():
+    records = _generate(FakeBackend(seed=1, latency=(0.01, 0.01), failure_rate=0.0), token_budget=1,
+                        validate=False)
+    generated = [record for record in records if record.text is not None]
+    assert len(generated) <= 8, "Only the first wave of requests may start before the budget is spent"
+    assert all(record.error == 'token budget exhausted' for record in records if record.text is None)
+
+def test_corpus_keeps_reordered_scenarios():
+    with open('config/tiny.yaml') as file:
+        text = file.read()
+    doc = yaml.safe_load(text)
+    doc['host_configurations'] = dict(reversed(list(doc['host_configurations'].items())))
+    texts = [text, '# same scenario\n' + text, yaml.safe_dump(doc, sort_keys=False)]
+    records = [GenerationRecord(i, t, validate_scenario_text(t, build_env=False), 1, 0, 0, 0.0, None)
+               for i, t in enumerate(texts)]
+    # All three share the loose validation fingerprint; only the comment-only copy is a duplicate
+    assert len({record.validation.fingerprint for record in records}) == 1
+    output_dir = tempfile.mkdtemp()
+    assert write_corpus(records, output_dir) == 2
+    written = sorted(name[:6] for name in os.listdir(output_dir) if name.endswith('.yaml'))
+    assert written == ['000000', '000002']
+
+if __name__ == "__main__":
+    test_generation_is_concurrent_and_deterministic()
+    test_token_budget_stops_generation()
+    test_corpus_keeps_reordered_scenarios()
+    print("LLM generator tests passed.")
@@ -0,0 +1,34 @@
+import os
+import sys
+import subprocess
+import numpy as np
+from stable_baselines3 import PPO
+from environments.environment_loader import make_nasim_env, build_nasim_env
+from agents.numpy_policy import NumpyPolicy, export_policy, evaluate_numpy_policy
+
+def test_exported_policy_matches_greedy_predict(tmp_path):
+    env = make_nasim_env('config/tiny.yaml')
+    model = PPO('MlpPolicy', env, seed=0, device='cpu')
+    path = os.path.join(str(tmp_path), 'policy.npz')
+    export_policy(model).save(path)
+    policy = NumpyPolicy.load(path)
+    observations = np.stack([env.observation_space.sample() for _ in range(500)])
+    expected, _ = model.predict(observations, deterministic=True)
+    actions, _ = policy.predict(observations)
+    assert np.array_equal(actions, expected)
+    action, _ = policy.predict(observations[0])
+    assert action.shape == () and action == model.predict(observations[0], deterministic=True)[0]
+    episodes = evaluate_numpy_policy(policy, build_nasim_env('config/tiny.yaml'), 2)
+    assert len(episodes['success']) == 2 and (episodes['length'] > 0).all()
+
+def test_numpy_evaluation_imports_no_torch():
+    code = ("import sys, agents.numpy_policy, agents.ppo_agent, simulations.approach0; "
+            "sys.exit('torch' in sys.modules)")
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True).returncode == 0
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_exported_policy_matches_greedy_predict(tmp)
+    test_numpy_evaluation_imports_no_torch()
+    print("NumPy policy tests passed.")
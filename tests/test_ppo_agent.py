@@ -0,0 +1,66 @@
+import os
+import tempfile
+from stable_baselines3 import PPO
+from environments.environment_loader import make_nasim_env
+from agents.model_cache import model_cache_key
+from agents.ppo_agent import StablePPOAgent
+
+def _agent(directory, step_limit, n_eval_episodes=5):
+    """Agent with an untrained (random) policy on tiny.yaml with the given step limit."""
+    with open('config/tiny.yaml') as file:
+        scenario = file.read().replace('step_limit: 1000', f'step_limit: {step_limit}')
+    scenario_file = os.path.join(directory, f'tiny_{step_limit}.yaml')
+    with open(scenario_file, 'w') as file:
+        file.write(scenario)
+    config_file = os.path.join(directory, f'config_{step_limit}.yaml')
+    with open(config_file, 'w') as file:
+        file.write(f'network_config_file: {scenario_file}\n')
+    agent = StablePPOAgent(config_file, directory, total_timesteps=0, n_eval_episodes=n_eval_episodes, seed=0)
+    agent.model = PPO('MlpPolicy', make_nasim_env(scenario_file), seed=0, device='cpu')
+    return agent
+
+def test_evaluate_counts_terminated_episodes_as_successes():
+    directory = tempfile.mkdtemp()
+    # A random policy reaches the sensitive hosts of tiny.yaml well within 1000 steps
+    agent = _agent(directory, 1000)
+    assert agent.evaluate() == [True] * 5
+    agent.close()
+    # Episodes cut by the step limit fail, whatever their last reward
+    agent = _agent(directory, 3)
+    assert agent.evaluate() == [False] * 5
+    agent.close()
+
+def test_evaluate_batch_spreads_episodes_and_matches_criterion():
+    directory = tempfile.mkdtemp()
+    agent = _agent(directory, 1000)
+    episodes = agent.evaluate_batch(7, n_envs=3)
+    assert len(episodes['success']) == len(episodes['return']) == len(episodes['length']) == 7
+    assert episodes['success'].all() and (episodes['length'] < 1000).all()
+    # The vector is kept across calls and rebuilt for another size
+    vec_env = agent._eval_vec_env
+    agent.evaluate_batch(3, n_envs=3)
+    assert agent._eval_vec_env is vec_env
+    agent.close()
+    # Truncated episodes (TimeLimit.truncated) are failures
+    agent = _agent(directory, 3)
+    episodes = agent.evaluate_batch(4, n_envs=2)
+    assert not episodes['success'].any() and (episodes['length'] == 3).all()
+    agent.close()
+
+def test_cache_key_follows_the_training_split():
+    keys = {}
+    for n_envs in (1, 3, 4, 64):
+        agent = StablePPOAgent('config/config1.yaml', tempfile.mkdtemp(), total_timesteps=1000,
+                               n_eval_episodes=1, seed=0, n_envs=n_envs)
+        keys[n_envs] = model_cache_key(agent.scenario_file, agent.hyperparameters(), agent.seed)
+    # Rollouts of 2048, 2046, 2048 and 4096 transitions, each split differently
+    assert len(set(keys.values())) == 4
+    again = StablePPOAgent('config/config1.yaml', tempfile.mkdtemp(), total_timesteps=1000,
+                           n_eval_episodes=1, seed=0, n_envs=3)
+    assert model_cache_key(again.scenario_file, again.hyperparameters(), again.seed) == keys[3]
+
+if __name__ == "__main__":
+    test_evaluate_counts_terminated_episodes_as_successes()
+    test_evaluate_batch_spreads_episodes_and_matches_criterion()
+    test_cache_key_follows_the_training_split()
+    print("PPO agent tests passed.")
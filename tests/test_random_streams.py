@@ -0,0 +1,43 @@
+import numpy as np
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_manual_attack_batch, simulate_privilege_escalation_batch
+from simulations.sweep import cell_seed
+
+def test_scalar_and_array_draws_agree():
+    streams = RandomStreams(7)
+    run_keys = streams.run_keys(np.arange(5, dtype=np.uint64))
+    for column in range(3):
+        draws = streams.column(run_keys, column)
+        assert all(streams.uniform(run, column) == draws[run] for run in range(5))
+    uniforms = streams.column(streams.run_keys(np.arange(100000, dtype=np.uint64)), 0)
+    assert 0 <= uniforms.min() and uniforms.max() < 1 and abs(uniforms.mean() - 0.5) < 0.01
+
+def test_outcomes_do_not_depend_on_batching():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    whole = simulate_privilege_escalation_batch(scenario, 1000, streams=RandomStreams(3))
+    streams = RandomStreams(3)
+    split = np.concatenate([
+        simulate_privilege_escalation_batch(scenario, 400, streams=streams, chunk_size=128),
+        simulate_privilege_escalation_batch(scenario, 600, streams=streams)
+    ])
+    assert (whole == split).all(), "Run outcomes should only depend on the seed and the run index"
+
+def test_common_random_numbers_pair_runs():
+    config = load_yaml_config('config/tiny.yaml')
+    scenario = CompiledScenario(config)
+    config['exploits']['e_ssh']['prob'] = 0.7
+    variant = CompiledScenario(config)
+    # With common random numbers only the runs drawing between 0.7 and 0.8 can change
+    baseline = simulate_privilege_escalation_batch(scenario, 20000, streams=RandomStreams(5))
+    paired = simulate_privilege_escalation_batch(variant, 20000, streams=RandomStreams(5))
+    independent = simulate_privilege_escalation_batch(variant, 20000, streams=RandomStreams(6))
+    assert (baseline != paired).mean() < (baseline != independent).mean() / 2, "Common seeds should pair the runs"
+    assert cell_seed(1, 2, 0, True) == cell_seed(1, 2, 3, True) != cell_seed(1, 2, 3)
+
+if __name__ == "__main__":
+    test_scalar_and_array_draws_agree()
+    test_outcomes_do_not_depend_on_batching()
+    test_common_random_numbers_pair_runs()
+    print("Random stream tests passed.")
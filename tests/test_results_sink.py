@@ -0,0 +1,54 @@
+import os
+import tempfile
+import numpy as np
+from utils.results_sink import ResultsSink, RUN_RECORD_SCHEMA, read_results, export_results, iter_chunks
+
+def test_round_trip_and_export():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'approach1')
+    with ResultsSink(path, metadata={'approach': 'approach1'}, schema=RUN_RECORD_SCHEMA, batch_size=3) as sink:
+        for run in range(1, 8):
+            sink.append({'run': run, 'success': run % 2 == 0, 'elapsed_s': run / 1000})
+        sink.append({'run': 8, 'success': False, 'elapsed_s': 0.008, 'error': 'boom'})
+        sink.append_columns({'run': np.arange(9, 11), 'success': np.array([True, False])})
+    df = read_results(directory)
+    assert list(df['run']) == list(range(1, 11)), "Records should come back in write order"
+    assert (df['approach'] == 'approach1').all(), "Metadata should be broadcast to every record"
+    assert df['error'].iloc[7] == 'boom'
+    exported = export_results(directory, os.path.join(directory, 'runs.csv'))
+    assert len(exported) == 10 and os.path.exists(os.path.join(directory, 'runs.csv'))
+
+def test_truncated_tail_is_dropped():
+    path = os.path.join(tempfile.mkdtemp(), 'runs')
+    with ResultsSink(path, batch_size=2) as sink:
+        for run in range(4):
+            sink.append({'run': run})
+    # Simulate a crash in the middle of writing a chunk
+    with open(sink.path, 'ab') as file:
+        file.write(b'\x10\x00\x00\x00partial')
+    assert list(read_results(path)['run']) == [0, 1, 2, 3]
+    with ResultsSink(path) as sink:
+        sink.append({'run': 4})
+    assert list(read_results(path)['run']) == [0, 1, 2, 3, 4], "Appending after a crash should stay readable"
+
+def test_chunks_are_stored_column_by_column():
+    path = os.path.join(tempfile.mkdtemp(), 'runs')
+    with ResultsSink(path, metadata={'approach': 'approach3'}, schema=RUN_RECORD_SCHEMA) as sink:
+        sink.append({'run': 1, 'success': True, 'elapsed_s': 0.5, 'error': None})
+        sink.append({'run': 2, 'success': False, 'elapsed_s': 0.25, 'error': 'boom'})
+        sink.append({'run': 3, 'success': False, 'extra': {'nested': [1, 2]}})
+    with open(sink.path, 'rb') as file:
+        assert b'NUMPY' in file.read(), "Typed columns should be written as .npy arrays"
+    (chunk,) = iter_chunks(sink.path)
+    assert chunk['run'].dtype == np.int64 and list(chunk['run']) == [1, 2, 3]
+    assert chunk['success'].dtype == np.bool_
+    assert chunk['error'] == [None, 'boom', None]
+    # A missing value in a float column is NaN; in other columns the values are kept as they are
+    assert np.isnan(chunk['elapsed_s'][2]) and chunk['extra'] == [None, None, {'nested': [1, 2]}]
+    assert chunk['approach'] == ['approach3'] * 3
+
+if __name__ == "__main__":
+    test_round_trip_and_export()
+    test_truncated_tail_is_dropped()
+    test_chunks_are_stored_column_by_column()
+    print("Results sink tests passed.")
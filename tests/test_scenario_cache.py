@@ -0,0 +1,35 @@
+import os
+import tempfile
+import yaml
+from utils.scenario_cache import load_cached_yaml, clear_memory_cache
+
+def test_cached_load_matches_yaml():
+    cache_dir = tempfile.mkdtemp()
+    clear_memory_cache()
+    with open('config/tiny.yaml') as file:
+        expected = yaml.safe_load(file)
+
+    first = load_cached_yaml('config/tiny.yaml', cache_dir=cache_dir)
+    assert first == expected, "Cached parse should match PyYAML"
+    entries = os.listdir(cache_dir)
+    assert len(entries) == 1 and entries[0].endswith('.json'), "One JSON entry expected on disk"
+
+    # Results are copies, so mutating one must not leak into later loads
+    first['host_configurations'].clear()
+    clear_memory_cache()
+    second = load_cached_yaml('config/tiny.yaml', cache_dir=cache_dir)
+    assert second == expected, "Disk cache should return the original scenario"
+
+def test_shared_cache_dir_is_not_trusted():
+    cache_dir = tempfile.mkdtemp()
+    os.chmod(cache_dir, 0o777)
+    clear_memory_cache()
+    with open('config/tiny.yaml') as file:
+        expected = yaml.safe_load(file)
+    assert load_cached_yaml('config/tiny.yaml', cache_dir=cache_dir) == expected
+    assert os.listdir(cache_dir) == [], "A world-writable cache directory must not be used"
+
+if __name__ == "__main__":
+    test_cached_load_matches_yaml()
+    test_shared_cache_dir_is_not_trusted()
+    print("Scenario cache test passed.")
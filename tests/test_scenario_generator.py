@@ -0,0 +1,26 @@
+import os
+import tempfile
+from environments.scenario_generator import generate_scenario, write_scenario
+from environments.environment_loader import CachedScenarioLoader
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.attack_graph import AttackGraph
+
+def test_generated_scenario_is_valid_and_reachable():
+    directory = tempfile.mkdtemp()
+    scenario_file = os.path.join(directory, 'generated.yaml')
+    write_scenario(generate_scenario(200, seed=7, n_sensitive=3, host_firewall_rate=0.1), scenario_file)
+    # NASim's own validation must accept the scenario
+    scenario = CachedScenarioLoader().load(scenario_file)
+    assert len(scenario.hosts) == 200
+    paths = AttackGraph(CompiledScenario(load_yaml_config(scenario_file))).attack_paths()
+    assert len(paths) == 3 and all(paths.values()), "Every sensitive host should be reachable"
+
+def test_generator_is_seeded():
+    assert generate_scenario(300, seed=1) == generate_scenario(300, seed=1)
+    assert generate_scenario(300, seed=1) != generate_scenario(300, seed=2)
+
+if __name__ == "__main__":
+    test_generated_scenario_is_valid_and_reachable()
+    test_generator_is_seeded()
+    print("Scenario generator tests passed.")
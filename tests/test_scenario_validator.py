@@ -0,0 +1,48 @@
+import time
+from environments.scenario_validator import (validate_scenario_text, validate_batch, check_structure,
+                                             summarize, STAGE_OK, STAGE_PARSE, STAGE_STRUCTURE, STAGE_NASIM)
+from utils.scenario_cache import parse_yaml_bytes
+
+def _tiny():
+    with open('config/tiny.yaml', 'r') as file:
+        return file.read()
+
+def test_structural_errors_are_reported():
+    doc = parse_yaml_bytes(_tiny())
+    doc['subnets'] = [1, 1, 2]
+    doc['topology'] = doc['topology'][:3]
+    doc['firewall'].pop('(1, 2)')
+    codes = {issue.code for issue in check_structure(doc)}
+    assert {'topology_shape', 'host_count'} <= codes, codes
+
+    doc = parse_yaml_bytes(_tiny())
+    doc['firewall'].pop('(1, 2)')
+    doc['sensitive_hosts']["__import__('os')"] = 100
+    codes = {issue.code for issue in check_structure(doc)}
+    assert codes == {'missing_firewall', 'bad_address'}, codes
+
+def test_validate_stages():
+    tiny = _tiny()
+    assert validate_scenario_text(tiny).stage == STAGE_OK
+    assert validate_scenario_text("Here it is:\n```yaml\n" + tiny + "```\n").valid
+    assert validate_scenario_text("subnets: [1,\n  - x").stage == STAGE_PARSE
+    assert validate_scenario_text(tiny.replace('services: [ssh]', 'services: [http]', 1)).stage == STAGE_STRUCTURE
+    # Passes the structural checks but NASim rejects it (non-numeric host value)
+    text = tiny.replace("(2, 0):\n    os: linux\n", "(2, 0):\n    os: linux\n    value: high\n")
+    assert validate_scenario_text(text).stage == STAGE_NASIM
+
+def test_validate_batch_keeps_order():
+    tiny = _tiny()
+    texts = [tiny if i % 3 else tiny.replace('subnets: [1, 1, 1]', 'subnets: [1, 1]') for i in range(60)]
+    start = time.perf_counter()
+    results = validate_batch(texts, max_workers=2, timeout=5)
+    elapsed = time.perf_counter() - start
+    assert [result.valid for result in results] == [bool(i % 3) for i in range(60)]
+    assert summarize(results)['valid'] == 40
+    print(f"Validated {len(texts)} candidates in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_structural_errors_are_reported()
+    test_validate_stages()
+    test_validate_batch_keeps_order()
+    print("Scenario validator tests passed.")
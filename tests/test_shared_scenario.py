@@ -0,0 +1,50 @@
+import os
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from environments.scenario_generator import generate_scenario, write_scenario
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.shared_scenario import publish_scenario, attach_scenario, load_compiled_scenario
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_privilege_escalation_batch
+
+def _scenario_file():
+    directory = tempfile.mkdtemp()
+    scenario_file = os.path.join(directory, 'generated.yaml')
+    write_scenario(generate_scenario(400, seed=11, host_firewall_rate=0.1), scenario_file)
+    return directory, scenario_file
+
+def _attached_outcomes(scenario_file, cache_dir):
+    scenario = load_compiled_scenario(scenario_file, cache_dir)
+    return simulate_privilege_escalation_batch(scenario, 500, streams=RandomStreams(1)).tolist()
+
+def test_attached_scenario_matches_compiled():
+    directory, scenario_file = _scenario_file()
+    cache_dir = os.path.join(directory, 'cache')
+    published = publish_scenario(scenario_file, cache_dir)
+    assert publish_scenario(scenario_file, cache_dir) == published, "A published scenario is reused"
+    attached = attach_scenario(published)
+    compiled = CompiledScenario(load_yaml_config(scenario_file))
+    for name, array in compiled.encoded.arrays().items():
+        shared = attached.encoded.arrays()[name]
+        assert not shared.flags.writeable and np.array_equal(shared, array), name
+    assert dict(attached.hosts) == dict(compiled.hosts)
+    assert attached.host_firewalls == compiled.host_firewalls
+    assert dict(attached.host_privescs) == dict(compiled.host_privescs)
+
+def test_workers_attach_the_same_publication():
+    directory, scenario_file = _scenario_file()
+    cache_dir = os.path.join(directory, 'cache')
+    publish_scenario(scenario_file, cache_dir)
+    expected = simulate_privilege_escalation_batch(
+        CompiledScenario(load_yaml_config(scenario_file)), 500, streams=RandomStreams(1)
+    ).tolist()
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(_attached_outcomes, [scenario_file] * 2, [cache_dir] * 2))
+    assert results == [expected, expected]
+
+if __name__ == "__main__":
+    test_attached_scenario_matches_compiled()
+    test_workers_attach_the_same_publication()
+    print("Shared scenario tests passed.")
@@ -0,0 +1,38 @@
+from utils.helpers import load_yaml_config
+from simulations.scenario import CompiledScenario
+from simulations.random_streams import RandomStreams
+from simulations.batch_engine import simulate_manual_attack_batch, simulate_privilege_escalation_batch
+from simulations.stopping import (SequentialStopper, wilson_interval, simulate_until_stopped, DECISION_CI_WIDTH,
+                                  DECISION_ACCEPT_H1, DECISION_MAX_RUNS)
+
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert abs(low - 0.4038) < 1e-3 and abs(high - 0.5962) < 1e-3, f"Unexpected interval ({low}, {high})"
+    low, high = wilson_interval(20, 20)
+    assert high == 1.0 and 0.8 < low < 0.9, "All successes should give a one-sided interval below 1"
+
+def test_ci_width_stops_easy_scenario_early():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    streams = RandomStreams(0)
+    stopper = SequentialStopper(100000, ci_width=0.05)
+    outcomes = simulate_until_stopped(lambda n: simulate_manual_attack_batch(scenario, n, streams=streams), 100000, stopper)
+    # Every run succeeds, so a few hundred runs pin the rate down
+    assert stopper.decision == DECISION_CI_WIDTH
+    assert len(outcomes) == stopper.n < 1000, f"Expected an early stop, got {len(outcomes)} runs"
+
+def test_sprt_decides_and_max_runs_caps():
+    scenario = CompiledScenario(load_yaml_config('config/tiny.yaml'))
+    streams = RandomStreams(0)
+    # True rate is 0.84
+    stopper = SequentialStopper(100000, sprt=(0.5, 0.8))
+    simulate_until_stopped(lambda n: simulate_privilege_escalation_batch(scenario, n, streams=streams), 100000, stopper)
+    assert stopper.decision == DECISION_ACCEPT_H1
+    stopper = SequentialStopper(50, ci_width=0.001)
+    outcomes = simulate_until_stopped(lambda n: simulate_privilege_escalation_batch(scenario, n, streams=streams), 50, stopper)
+    assert stopper.decision == DECISION_MAX_RUNS and len(outcomes) == 50
+
+if __name__ == "__main__":
+    test_wilson_interval()
+    test_ci_width_stops_easy_scenario_early()
+    test_sprt_decides_and_max_runs_caps()
+    print("Stopping tests passed.")
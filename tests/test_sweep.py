@@ -0,0 +1,50 @@
+import os
+import tempfile
+from simulations.sweep import APPROACHES, run_parallel_sweep, cell_seed, run_memoized
+from simulations.approach3 import run_approach3
+
+def _config(directory):
+    config_file = os.path.join(directory, 'config.yaml')
+    with open(config_file, 'w') as file:
+        file.write('network_config_file: config/tiny.yaml\n')
+    return config_file
+
+def test_parallel_sweep_matches_sequential_cells():
+    directory = tempfile.mkdtemp()
+    config_file = _config(directory)
+    scripted = [i for i, approach in enumerate(APPROACHES) if approach[3]]
+    rows = run_parallel_sweep([config_file, config_file], main_log_dir=os.path.join(directory, 'logs'), master_number=50,
+                              max_workers=2, base_seed=0, options={'log_options': {'quiet': True}},
+                              approaches=scripted)
+    # One row per (config, approach), ordered by iteration then approach
+    assert [(row['Iteration'], row['Approach']) for row in rows] == \
+        [(i, APPROACHES[a][0]) for i in range(2) for a in scripted]
+    assert all(row['Total Runs'] == 50 for row in rows)
+    # A cell gives the same result as its runner called with the cell seed in this process
+    expected = run_approach3(master_number=50, config_file=config_file, log_dir=os.path.join(directory, 'direct'),
+                             seed=cell_seed(0, 1, 3), log_options={'quiet': True})
+    assert rows[-1]['Successful Attacks'] == expected['Successful Attacks']
+
+def test_memoized_results_are_keyed_on_seed_and_run_count():
+    directory = tempfile.mkdtemp()
+    config_file = _config(directory)
+    store_dir = os.path.join(directory, 'store')
+    calls = []
+
+    def runner(**kwargs):
+        calls.append(kwargs)
+        return {'Total Runs': kwargs['master_number'], 'Successful Attacks': kwargs['seed']}
+
+    first = run_memoized(runner, 'approach1', store_dir, config_file=config_file, master_number=10, seed=1)
+    assert run_memoized(runner, 'approach1', store_dir, config_file=config_file, master_number=10, seed=1) == first
+    assert len(calls) == 1
+    assert run_memoized(runner, 'approach1', store_dir, config_file=config_file, master_number=10, seed=2) != first
+    run_memoized(runner, 'approach1', store_dir, config_file=config_file, master_number=20, seed=1)
+    assert len(calls) == 3
+    entries = os.listdir(os.path.join(store_dir, 'approach1'))
+    assert len(entries) == 3 and all(name.endswith('.json') for name in entries)
+
+if __name__ == "__main__":
+    test_parallel_sweep_matches_sequential_cells()
+    test_memoized_results_are_keyed_on_seed_and_run_count()
+    print("Sweep tests passed.")
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+from simulations.sweep import run_journaled
+from simulations.sweep_journal import SweepJournal
+
+calls = []
+
+def _runner(master_number, config_file, log_dir, seed):
+    calls.append(config_file)
+    return {'Total Runs': master_number, 'Successful Attacks': len(calls)}
+
+def _config(directory):
+    scenario_file = os.path.join(directory, 'tiny.yaml')
+    shutil.copy('config/tiny.yaml', scenario_file)
+    config_file = os.path.join(directory, 'config.yaml')
+    with open(config_file, 'w') as file:
+        file.write(f'network_config_file: {scenario_file}\n')
+    return config_file, scenario_file
+
+def test_resume_skips_finished_and_invalidated_cells():
+    directory = tempfile.mkdtemp()
+    config_file, scenario_file = _config(directory)
+    kwargs = {'master_number': 10, 'config_file': config_file, 'log_dir': directory, 'seed': 1}
+
+    with SweepJournal(directory) as journal:
+        first = run_journaled(_runner, 'approach1', journal, **kwargs)
+        base_seed = journal.base_seed
+    # A new process resuming the sweep reuses the finished cell and the base seed
+    with SweepJournal(directory) as journal:
+        assert journal.base_seed == base_seed
+        assert run_journaled(_runner, 'approach1', journal, **kwargs) == first
+        assert len(calls) == 1
+        # Another seed is another cell
+        run_journaled(_runner, 'approach1', journal, **dict(kwargs, seed=2))
+        assert len(calls) == 2
+
+    # Changing the scenario invalidates the cell
+    with open(scenario_file, 'a') as file:
+        file.write('step_limit: 50\n')
+    with SweepJournal(directory) as journal:
+        assert run_journaled(_runner, 'approach1', journal, **kwargs) != first
+        assert len(calls) == 3
+
+if __name__ == "__main__":
+    test_resume_skips_finished_and_invalidated_cells()
+    print("Sweep journal tests passed.")
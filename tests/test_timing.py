@@ -0,0 +1,28 @@
+import numpy as np
+from utils.timing import LatencyHistogram, PhaseTimer
+
+def test_histogram_percentiles():
+    samples = np.random.default_rng(0).lognormal(mean=10, sigma=1.5, size=20000).astype(int)
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(int(value))
+    assert histogram.count == len(samples)
+    assert histogram.max == samples.max(), "Maximum should be exact"
+    for q in (50, 90, 99):
+        exact = np.percentile(samples, q, method='inverted_cdf')
+        assert exact <= histogram.percentile(q) <= exact * 1.04, f"p{q} outside the bucket error bound"
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.phase('scan'):
+        sum(range(1000))
+    start_ns = timer.now()
+    timer.since('exploit', start_ns)
+    summary = timer.summary()
+    assert set(summary) == {'scan', 'exploit'}
+    assert summary['scan']['count'] == 1 and summary['scan']['p50'] == summary['scan']['max']
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_phase_timer()
+    print("Timing tests passed.")
@@ -0,0 +1,146 @@
+# utils/fingerprint.py
+
+import json
+import hashlib
+from simulations.scenario import parse_address
+from utils.helpers import load_yaml_config
+
+# Bumped whenever the canonical form changes, so old fingerprints stop matching
+FINGERPRINT_VERSION = 1
+
+SCAN_COSTS = ['service_scan_cost', 'os_scan_cost', 'subnet_scan_cost', 'process_scan_cost']
+
+# Sections whose entry order the simulations depend on; kept as ordered pairs in the exact form
+ORDERED_SECTIONS = ['host_configurations', 'exploits', 'privilege_escalation', 'sensitive_hosts']
+
+
+def _name(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+
+def _names(values):
+    return sorted(set(_name(value) for value in values or []))
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def _address(key):
+    return str(tuple(parse_address(key)))
+
+
+def _actions(actions, target):
+    """
+    Returns the actions of a section as [target, os, prob, cost, access] entries.
+
+    Names are dropped. Entries are sorted by (target, os), keeping the YAML order of
+    actions sharing a key, since the scripted approaches use the first one.
+    """
+    entries = [
+        [_name(action.get(target)), _name(action.get('os')), _number(action.get('prob')),
+         _number(action.get('cost')), _name(action.get('access'))]
+        for action in actions.values()
+    ]
+    return sorted(entries, key=lambda entry: (str(entry[0]), str(entry[1])))
+
+
+def canonical_scenario(network_config):
+    """
+    Returns a loose normal form of a parsed scenario in which equivalent scenarios are equal.
+
+    Host configurations are sorted by address, firewall and host keys are rewritten
+    as '(subnet, host)', names are lowercased, lists of names become sorted sets,
+    numbers become floats, exploit and privilege escalation names are dropped, and
+    empty host firewall rules are removed. Key order, whitespace, comments and host
+    ordering of the YAML therefore do not matter. NASim accepts or rejects such
+    variants alike, so this form suits validation; the scripted approaches depend on
+    host and name order and case, so their results are keyed on exact_scenario().
+
+    Parameters:
+    - network_config (dict): Parsed NASim scenario configuration.
+
+    Returns:
+    - canonical (dict): JSON-serializable canonical form.
+    """
+    hosts = {}
+    for key, config in network_config.get('host_configurations', {}).items():
+        host = {
+            'os': _name(config.get('os')),
+            'services': _names(config.get('services')),
+            'processes': _names(config.get('processes')),
+            'firewall': {
+                _address(source): _names(denied)
+                for source, denied in (config.get('firewall') or {}).items() if denied
+            }
+        }
+        if 'value' in config:
+            host['value'] = _number(config['value'])
+        hosts[_address(key)] = host
+
+    canonical = {
+        'version': FINGERPRINT_VERSION,
+        'subnets': list(network_config.get('subnets', [])),
+        'topology': [list(row) for row in network_config.get('topology', [])],
+        'os': _names(network_config.get('os')),
+        'services': _names(network_config.get('services')),
+        'processes': _names(network_config.get('processes')),
+        'exploits': _actions(network_config.get('exploits', {}), 'service'),
+        'privilege_escalation': _actions(network_config.get('privilege_escalation', {}), 'process'),
+        'sensitive_hosts': {
+            _address(key): _number(value) for key, value in network_config.get('sensitive_hosts', {}).items()
+        },
+        'host_configurations': hosts,
+        'firewall': {_address(key): _names(allowed) for key, allowed in network_config.get('firewall', {}).items()},
+        'step_limit': network_config.get('step_limit')
+    }
+    for key in SCAN_COSTS:
+        canonical[key] = _number(network_config.get(key))
+    return canonical
+
+
+def exact_scenario(network_config):
+    """
+    Returns a normal form of a parsed scenario that keeps everything a simulation sees.
+
+    Only YAML formatting, comments and the order of mapping keys nothing iterates
+    (sections, the fields of a host or an action, firewall links) are dropped. Host,
+    action and sensitive host order, names, case, address spelling and list order and
+    duplicates are kept, since approaches 0-3 depend on them.
+
+    Parameters:
+    - network_config (dict): Parsed NASim scenario configuration.
+
+    Returns:
+    - canonical (dict): JSON-serializable exact form.
+    """
+    canonical = dict(network_config)
+    for key in ORDERED_SECTIONS:
+        if key in canonical:
+            canonical[key] = [[name, value] for name, value in (canonical[key] or {}).items()]
+    canonical['version'] = FINGERPRINT_VERSION
+    canonical['exact'] = True
+    return canonical
+
+
+def scenario_fingerprint(network_config, exact=False):
+    """
+    Hashes the canonical form of a parsed scenario.
+
+    Parameters:
+    - network_config (dict): Parsed NASim scenario configuration.
+    - exact (bool): Hash the exact form (see exact_scenario) instead of the loose one.
+
+    Returns:
+    - fingerprint (str): Hex SHA-256 digest, equal for equivalent scenarios.
+    """
+    canonical = exact_scenario(network_config) if exact else canonical_scenario(network_config)
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def scenario_file_fingerprint(scenario_file, exact=False):
+    """
+    Returns the fingerprint of a NASim scenario file.
+    """
+    return scenario_fingerprint(load_yaml_config(scenario_file), exact=exact)
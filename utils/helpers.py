@@ -1,22 +1,32 @@
 # utils/helpers.py
 
+import os
+import time
 import yaml
+import queue
+import atexit
 import logging
+import contextvars
 from logging import handlers
+from utils.scenario_cache import load_cached_yaml
 
-def load_yaml_config(config_file):
+def load_yaml_config(config_file, use_cache=True):
     """
     Loads a YAML configuration file.
 
     Parameters:
     - config_file (str): Path to the YAML file.
+    - use_cache (bool): Serve repeated loads from the parsed-scenario cache.
 
     Returns:
     - config (dict): Parsed YAML configuration.
     """
     try:
-        with open(config_file, 'r') as file:
-            config = yaml.safe_load(file)
+        if use_cache:
+            config = load_cached_yaml(config_file)
+        else:
+            with open(config_file, 'r') as file:
+                config = yaml.safe_load(file)
         if not isinstance(config, dict):
             raise ValueError("Loaded YAML content is not a dictionary.")
         return config
@@ -24,14 +34,125 @@ def load_yaml_config(config_file):
         logging.error(f"Error loading YAML configuration from {config_file}: {e}")
         raise
 
-def setup_logger(name, log_file, level=logging.INFO):
+class RunSamplingFilter(logging.Filter):
+    """
+    Keeps the records of one run in every sample_every runs.
+
+    The current run is read from set_log_run(); records logged outside a run and
+    records at WARNING or above always pass.
+    """
+
+    def __init__(self, sample_every):
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        run = _current_run.get()
+        return run is None or (run - 1) % self.sample_every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket limit on the number of records below WARNING passed per second.
+    """
+
+    def __init__(self, rate_limit):
+        super().__init__()
+        self.rate_limit = float(rate_limit)
+        self.tokens = self.rate_limit
+        self.last_refill = time.monotonic()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _LocalQueueHandler(handlers.QueueHandler):
+    """
+    QueueHandler for an in-process queue: hands the record over untouched so that
+    message formatting happens on the listener thread, not the simulation thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+# Current run number used by RunSamplingFilter
+_current_run = contextvars.ContextVar('current_run', default=None)
+
+# Logger name -> (pid, QueueListener) for the listeners started in this process
+_queue_listeners = {}
+
+
+def set_log_run(run):
+    """
+    Marks the start of a simulation run for per-run log sampling (None outside runs).
+    """
+    _current_run.set(run)
+
+
+def _stop_queue_listeners():
+    """
+    Flushes and stops the queue listeners started in this process.
+    """
+    for name, (pid, listener) in list(_queue_listeners.items()):
+        if pid == os.getpid():
+            listener.stop()
+        del _queue_listeners[name]
+
+
+atexit.register(_stop_queue_listeners)
+
+
+def _build_handlers(log_file, quiet):
+    """
+    Builds the rotating file handler and, unless quiet, the console handler.
+    """
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+
+    # Rotating File Handler
+    handler = handlers.RotatingFileHandler(
+        log_file, maxBytes=5*1024*1024, backupCount=5
+    )
+    handler.setFormatter(formatter)
+    built = [handler]
+
+    # Console Handler
+    if not quiet:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        built.append(console_handler)
+    return built
+
+
+def setup_logger(name, log_file, level=logging.INFO, queued=False, quiet=False, sample_every=1,
+                 rate_limit=None):
     """
     Sets up a logger with the specified name and log file.
 
+    By default records are written synchronously. With queued=True the logger only
+    enqueues records and a background listener thread formats and writes them.
+    Listeners are per process, so a logger inherited through fork is rebuilt in the
+    child. The handlers are built on the first call for a name; the sampling and rate
+    limit filters are replaced on every call.
+
     Parameters:
     - name (str): Name of the logger.
     - log_file (str): File path to save logs.
     - level (int): Logging level.
+    - queued (bool): Hand records to a background listener thread.
+    - quiet (bool): Do not echo records to the console.
+    - sample_every (int): Keep the records of one run in every sample_every runs.
+    - rate_limit (float): Maximum records below WARNING per second (None for no limit).
 
     Returns:
     - logger (logging.Logger): Configured logger.
@@ -39,20 +160,48 @@ def setup_logger(name, log_file, level=logging.INFO):
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
+    # A queued logger set up before a fork has no running listener in the child
+    inherited = getattr(logger, '_setup_pid', os.getpid()) != os.getpid()
+    if inherited and queued:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        _queue_listeners.pop(name, None)
+
     # Avoid adding multiple handlers to the same logger
     if not logger.handlers:
-        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+        if queued:
+            record_queue = queue.SimpleQueue()
+            listener = handlers.QueueListener(record_queue, *_build_handlers(log_file, quiet),
+                                              respect_handler_level=True)
+            listener.start()
+            _queue_listeners[name] = (os.getpid(), listener)
+            logger.addHandler(_LocalQueueHandler(record_queue))
+        else:
+            for handler in _build_handlers(log_file, quiet):
+                logger.addHandler(handler)
+        logger._setup_pid = os.getpid()
 
-        # Rotating File Handler
-        handler = handlers.RotatingFileHandler(
-            log_file, maxBytes=5*1024*1024, backupCount=5
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+    for log_filter in list(logger.filters):
+        logger.removeFilter(log_filter)
+    if sample_every > 1:
+        logger.addFilter(RunSamplingFilter(sample_every))
+    if rate_limit is not None:
+        logger.addFilter(RateLimitFilter(rate_limit))
 
     return logger
+
+
+def close_logger(name):
+    """
+    Flushes and detaches the handlers of a logger, stopping its queue listener if any.
+
+    Parameters:
+    - name (str): Name of the logger.
+    """
+    logger = logging.getLogger(name)
+    entry = _queue_listeners.pop(name, None)
+    if entry is not None and entry[0] == os.getpid():
+        entry[1].stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
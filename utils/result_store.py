@@ -0,0 +1,111 @@
+# utils/result_store.py
+
+import os
+import json
+import hashlib
+import numpy as np
+
+# Directory of the result store; shared by every process working in the same tree
+DEFAULT_STORE_DIR = os.environ.get('RESULT_STORE_DIR', 'result_store')
+
+# Bumped whenever the stored results change meaning
+RESULT_STORE_VERSION = 2
+
+
+class ResultStore:
+    """
+    On-disk memo of simulation and validation results keyed by scenario fingerprint.
+
+    An entry is addressed by the fingerprint of the scenario (see
+    utils.fingerprint), the kind of result (e.g. 'approach1' or 'validation'), the
+    settings that change the result and, optionally, the hash of the code that
+    produced it, so equivalent scenarios resubmitted by the generation loop are
+    answered without running anything. Entries are JSON files written under a
+    process-unique name and renamed, so concurrent workers can share the store.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        """
+        Parameters:
+        - store_dir (str): Directory holding the stored results.
+        """
+        self.store_dir = store_dir
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(fingerprint, kind, params=None, code_digest=None):
+        """
+        Returns the address of a result.
+
+        Parameters:
+        - fingerprint (str): Scenario fingerprint.
+        - kind (str): Kind of result.
+        - params (dict): Settings that change the result (JSON-serializable).
+        - code_digest (str): Hash of the code producing the result (see
+          simulations.sweep_journal.code_hash), or None.
+
+        Returns:
+        - key (str): Hex SHA-256 digest.
+        """
+        payload = json.dumps({
+            'fingerprint': fingerprint,
+            'kind': kind,
+            'params': params or {},
+            'code_hash': code_digest,
+            'version': RESULT_STORE_VERSION
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, kind, key):
+        return os.path.join(self.store_dir, kind, f'{key}.json')
+
+    def get(self, fingerprint, kind, params=None, code_digest=None):
+        """
+        Returns a stored result, or None on a miss.
+        """
+        path = self._path(kind, self.key(fingerprint, kind, params, code_digest))
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                result = json.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except ValueError:
+            self.misses += 1
+            return None  # corrupt entry; the next put overwrites it
+        self.hits += 1
+        return result
+
+    def put(self, fingerprint, kind, params, result, code_digest=None):
+        """
+        Stores a result.
+
+        Parameters:
+        - fingerprint (str): Scenario fingerprint.
+        - kind (str): Kind of result.
+        - params (dict): Settings that change the result.
+        - result: JSON-serializable result; tuples come back as lists.
+        - code_digest (str): Hash of the code producing the result, or None.
+        """
+        path = self._path(kind, self.key(fingerprint, kind, params, code_digest))
+        try:
+            payload = json.dumps(result, default=_json_default)
+        except (TypeError, ValueError):
+            return  # not representable; the result is simply not memoized
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # the store is an optimisation; a read-only tree still works
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,295 @@
+# utils/results_sink.py
+
+import io
+import os
+import json
+import time
+import zlib
+import glob
+import struct
+import numpy as np
+import pandas as pd
+
+# File suffix and leading magic bytes of the chunked results format
+RESULTS_SUFFIX = '.chunks'
+RESULTS_MAGIC = b'ATRESULTS\x02'
+
+# Every chunk is framed as (payload length, CRC-32 of the payload) followed by the payload
+_FRAME_HEADER = struct.Struct('<II')
+
+# A payload starts with the length of its JSON column directory, followed by the directory and the column blobs
+_DIRECTORY_HEADER = struct.Struct('<I')
+
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Column types of the per-run records written by the approach runners
+RUN_RECORD_SCHEMA = {
+    'run': 'int64',
+    'success': 'bool',
+    'elapsed_s': 'float64',
+    'episode_return': 'float64',
+    'episode_length': 'int64',
+    'error': 'object'
+}
+
+
+class ResultsSink:
+    """
+    Append-only columnar store for per-run records.
+
+    Records are buffered column by column and flushed as one framed chunk every
+    batch_size records or flush_interval seconds, so appending a record costs a few
+    list appends. A chunk stores each column on its own: as a typed .npy array when
+    its values fit the schema dtype (or, outside the schema, a non-object dtype) and
+    as a JSON list otherwise; the metadata is stored once per chunk. Chunks are
+    written with a single write call and carry a checksum: after a crash the file
+    stays readable up to the last complete chunk, losing at most the records
+    buffered since the last flush.
+    """
+
+    def __init__(self, path, metadata=None, schema=None, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync=False):
+        """
+        Parameters:
+        - path (str): Output file; RESULTS_SUFFIX is appended if missing.
+        - metadata (dict): Constant columns (e.g. approach, config file) added to every chunk.
+        - schema (dict): Column name -> NumPy dtype; listed columns are stored as typed arrays.
+        - batch_size (int): Number of buffered records that triggers a flush.
+        - flush_interval (float): Seconds after which an append triggers a flush (None to disable).
+        - fsync (bool): Force every chunk to disk, surviving OS crashes at the cost of a sync per flush.
+        """
+        self.path = path if path.endswith(RESULTS_SUFFIX) else path + RESULTS_SUFFIX
+        self.metadata = dict(metadata or {})
+        self.schema = dict(schema or {})
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows_written = 0
+
+        self._columns = {}
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if os.path.exists(self.path):
+            # Drop a partial chunk left by a crash so appended chunks stay readable
+            valid_length = _valid_length(self.path)
+            if valid_length < os.path.getsize(self.path):
+                os.truncate(self.path, valid_length)
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(RESULTS_MAGIC)
+            self._file.flush()
+
+    def append(self, record):
+        """
+        Buffers one record (dict of column -> scalar).
+        """
+        columns = self._columns
+        size = self._size
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * size
+            column.append(value)
+        size += 1
+        if len(record) != len(columns):
+            for column in columns.values():
+                if len(column) < size:
+                    column.append(None)
+        self._size = size
+
+        if size >= self.batch_size or (
+                self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def append_columns(self, columns):
+        """
+        Writes a batch of records given column-wise (dict of column -> sequence) as its own chunk.
+        """
+        self.flush()
+        self._write_chunk({key: value for key, value in columns.items()})
+
+    def flush(self):
+        """
+        Writes the buffered records as one chunk.
+        """
+        if self._size:
+            columns, self._columns, self._size = self._columns, {}, 0
+            self._write_chunk(columns)
+        self._last_flush = time.monotonic()
+
+    def _write_chunk(self, columns):
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        if n_rows == 0:
+            return
+        directory = {'rows': n_rows, 'columns': [], 'constants': {}}
+        blobs = []
+        for key, values in columns.items():
+            kind, blob = _encode_column(values, self.schema.get(key))
+            directory['columns'].append([key, kind, len(blob)])
+            blobs.append(blob)
+        for key, value in self.metadata.items():
+            if key not in columns:
+                directory['constants'][key] = value
+
+        header = json.dumps(directory, default=_json_default).encode('utf-8')
+        payload = b''.join([_DIRECTORY_HEADER.pack(len(header)), header] + blobs)
+        self._file.write(_FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.rows_written += n_rows
+
+    def close(self):
+        """
+        Flushes the remaining records and closes the file.
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _encode_column(values, dtype):
+    """
+    Encodes a column as .npy bytes, or as a JSON list when it has no usable fixed-width dtype.
+
+    Returns:
+    - kind (str): 'npy' or 'json'.
+    - blob (bytes): Encoded column.
+    """
+    if dtype != 'object':
+        try:
+            array = np.asarray(values, dtype=dtype)
+        except (TypeError, ValueError):
+            array = None  # e.g. missing values in an integer column
+        if array is not None and array.dtype != object and array.ndim == 1:
+            buffer = io.BytesIO()
+            np.save(buffer, array, allow_pickle=False)
+            return 'npy', buffer.getvalue()
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    return 'json', json.dumps(list(values), default=_json_default).encode('utf-8')
+
+
+def _decode_chunk(payload):
+    """
+    Splits a chunk payload back into a dict of columns.
+    """
+    (header_length,) = _DIRECTORY_HEADER.unpack_from(payload)
+    start = _DIRECTORY_HEADER.size + header_length
+    directory = json.loads(payload[_DIRECTORY_HEADER.size:start])
+    chunk = {}
+    for key, kind, length in directory['columns']:
+        blob = payload[start:start + length]
+        start += length
+        if kind == 'npy':
+            chunk[key] = np.load(io.BytesIO(blob), allow_pickle=False)
+        else:
+            chunk[key] = json.loads(blob)
+    for key, value in directory['constants'].items():
+        chunk[key] = [value] * directory['rows']
+    return chunk
+
+
+def _iter_payloads(path):
+    """
+    Yields (end offset, payload) for every complete chunk of a results file.
+
+    A truncated or corrupt tail (left by a crash mid-write) ends the iteration.
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(len(RESULTS_MAGIC))
+        if not magic:
+            return
+        if magic != RESULTS_MAGIC:
+            raise ValueError(f"{path} is not a results file")
+        while True:
+            header = file.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            length, checksum = _FRAME_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            yield file.tell(), payload
+
+
+def _valid_length(path):
+    """
+    Returns the size of the readable prefix of a results file.
+    """
+    end = 0
+    for end, _ in _iter_payloads(path):
+        pass
+    return end or min(os.path.getsize(path), len(RESULTS_MAGIC))
+
+
+def iter_chunks(path):
+    """
+    Yields the complete chunks of a results file as dicts of columns.
+    """
+    for _, payload in _iter_payloads(path):
+        yield _decode_chunk(payload)
+
+
+def _results_files(source):
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '**', f'*{RESULTS_SUFFIX}'), recursive=True))
+    return [source if source.endswith(RESULTS_SUFFIX) else source + RESULTS_SUFFIX]
+
+
+def read_results(source):
+    """
+    Loads results files into one DataFrame.
+
+    Parameters:
+    - source (str): A results file, or a directory searched recursively for them.
+
+    Returns:
+    - df (pd.DataFrame): All complete chunks, in file and write order.
+    """
+    frames = [pd.DataFrame(chunk) for path in _results_files(source) for chunk in iter_chunks(path)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_results(source, output_file, columns=None):
+    """
+    Exports results files to CSV, or to Parquet when output_file ends in .parquet
+    (which needs pyarrow or fastparquet).
+
+    Parameters:
+    - source (str): A results file or a directory of them.
+    - output_file (str): Destination path.
+    - columns (list of str): Columns to write, in order; all columns if None.
+
+    Returns:
+    - df (pd.DataFrame): Exported data.
+    """
+    df = read_results(source)
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    if output_file.endswith('.parquet'):
+        df.to_parquet(output_file, index=False)
+    else:
+        df.to_csv(output_file, index=False)
+    return df
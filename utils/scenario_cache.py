@@ -0,0 +1,122 @@
+# utils/scenario_cache.py
+
+import os
+import json
+import stat
+import pickle
+import hashlib
+import yaml
+
+# Directory of the scenario cache; private to the user and shared by all of their processes
+DEFAULT_CACHE_DIR = os.environ.get('SCENARIO_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'at-scenarios')
+
+# Bumped whenever the cached representation changes
+CACHE_FORMAT_VERSION = 2
+
+# libyaml's loader is an order of magnitude faster than the pure-Python one when available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# (absolute path, mtime_ns, size) -> pickled parse result, per process
+_memory_cache = {}
+
+
+def parse_yaml_bytes(content):
+    """
+    Parses YAML text with the fastest available safe loader.
+
+    Parameters:
+    - content (bytes or str): YAML document.
+
+    Returns:
+    - data: Parsed document.
+    """
+    return yaml.load(content, Loader=YAML_LOADER)
+
+
+def private_cache_dir(cache_dir):
+    """
+    Creates a cache directory readable and writable by the current user only.
+
+    Returns:
+    - cache_dir (str): The directory, or None if it is owned by another user or writable
+      by others, in which case its contents must not be trusted.
+    """
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    info = os.stat(cache_dir)
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        return None
+    return cache_dir
+
+
+def load_cached_yaml(config_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Loads a YAML file, parsing it at most once per content across processes.
+
+    Lookups go through three levels: an in-process table keyed by path, mtime and
+    size; a JSON copy on disk named after the SHA-256 of the file's bytes; and finally
+    the YAML parser, whose result is written back to both levels. The disk copy is
+    plain data, so a planted cache file cannot run code, and documents that JSON does
+    not represent exactly (e.g. integer keys or dates) are not written to disk. Every
+    call returns a fresh copy, so callers may mutate the result.
+
+    Parameters:
+    - config_file (str): Path to the YAML file.
+    - cache_dir (str): Directory of the on-disk binary cache; None disables it.
+
+    Returns:
+    - data: Parsed document.
+    """
+    path = os.path.abspath(config_file)
+    st = os.stat(path)
+    memory_key = (path, st.st_mtime_ns, st.st_size)
+
+    payload = _memory_cache.get(memory_key)
+    if payload is not None:
+        return pickle.loads(payload)
+
+    with open(path, 'rb') as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    cache_path = None
+    if cache_dir:
+        try:
+            cache_dir = private_cache_dir(cache_dir)
+        except OSError:
+            cache_dir = None  # the cache is an optimisation; an unwritable location still works
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f'{digest}.v{CACHE_FORMAT_VERSION}.json')
+        try:
+            with open(cache_path, 'rb') as file:
+                data = json.loads(file.read())
+            _memory_cache[memory_key] = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            return data
+        except FileNotFoundError:
+            pass
+        except (ValueError, UnicodeDecodeError):
+            pass  # corrupt entry; re-parse and overwrite it
+
+    data = parse_yaml_bytes(content)
+    # In-process copies are pickles this process made itself
+    _memory_cache[memory_key] = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    if cache_path is not None:
+        try:
+            text = json.dumps(data)
+            if json.loads(text) == data:
+                tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as file:
+                    file.write(text)
+                os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError):
+            pass  # not representable in JSON, or the cache cannot be written
+
+    return data
+
+
+def clear_memory_cache():
+    """
+    Drops the in-process cache (the on-disk cache is left untouched).
+    """
+    _memory_cache.clear()
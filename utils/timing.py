@@ -0,0 +1,168 @@
+# utils/timing.py
+
+import time
+from contextlib import contextmanager
+
+# Linear sub-buckets per power of two; 2**SUB_BUCKET_BITS sub-buckets bound the relative error at ~3%
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Enough buckets for any duration representable in 64 bits of nanoseconds
+N_BUCKETS = (64 - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+# Percentiles reported for every phase
+PERCENTILES = (50, 90, 99)
+
+
+def _bucket_index(value):
+    """
+    Maps a non-negative integer to its log-linear bucket.
+    """
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def _bucket_upper_bound(index):
+    """
+    Returns the largest value stored in a bucket.
+    """
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of durations in nanoseconds.
+
+    Recording is a bucket computation and a list increment, so the histogram can sit
+    inside hot loops; percentiles are read back with a bounded relative error instead
+    of keeping every sample. The maximum is tracked exactly.
+    """
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, duration_ns, count=1):
+        """
+        Adds a duration in nanoseconds, count times.
+        """
+        if duration_ns < 0:
+            duration_ns = 0
+        self.counts[_bucket_index(duration_ns)] += count
+        self.count += count
+        self.total += duration_ns * count
+        if duration_ns > self.max:
+            self.max = duration_ns
+
+    def merge(self, other):
+        """
+        Adds the samples of another histogram to this one.
+        """
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """
+        Returns an upper bound of the q-th percentile (0-100) in nanoseconds, or None if empty.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, -(-self.count * q // 100))  # ceil without floats
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Returns the count, mean, reported percentiles and maximum in nanoseconds.
+        """
+        summary = {'count': self.count, 'mean': self.total / self.count if self.count else None}
+        for q in PERCENTILES:
+            summary[f'p{q}'] = self.percentile(q)
+        summary['max'] = self.max if self.count else None
+        return summary
+
+
+class PhaseTimer:
+    """
+    Collects per-phase durations measured with time.perf_counter_ns.
+
+    Hot loops take a timestamp with now() and hand the difference to record(); the
+    phase() context manager is the convenient form for coarser sections.
+    """
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, phase, duration_ns, count=1):
+        """
+        Adds a duration in nanoseconds to a phase, count times.
+        """
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.record(duration_ns, count)
+
+    def since(self, phase, start_ns):
+        """
+        Records the time elapsed since start_ns and returns the current timestamp.
+        """
+        end_ns = time.perf_counter_ns()
+        self.record(phase, end_ns - start_ns)
+        return end_ns
+
+    @contextmanager
+    def phase(self, phase):
+        """
+        Times the enclosed block as one sample of phase.
+        """
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter_ns() - start_ns)
+
+    def summary(self):
+        """
+        Returns {phase: histogram summary} with durations in nanoseconds.
+        """
+        return {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+
+
+def format_phase_summary(summary, unit=1e6, suffix='ms'):
+    """
+    Formats a PhaseTimer summary as one line per phase for logs and reports.
+
+    Parameters:
+    - summary (dict): Output of PhaseTimer.summary().
+    - unit (float): Nanoseconds per reported unit.
+    - suffix (str): Name of the reported unit.
+
+    Returns:
+    - text (str): 'phase: n=.. p50=.. p90=.. p99=.. max=..' entries joined by '; '.
+    """
+    parts = []
+    for phase, stats in summary.items():
+        values = ' '.join(
+            f"{key}={stats[key] / unit:.4f}{suffix}"
+            for key in [f'p{q}' for q in PERCENTILES] + ['max'] if stats[key] is not None
+        )
+        parts.append(f"{phase}: n={stats['count']} {values}")
+    return '; '.join(parts)
@@ -1,7 +1,38 @@
 # wrappers/custom_wrappers.py
 
+import time
 import numpy as np
-from gym import Wrapper, ActionWrapper
+import gymnasium
+import stable_baselines3
+from gymnasium import Wrapper, ActionWrapper, spaces
+from stable_baselines3.common.monitor import Monitor
+
+# Stable Baselines3 release (major.minor) whose Monitor.step FusedMonitorWrapper.step
+# reproduces; tests/test_fused_wrapper.py checks the two against each other
+FUSED_MONITOR_SB3_VERSION = '2.9'
+
+
+def to_int_action(action):
+    """
+    Converts an action from NumPy types to a Python integer.
+    """
+    if isinstance(action, np.ndarray):
+        action = action.squeeze()
+        if action.ndim == 0:
+            action = action.item()
+    elif isinstance(action, (np.integer,)):
+        action = int(action)
+    elif not isinstance(action, int):
+        try:
+            action = int(action)
+        except Exception as e:
+            raise ValueError(f"Unsupported action type: {type(action)}") from e
+
+    if not isinstance(action, int):
+        raise ValueError(f"Action conversion failed. Expected int, got {type(action)}")
+
+    return action
+
 
 class NumpyToIntActionWrapper(ActionWrapper):
     """
@@ -9,22 +40,7 @@ class NumpyToIntActionWrapper(ActionWrapper):
     Ensures compatibility with environments that expect actions as Python ints.
     """
     def action(self, action):
-        if isinstance(action, np.ndarray):
-            action = action.squeeze()
-            if action.ndim == 0:
-                action = action.item()
-        elif isinstance(action, (np.integer,)):
-            action = int(action)
-        elif not isinstance(action, int):
-            try:
-                action = int(action)
-            except Exception as e:
-                raise ValueError(f"Unsupported action type: {type(action)}") from e
-
-        if not isinstance(action, int):
-            raise ValueError(f"Action conversion failed. Expected int, got {type(action)}")
-
-        return action
+        return to_int_action(action)
 
 class StepAPICorrector(Wrapper):
     """
@@ -51,3 +67,69 @@ class StepAPICorrector(Wrapper):
         Assumes NASIM's reset returns (obs, info).
         """
         return self.env.reset(**kwargs)
+
+
+def fused_monitor_supported():
+    """
+    Returns True if the installed Stable Baselines3 is the release FusedMonitorWrapper
+    was checked against (FUSED_MONITOR_SB3_VERSION).
+    """
+    return '.'.join(stable_baselines3.__version__.split('.')[:2]) == FUSED_MONITOR_SB3_VERSION
+
+
+def _five_value_step(step):
+    """
+    Adapts an old-API step function (four return values) to the five-value API.
+    """
+    def adapted(action):
+        obs, reward, done, info = step(action)
+        return obs, reward, done, False, info
+    return adapted
+
+
+class FusedMonitorWrapper(Monitor):
+    """
+    NumpyToIntActionWrapper, StepAPICorrector and Monitor fused into one wrapper.
+
+    The action conversion and the step API are chosen once, from the action space and
+    the environment class, so a step is one call into the environment plus the
+    episode bookkeeping of Monitor, which it subclasses: episode statistics, the
+    'episode' info entry and the monitor file are the same as with the stacked wrappers.
+    The bookkeeping is copied from Monitor.step and uses its private state, so it is
+    only used with FUSED_MONITOR_SB3_VERSION (see fused_monitor_supported).
+    """
+
+    def __init__(self, env, **monitor_kwargs):
+        """
+        Parameters:
+        - env (gym.Env): Unwrapped environment, e.g. NASimEnv.
+        - monitor_kwargs: Keyword arguments of Monitor (filename, allow_early_resets, ...).
+        """
+        super().__init__(env, **monitor_kwargs)
+        # Discrete actions only need int(); other spaces keep the checked conversion
+        self._convert_action = int if isinstance(env.action_space, spaces.Discrete) else to_int_action
+        # Gymnasium environments already return five values
+        self._env_step = env.step if isinstance(env.unwrapped, gymnasium.Env) else _five_value_step(env.step)
+
+    def step(self, action):
+        if self.needs_reset:
+            raise RuntimeError("Tried to step environment that needs reset")
+        observation, reward, terminated, truncated, info = self._env_step(self._convert_action(action))
+        self.rewards.append(float(reward))
+        self.total_steps += 1
+        if terminated or truncated:
+            self.needs_reset = True
+            ep_rew = sum(self.rewards)
+            ep_len = len(self.rewards)
+            ep_time = time.time() - self.t_start
+            ep_info = {"r": round(ep_rew, 6), "l": ep_len, "t": round(ep_time, 6)}
+            for key in self.info_keywords:
+                ep_info[key] = info[key]
+            self.episode_returns.append(ep_rew)
+            self.episode_lengths.append(ep_len)
+            self.episode_times.append(ep_time)
+            ep_info.update(self.current_reset_info)
+            if self.results_writer:
+                self.results_writer.write_row(ep_info)
+            info["episode"] = ep_info
+        return observation, reward, terminated, truncated, info